@@ -1,5 +1,7 @@
 import datetime
+import json
 import os
+import sys
 import tarfile
 
 import requests
@@ -26,11 +28,55 @@ def get_request(url, **kwargs):
     return r
 
 
+def post_request(url, **kwargs):
+    try:
+        r = requests.post(url, **kwargs)
+    except ConnectionError:
+        raise MonkeyCLIException("Unable to connect to monkey-core. " +
+                                 "\nPlease ensure monkey-core is running")
+    return r
+
+
+# (url, params) -> (etag, json) of the last response that carried an ETag
+conditional_cache = dict()
+
+
+def get_json_conditional(url, params=None):
+    """ GETs a json response, reusing the cached copy when core answers 304
+
+    Raises:
+        MonkeyCLIException: When monkey-core can not be reached
+    """
+    params = params or dict()
+    cache_key = (url, tuple(sorted((k, str(v)) for k, v in params.items())))
+    cached = conditional_cache.get(cache_key, None)
+    headers = dict()
+    if cached is not None:
+        headers["If-None-Match"] = cached[0]
+    r = get_request(url=url, params=params, headers=headers)
+    if r.status_code == 304 and cached is not None:
+        return cached[1]
+    res = r.json()
+    etag = r.headers.get("ETag", None)
+    if etag is not None:
+        conditional_cache[cache_key] = (etag, res)
+    return res
+
+
 def get_new_job_uid():
     r = requests.get(build_url("get/new_job_uid"))
     return r.text
 
 
+def get_new_job_uids(num_uids):
+    r = get_request(url=build_url("get/new_job_uids"),
+                    params={"num": num_uids})
+    res = r.json()
+    if not res.get("success", False):
+        raise MonkeyCLIException(res.get("msg", "Unable to reserve job uids"))
+    return res["job_uids"]
+
+
 def print_time_delta(delta, timeunits=False):
     seconds = delta.total_seconds()
     if seconds > 3600:
@@ -55,13 +101,12 @@ def print_time_delta(delta, timeunits=False):
 
 def list_jobs(args, printout=False):
     try:
-        r = get_request(url=build_url("list/jobs"), params=args)
+        res = get_json_conditional(url=build_url("list/jobs"), params=args)
     except Exception as e:
         if printout:
             print(e)
         return []
     if printout:
-        res = r.json()
         print("Listing Jobs available")
 
         job_dates = [(datetime.datetime.utcfromtimestamp(
@@ -94,7 +139,7 @@ def list_jobs(args, printout=False):
                 date.strftime(date_format), elapsed, runtime)
             print(line)
 
-    return r.json()
+    return res
 
 
 def list_providers(printout=False):
@@ -162,10 +207,14 @@ def list_local_instances(printout=False):
 
 def get_full_uid(job_uid, printout=False):
     r = get_request(url=build_url("get/job_uid"), params={"job_uid": job_uid})
-    full_uid = r.json().get("job_uid", None)
+    res = r.json()
+    full_uid = res.get("job_uid", None)
     if full_uid is None:
-        raise MonkeyCLIJobUIDException(
-            f"Unable to find the full id for shortened id: {job_uid}")
+        msg = f"Unable to find the full id for shortened id: {job_uid}"
+        suggestions = res.get("suggestions", None)
+        if suggestions:
+            msg += "\nDid you mean:\n" + "\n".join(suggestions)
+        raise MonkeyCLIJobUIDException(msg)
     return full_uid
 
 
@@ -182,13 +231,12 @@ def info_jobs(job_uids, printout=False):
             continue
 
         try:
-            r = get_request(url=build_url("get/job_info"),
-                            params={"job_uid": full_job_uid})
+            result = get_json_conditional(url=build_url("get/job_info"),
+                                          params={"job_uid": full_job_uid})
         except Exception as e:
             if printout:
                 print(e)
             continue
-        result = r.json()
         job_info = result["job_info"]
 
         date_format = "%-I:%M %p %-m-%d-%y"
@@ -231,7 +279,84 @@ def info_jobs(job_uids, printout=False):
     return info
 
 
-def job_output(job_uid, printout=False):
+def info_sweep(sweep_id, printout=False):
+    r = get_request(url=build_url("get/sweep_info"),
+                    params={"sweep_id": sweep_id})
+    result = r.json()
+    if not result.get("success", False):
+        if printout:
+            print(result.get("msg", "Unable to find sweep"))
+        return None
+    sweep_info = result["sweep_info"]
+    if printout:
+        print("Sweep {}: {}/{} jobs finished".format(
+            colored(sweep_id, "green"), sweep_info["num_finished"],
+            sweep_info["num_jobs"]))
+        for state, count in sweep_info["state_counts"].items():
+            print("\t{:<24} {}".format(human_readable_state(state), count))
+        print("")
+        header = colored("{:^26} {:^24} {}".format("Job Name", "Status",
+                                                   "Parameters"),
+                         attrs=["bold"])
+        print(header)
+        for job in sweep_info["jobs"]:
+            line = "{:^35} {:^24} {}".format(
+                colored(job["job_uid"], "green"),
+                human_readable_state(job["state"]), job["sweep_parameters"])
+            print(line)
+    return sweep_info
+
+
+# Remembers which output files were downloaded and their md5
+OUTPUT_MANIFEST_FILE = ".monkey-manifest.json"
+
+
+def load_output_manifest(manifest_path):
+    try:
+        with open(manifest_path, "r") as f:
+            return {x["path"]: x for x in json.load(f)}
+    except (OSError, ValueError, KeyError, TypeError):
+        return dict()
+
+
+def save_output_manifest(manifest_path, files):
+    with open(manifest_path, "w") as f:
+        json.dump(sorted(files.values(), key=lambda x: x["path"]), f)
+
+
+def is_output_member_safe(output_dir, member):
+    """ Output tars are only extracted into output_dir
+
+    Absolute paths, paths escaping through .. and links pointing outside of
+    output_dir are rejected, as unpack_manifest does on instances.
+    """
+    output_dir = os.path.abspath(output_dir)
+    paths = [member.name]
+    if member.issym():
+        paths.append(
+            os.path.join(os.path.dirname(member.name), member.linkname))
+    elif member.islnk():
+        paths.append(member.linkname)
+    for path in paths:
+        destination = os.path.abspath(os.path.join(output_dir, path))
+        if os.path.isabs(path) or \
+                not destination.startswith(os.path.join(output_dir, "")):
+            return False
+    return True
+
+
+def job_output(job_uid,
+               paths=None,
+               compression=None,
+               full=False,
+               delete=False,
+               printout=False):
+    """ Downloads a job's output into monkey-output/<job_uid>
+
+    Unless full is set only files whose md5 differs from the last download
+    are transferred. With delete, files that no longer exist in the job's
+    output are removed locally.
+    """
     cwd = os.getcwd()
     full_uid = get_full_uid(job_uid)
 
@@ -261,30 +386,285 @@ def job_output(job_uid, printout=False):
         output_dir = symlink_dir
 
     args = {"job_uid": full_uid}
+    if paths:
+        args["path"] = list(paths)
+    if compression is not None:
+        args["compression"] = compression
+    manifest_path = os.path.join(output_dir, OUTPUT_MANIFEST_FILE)
+    changed_paths = None
+    if not full:
+        try:
+            r = get_request(url=build_url("get/job/output/manifest"),
+                            params={
+                                "job_uid": full_uid,
+                                "path": list(paths or [])
+                            })
+            manifest = r.json()
+        except Exception as e:
+            if printout:
+                print(e)
+            return []
+        if not manifest.get("success", False):
+            if printout:
+                print(manifest.get("msg", "Unable to retrieve output"))
+            return []
+        remote_files = {x["path"]: x for x in manifest["files"]}
+        local_files = load_output_manifest(manifest_path)
+        changed_paths = []
+        for path, remote in remote_files.items():
+            local = local_files.get(path, None)
+            local_path = os.path.join(output_dir, path)
+            if local is None or local.get("md5") != remote["md5"] or \
+                    not os.path.isfile(local_path) or \
+                    os.path.getsize(local_path) != remote["size"]:
+                changed_paths.append(path)
+        # Only files a previous sync downloaded are candidates for deletion
+        removed_paths = [
+            x for x in local_files
+            if x not in remote_files and (not paths or any(
+                x == p or x.startswith(os.path.join(p, "")) for p in paths))
+        ]
+        if delete:
+            for path in removed_paths:
+                if printout:
+                    print(f"Deleting {path}")
+                try:
+                    os.remove(os.path.join(output_dir, path))
+                except OSError:
+                    pass
+            local_files = {
+                k: v
+                for k, v in local_files.items()
+                if k not in removed_paths
+            }
+        if len(changed_paths) == 0:
+            save_output_manifest(manifest_path, {
+                **local_files,
+                **remote_files
+            })
+            print(f"Output is up to date ({len(remote_files)} files)")
+            print(f"\nTo see your output run:\ncd {output_dir}")
+            return f"cd {output_dir}"
+        print(f"Downloading {len(changed_paths)} of {len(remote_files)} " +
+              "output files")
+
     try:
-        r = get_request(url=build_url("get/job/output"),
-                        params=args,
-                        stream=True)
+        if changed_paths is None:
+            r = get_request(url=build_url("get/job/output"),
+                            params=args,
+                            stream=True)
+        else:
+            # The changed paths can be too many for a query string
+            args.pop("path", None)
+            r = post_request(url=build_url("get/job/output"),
+                             params=args,
+                             json={"paths": changed_paths},
+                             stream=True)
     except Exception as e:
         if printout:
             print(e)
         return []
+    if r.headers.get("Content-Type", "").startswith("application/json"):
+        if printout:
+            print(r.json().get("msg", "Unable to retrieve output"))
+        return []
 
-    output_tar = os.path.join(output_dir, "output.tar")
-
-    with open(output_tar, "wb") as f:
-        for chunk in r.iter_content(32 * 1024):
-            f.write(chunk)
-
-    os.chdir(output_dir)
-    tf = tarfile.open(output_tar)
-    tf.extractall()
-    tf.close()
-    os.chdir(cwd)
+    # Extract members as they arrive instead of saving the tar first
+    r.raw.decode_content = True
+    with tarfile.open(fileobj=r.raw, mode="r|*") as tf:
+        for member in tf:
+            if not is_output_member_safe(output_dir, member):
+                if printout:
+                    print(f"Skipping {member.name}, outside of the output")
+                continue
+            if printout:
+                print(f"Extracting {member.name}")
+            tf.extract(member, path=output_dir)
+    r.close()
+    if changed_paths is not None:
+        save_output_manifest(manifest_path, {**local_files, **remote_files})
     print(f"\nTo see your output run:\ncd {output_dir}")
     return f"cd {output_dir}"
 
 
+def watch_events(job_uid=None, project=None, printout=False):
+    params = dict()
+    if job_uid is not None:
+        params["job_uid"] = get_full_uid(job_uid)
+    if project is not None:
+        params["project"] = project
+    r = get_request(url=build_url("events"), params=params, stream=True)
+    if printout:
+        print("Watching job state changes, Ctrl-C to stop\n")
+    try:
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if printout:
+                timestamp = datetime.datetime.fromtimestamp(
+                    event["timestamp"]).strftime("%H:%M:%S")
+                previous_state = "Submitted"
+                if event["previous_state"] is not None:
+                    previous_state = human_readable_state(
+                        event["previous_state"])
+                print("{} {:^35} {:>24} -> {}".format(
+                    timestamp, colored(event["job_uid"], "green"),
+                    previous_state, human_readable_state(event["state"])))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        r.close()
+
+
+def job_logs(job_uid, follow=False, tail_lines=None, printout=False):
+    """ Prints a job's run.log, fetching only bytes not yet received
+
+    With follow, waits for new output until the job finishes or Ctrl-C.
+    """
+    full_job_uid = get_full_uid(job_uid)
+    params = {"job_uid": full_job_uid}
+    if tail_lines is not None:
+        params["tail_lines"] = tail_lines
+    try:
+        while True:
+            r = get_request(url=build_url("get/job/logs"), params=params)
+            next_offset = r.headers.get("X-Log-Offset", None)
+            if next_offset is None:
+                print(r.json().get("msg", "Unable to retrieve logs"))
+                return False
+            if printout and r.content:
+                sys.stdout.write(r.content.decode("utf-8", errors="replace"))
+                sys.stdout.flush()
+            params = {"job_uid": full_job_uid, "offset": next_offset}
+            if not follow:
+                if int(next_offset) >= int(r.headers.get("X-Log-Size", 0)):
+                    return True
+                continue
+            if r.headers.get("X-Job-State") == "FINISHED" and not r.content:
+                return True
+            params["follow"] = "true"
+    except KeyboardInterrupt:
+        return True
+
+
+def list_artifacts(job_uid, paths=None, printout=False):
+    full_job_uid = get_full_uid(job_uid)
+    r = get_request(url=build_url("list/job/artifacts"),
+                    params={
+                        "job_uid": full_job_uid,
+                        "path": list(paths or [])
+                    })
+    res = r.json()
+    if not res.get("success", False):
+        print(res.get("msg", "Unable to list artifacts"))
+        return []
+    if printout:
+        for f in res["files"]:
+            print("{:>12}  {}".format(f["size"], f["path"]))
+    return res["files"]
+
+
+ARTIFACT_DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def download_artifact(job_uid, path, destination=None, printout=False):
+    """ Downloads one file from a job's persisted folders
+
+    The file is written to destination.part first, an existing partial
+    download is resumed with a Range request.
+
+    Returns:
+        str: The downloaded file's path, None if the download failed
+    """
+    full_job_uid = get_full_uid(job_uid)
+    if destination is None:
+        destination = os.path.basename(os.path.normpath(path))
+    elif os.path.isdir(destination):
+        destination = os.path.join(destination,
+                                   os.path.basename(os.path.normpath(path)))
+    part_path = destination + ".part"
+    offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset > 0 else dict()
+    r = get_request(url=build_url("get/job/artifact"),
+                    params={
+                        "job_uid": full_job_uid,
+                        "path": path
+                    },
+                    headers=headers,
+                    stream=True)
+    if r.headers.get("Content-Type", "").startswith("application/json"):
+        print(r.json().get("msg", "Unable to download artifact"))
+        return None
+    if r.status_code == 416:
+        r.close()
+        if not r.headers.get("Content-Range", "").endswith(f"/{offset}"):
+            # The file shrank since the partial download, start over
+            os.remove(part_path)
+            return download_artifact(job_uid=full_job_uid,
+                                     path=path,
+                                     destination=destination,
+                                     printout=printout)
+        # Otherwise the partial download is already complete
+    elif r.status_code in (200, 206):
+        mode = "ab" if r.status_code == 206 else "wb"
+        if printout and r.status_code == 206:
+            print(f"Resuming {path} at byte {offset}")
+        with open(part_path, mode) as f:
+            for chunk in r.iter_content(
+                    chunk_size=ARTIFACT_DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+        r.close()
+    else:
+        print(f"Unable to download artifact: {r.status_code}")
+        return None
+    os.replace(part_path, destination)
+    if printout:
+        print(f"Downloaded {path} to {destination}")
+    return destination
+
+
+def attach_job(job_uid, printout=False):
+    """ Follows a job's state changes and log lines until it finishes
+
+    Ctrl-C detaches, the job keeps running on monkey-core.
+
+    Returns:
+        str: The last state seen
+    """
+    full_job_uid = get_full_uid(job_uid)
+    r = get_request(url=build_url("attach/job"),
+                    params={"job_uid": full_job_uid},
+                    stream=True)
+    state = None
+    if printout:
+        print("Attached to {}, Ctrl-C to detach\n".format(
+            colored(full_job_uid, "green")))
+    try:
+        for line in r.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if event["type"] == "state":
+                state = event["state"]
+                if printout:
+                    print(
+                        colored("[{}]".format(human_readable_state(state)),
+                                "yellow"))
+            elif event["type"] == "log":
+                if printout:
+                    for log_line in event["lines"]:
+                        print(log_line)
+            elif event["type"] == "end":
+                break
+    except KeyboardInterrupt:
+        if printout:
+            print(f"\nDetached, {full_job_uid} keeps running")
+    finally:
+        r.close()
+    return state
+
+
 def info_provider(provider, printout=False):
     if printout:
         print(f"Retrieving info for {provider}")
@@ -1,61 +1,225 @@
 import fnmatch
 import glob
 import hashlib
+import json
 import os
-import shutil
+import queue
+import random
 import subprocess
 import tarfile
 import tempfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-from dirhash import dirhash
+from requests.adapters import HTTPAdapter
 from termcolor import colored
 
+from monkeycli.core_info import MonkeyCLIException
 from monkeycli.utils import build_url
 
-compression_map = {"tar": ".tar", "gztar": ".tar.gz", "zip": ".zip"}
+# Codebases are uploaded as a manifest of per file content hashes and
+# datasets as a manifest of content defined chunks per file
+MANIFEST_EXTENSION = ".manifest.json"
 
+# Chunks are 512KB to 4MB, about 1MB on average
+CDC_MIN_CHUNK_SIZE = 512 * 1024
+CDC_MAX_CHUNK_SIZE = 4 * 1024 * 1024
+# Bytes in the boundary window, each passes one of its bits with p = 1/2
+CDC_BOUNDARY_BITS = 19
+# Bytes tested for a boundary at once
+CDC_SCAN_SIZE = 16 * 1024
+CDC_READ_SIZE = 4 * 1024 * 1024
+CDC_SEED = 1729
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Chunks uploaded at once, each over its own pooled connection
+UPLOAD_STREAMS = 4
+# Chunks archived ahead of the upload, bounds the memory of the pipeline
+UPLOAD_BUFFER_CHUNKS = 4
+# Level of the gzip encoding of upload chunks, 0 sends them uncompressed
+UPLOAD_COMPRESSION_LEVEL = 1
+# Attempts at an interrupted upload, each resumes from the received chunks
+UPLOAD_RETRIES = 5
+UPLOAD_RETRY_WAIT = 2
+# Chunks of dataset files by absolute path, size and mtime
+CDC_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "monkey",
+                              "dataset_chunks.json")
 
-def check_or_upload_dataset(dataset, provider_name, compression_type="tar"):
+
+class MonkeyCLIUploadRejectedException(MonkeyCLIException):
+    pass
+
+
+def get_byte_table():
+    # Fixed seed, every client must find the same chunk boundaries.  A
+    # permutation sets each bit for exactly half of the byte values.
+    byte_values = list(range(256))
+    random.Random(CDC_SEED).shuffle(byte_values)
+    return bytes(byte_values)
+
+
+CDC_BYTE_TABLE = get_byte_table()
+CDC_SCAN_LANES = int.from_bytes(b"\x01" * CDC_SCAN_SIZE, "little")
+
+
+def find_chunk_boundary(data):
+    """ Content defined chunk boundary from a window of the last bytes
+
+    Every byte is mapped to a random pattern, a position is a boundary when
+    the byte t places back has bit t % 8 of its pattern set for each t in
+    the window.  A boundary follows the first such byte after
+    CDC_MIN_CHUNK_SIZE, so inserting or appending data only moves the
+    boundaries around the change.
+
+    Each block is tested at once: the mapped block is one integer with a
+    byte per lane, shifting it by 8t - t % 8 moves bit t % 8 of every byte to
+    bit 0 of the lane t bytes later, and the and of all shifts leaves bit 0
+    set in the lanes of boundaries.
+    """
+    end = min(len(data), CDC_MAX_CHUNK_SIZE)
+    if end <= CDC_MIN_CHUNK_SIZE:
+        return end
+    view = memoryview(data)
+    window = CDC_BOUNDARY_BITS - 1
+    for start in range(CDC_MIN_CHUNK_SIZE, end, CDC_SCAN_SIZE):
+        stop = min(start + CDC_SCAN_SIZE, end)
+        block = bytes(view[start - window:stop]).translate(CDC_BYTE_TABLE)
+        patterns = int.from_bytes(block, "little")
+        lanes = patterns
+        for t in range(1, CDC_BOUNDARY_BITS):
+            lanes &= patterns << (8 * t - t % 8)
+        lanes = (lanes >> (8 * window)) & CDC_SCAN_LANES
+        if lanes:
+            return start + lanes.to_bytes(stop - start, "little").find(1) + 1
+    return end
+
+
+def calculate_file_chunks(filename):
+    """ Splits a file into content defined chunks
+
+    Returns:
+        list: {"hash": sha256, "size": bytes} of each chunk in order
+    """
+    chunks = []
+    with open(filename, "rb") as f:
+        data = b""
+        offset = 0
+        eof = False
+        while True:
+            if not eof and len(data) - offset < CDC_MAX_CHUNK_SIZE:
+                block = f.read(CDC_READ_SIZE)
+                eof = len(block) == 0
+                data = data[offset:] + block
+                offset = 0
+                continue
+            if offset == len(data):
+                break
+            view = memoryview(data)[offset:]
+            boundary = find_chunk_boundary(view)
+            chunks.append({
+                "hash": hashlib.sha256(view[:boundary]).hexdigest(),
+                "size": boundary
+            })
+            offset += boundary
+    return chunks
+
+
+def load_chunk_cache():
+    try:
+        with open(CDC_CACHE_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def save_chunk_cache(chunk_cache):
+    os.makedirs(os.path.dirname(CDC_CACHE_PATH), exist_ok=True)
+    with tempfile.NamedTemporaryFile("w",
+                                     dir=os.path.dirname(CDC_CACHE_PATH),
+                                     delete=False) as f:
+        json.dump(chunk_cache, f)
+    os.replace(f.name, CDC_CACHE_PATH)
+
+
+def get_dataset_manifest(dataset_path):
+    """ Lists every file of a dataset with its chunks
+
+    Chunks of files whose size and mtime did not change since the last
+    upload are read from the chunk cache instead of chunking them again.
+    """
+    chunk_cache = load_chunk_cache()
+    files = []
+    for root, dirs, filenames in os.walk(dataset_path):
+        dirs.sort()
+        for fn in sorted(filenames):
+            file_path = os.path.join(root, fn)
+            if not os.path.isfile(file_path):
+                continue
+            stat = os.stat(file_path)
+            cache_key = os.path.abspath(file_path)
+            cache_stamp = [stat.st_size, stat.st_mtime_ns]
+            cached = chunk_cache.get(cache_key, None)
+            if cached is not None and cached["stamp"] == cache_stamp:
+                chunks = cached["chunks"]
+            else:
+                chunks = calculate_file_chunks(file_path)
+                chunk_cache[cache_key] = {
+                    "stamp": cache_stamp,
+                    "chunks": chunks
+                }
+            files.append({
+                "path": os.path.relpath(file_path, dataset_path),
+                "mode": stat.st_mode & 0o777,
+                "chunks": chunks,
+            })
+    save_chunk_cache(chunk_cache)
+    manifest = {"files": files}
+    manifest_checksum = hashlib.sha256(
+        json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+    return manifest, manifest_checksum
+
+
+def check_or_upload_dataset(dataset, provider_name):
     print("Uploading dataset...")
     dataset_name = dataset["name"]
     dataset_path = dataset["path"]
-    checksum = dirhash(dataset_path, "md5")
+    manifest, checksum = get_dataset_manifest(dataset_path)
     print("Dataset checksum: {}".format(checksum))
 
-    if dataset.get("compression", "tar"):
-        compression_type = dataset.get("compression", "tar")
-    compression_suffix = compression_map[compression_type]
-
     dataset_params = {
         "name": dataset_name,
         "checksum": checksum,
         "path": dataset_path,
-        "extension": compression_suffix,
+        "extension": MANIFEST_EXTENSION,
         "provider": provider_name
     }
     r = requests.get(build_url("check/dataset"), params=dataset_params)
     dataset_found, msg = r.json().get("found", False), r.json().get("msg", "")
     print(msg)
     if dataset_found == False:
-        with tempfile.NamedTemporaryFile() as dir_tmp:
-            print("Compressing Dataset...")
-            shutil.make_archive(dir_tmp.name, compression_type, dataset_path)
-            compressed_name = dir_tmp.name + compression_suffix
-            print(compressed_name)
-            try:
-                with open(compressed_name, "rb") as compressed_dataset:
-                    r = requests.post(build_url("upload/dataset/"),
-                                      data=compressed_dataset,
-                                      params=dataset_params,
-                                      allow_redirects=True)
-                    success = r.json()["success"]
-                    print("Upload Dataset Success: ", success)
-            except Exception as e:
-                print(f"Upload failure {e}")
-            finally:
-                os.remove(compressed_name)
-    return checksum, compression_suffix
+        # Only chunks monkey-core has never stored are uploaded
+        blob_sources = dict()
+        for item in manifest["files"]:
+            offset = 0
+            file_path = os.path.join(dataset_path, item["path"])
+            for chunk in item["chunks"]:
+                blob_sources.setdefault(chunk["hash"],
+                                        (file_path, offset, chunk["size"]))
+                offset += chunk["size"]
+        try:
+            upload_blobs(blob_sources=blob_sources,
+                         provider_name=provider_name)
+            r = requests.post(build_url("upload/dataset/"),
+                              data=json.dumps(manifest),
+                              params=dataset_params,
+                              allow_redirects=True)
+            success = r.json()["success"]
+            print("Upload Dataset Success: ", success)
+        except Exception as e:
+            print(f"Upload failure {e}")
+    return checksum, MANIFEST_EXTENSION
 
 
 def upload_persisted_folder(persist, job_uid, provider_name):
@@ -72,31 +236,39 @@ def upload_persisted_folder(persist, job_uid, provider_name):
     print("Persisting: ", all_files)
     if "" in all_files:
         all_files.remove("")
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".tar") as dir_tmp:
-        code_tar = tarfile.open(dir_tmp.name, "w")
-        code_tar.add(persist)
-        for file in all_files:
-            code_tar.add(file)
-        code_tar.close()
-        success = False
-        try:
-            with open(dir_tmp.name, "rb") as compressed_persist:
-                r = requests.post(build_url("upload/persist"),
-                                  data=compressed_persist,
-                                  params={
-                                      "job_uid": job_uid,
-                                      "provider": provider_name
-                                  },
-                                  allow_redirects=True)
-                success = r.json()["success"]
-                print(
-                    "Upload Persisted Folder:",
-                    colored("Successful", "green") if success else colored(
-                        "FAILED", "red"))
-        except Exception as e:
-            print(f"Upload failure: {e}")
-        if success == False:
-            raise ValueError("Failed to upload codebase")
+
+    def write_archive(fileobj):
+        with tarfile.open(fileobj=fileobj, mode="w|") as code_tar:
+            code_tar.add(persist)
+            for file in all_files:
+                code_tar.add(file)
+
+    # Unchanged files archive to the same bytes, so a new run resumes the
+    # upload session of an interrupted one
+    persist_stats = []
+    for file in [persist] + all_files:
+        stat = os.lstat(file)
+        persist_stats.append([file, stat.st_size, stat.st_mtime_ns])
+    upload_key = hashlib.sha256(
+        json.dumps(persist_stats).encode("utf-8")).hexdigest()
+    success = False
+    try:
+        upload_stream_resumable(write_archive,
+                                upload_key=upload_key,
+                                target="persist",
+                                params={
+                                    "job_uid": job_uid,
+                                    "provider": provider_name
+                                })
+        success = True
+    except Exception as e:
+        print(f"Upload failure: {e}")
+    print(
+        "Upload Persisted Folder:",
+        colored("Successful", "green") if success else colored(
+            "FAILED", "red"))
+    if success == False:
+        raise ValueError("Failed to upload codebase")
     print()
 
 
@@ -108,11 +280,275 @@ def calculate_file_list_checksum(filenames):
     return hash_current.hexdigest()
 
 
-def check_or_upload_codebase(code,
-                             job_uid,
-                             run_name,
-                             provider_name,
-                             compression_type="tar"):
+def calculate_file_hash(filename):
+    hash_file = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            hash_file.update(block)
+    return hash_file.hexdigest()
+
+
+def get_codebase_manifest(filenames):
+    """ Lists the path, sha256 and permissions of every file
+
+    The codebase checksum is the hash of the manifest, so it changes when
+    any file does while unchanged files keep their blob.
+    """
+    files = []
+    for fn in filenames:
+        if os.path.isfile(fn):
+            files.append({
+                "path": fn,
+                "hash": calculate_file_hash(fn),
+                "mode": os.stat(fn).st_mode & 0o777,
+            })
+    manifest = {"files": files}
+    manifest_checksum = hashlib.sha256(
+        json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+    return manifest, manifest_checksum
+
+
+def upload_blobs(blob_sources, provider_name):
+    """ Uploads the blobs whose content monkey-core does not have yet
+
+    Args:
+        blob_sources (dict): sha256 -> (file path, offset, size) of the
+            bytes of each blob
+    """
+    r = requests.post(build_url("check/blobs"),
+                      params={"provider": provider_name},
+                      json={"hashes": list(blob_sources.keys())})
+    res = r.json()
+    if not res.get("success", False):
+        raise ValueError(res.get("msg", "Failed to check blobs"))
+    missing = res["missing"]
+    print(f"Uploading {len(missing)} of {len(blob_sources)} blobs")
+    if len(missing) == 0:
+        return
+
+    # The tar only depends on the blobs in it, so a new run uploading the
+    # same blobs resumes the upload session of an interrupted one
+    blob_hashes = sorted(missing)
+    upload_key = hashlib.sha256(
+        json.dumps(blob_hashes).encode("utf-8")).hexdigest()
+    upload_stream_resumable(
+        lambda fileobj: write_blobs_tar(fileobj, blob_hashes, blob_sources),
+        upload_key=upload_key,
+        target="blobs",
+        params={"provider": provider_name})
+
+
+def write_blobs_tar(fileobj, blob_hashes, blob_sources):
+    """ Writes a tar stream whose members are named by their sha256 """
+    with tarfile.open(fileobj=fileobj, mode="w|") as blobs_tar:
+        for blob_hash in blob_hashes:
+            file_path, offset, size = blob_sources[blob_hash]
+            tar_info = tarfile.TarInfo(name=blob_hash)
+            tar_info.size = size
+            with open(file_path, "rb") as f:
+                f.seek(offset)
+                blobs_tar.addfile(tar_info, fileobj=f)
+
+
+def get_upload_http_session(streams):
+    """ A requests session keeping one connection open per upload stream """
+    http = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=streams)
+    http.mount("http://", adapter)
+    http.mount("https://", adapter)
+    return http
+
+
+class UploadChunkWriter():
+    """ File object cutting what is written to it into upload chunks
+
+    Full chunks are put on a bounded queue, archiving waits for the upload
+    to catch up instead of buffering the whole archive.
+    """
+
+    def __init__(self, chunk_size, chunks, cancelled):
+        super().__init__()
+        self.chunk_size = chunk_size
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.buffer = bytearray()
+
+    def write(self, data):
+        self.buffer += data
+        while len(self.buffer) >= self.chunk_size:
+            self.put(bytes(self.buffer[:self.chunk_size]))
+            del self.buffer[:self.chunk_size]
+        return len(data)
+
+    def put(self, chunk):
+        while not self.cancelled.is_set():
+            try:
+                self.chunks.put(chunk, timeout=1)
+                return
+            except queue.Full:
+                continue
+        raise RuntimeError("Upload cancelled")
+
+    def close(self):
+        if self.buffer:
+            self.put(bytes(self.buffer))
+        self.buffer = bytearray()
+
+
+def upload_session_chunk(http, session, index, chunk):
+    """ Uploads one chunk, gzip encoded when that makes it smaller
+
+    Chunks are compressed by the upload threads, zlib releases the GIL so
+    the streams compress in parallel.
+    """
+    checksum = hashlib.sha256(chunk).hexdigest()
+    headers = dict()
+    if UPLOAD_COMPRESSION_LEVEL > 0:
+        compressor = zlib.compressobj(UPLOAD_COMPRESSION_LEVEL, zlib.DEFLATED,
+                                      16 + zlib.MAX_WBITS)
+        compressed = compressor.compress(chunk) + compressor.flush()
+        if len(compressed) < len(chunk):
+            chunk = compressed
+            headers["Content-Encoding"] = "gzip"
+    r = http.put(build_url("upload/session/chunk"),
+                 data=chunk,
+                 headers=headers,
+                 params={
+                     "session_id": session["session_id"],
+                     "index": index,
+                     "checksum": checksum
+                 })
+    res = r.json()
+    if not res.get("success", False):
+        raise ValueError(res.get("msg", f"Failed to upload chunk {index}"))
+
+
+def upload_stream_chunks(http, session, write_archive, streams):
+    """ Archives and uploads the chunks of a session at once
+
+    An archiver thread fills a bounded queue of chunks while up to streams
+    chunks are uploaded concurrently, the transfer starts with the first
+    chunk and nothing is written to disk.  Chunks the session already
+    received are archived again, for the whole stream checksum, but not
+    uploaded.
+
+    Returns:
+        (int, str): Size and sha256 of the archive
+    """
+    received = set(session["received"])
+    chunks = queue.Queue(maxsize=UPLOAD_BUFFER_CHUNKS)
+    cancelled = threading.Event()
+    writer = UploadChunkWriter(session["chunk_size"], chunks, cancelled)
+    archive_errors = []
+
+    def archive():
+        try:
+            write_archive(writer)
+            writer.close()
+        except Exception as e:
+            archive_errors.append(e)
+        finally:
+            try:
+                writer.put(None)
+            except RuntimeError:
+                pass
+
+    archiver = threading.Thread(target=archive, daemon=True)
+    archiver.start()
+    hash_stream = hashlib.sha256()
+    size = 0
+    in_flight = threading.BoundedSemaphore(streams)
+    try:
+        with ThreadPoolExecutor(max_workers=streams) as executor:
+            uploads = []
+            index = 0
+            for chunk in iter(chunks.get, None):
+                hash_stream.update(chunk)
+                size += len(chunk)
+                # Stops archiving as soon as an upload failed
+                done = [x for x in uploads if x.done()]
+                uploads = [x for x in uploads if x not in done]
+                for upload in done:
+                    upload.result()
+                if index not in received:
+                    in_flight.acquire()
+                    upload = executor.submit(upload_session_chunk, http,
+                                             session, index, chunk)
+                    upload.add_done_callback(lambda _: in_flight.release())
+                    uploads.append(upload)
+                index += 1
+            for upload in uploads:
+                upload.result()
+    finally:
+        cancelled.set()
+    archiver.join()
+    if archive_errors:
+        # Fails the attempt, the retry archives the same content again
+        error = archive_errors[0]
+        raise RuntimeError(f"Failed to archive upload: {error}") from error
+    return size, hash_stream.hexdigest()
+
+
+def upload_stream_resumable(write_archive,
+                            upload_key,
+                            target,
+                            params,
+                            streams=UPLOAD_STREAMS):
+    """ Uploads an archive as it is written, in chunks that survive a
+    dropped connection
+
+    Upload sessions are named by the upload key, so a failed attempt, or a
+    new monkey run uploading the same archive, only sends the chunks
+    monkey-core has not received yet.
+
+    Args:
+        write_archive (function): Writes the tar to the file object it is
+            given, the same upload_key must always write the same bytes
+        upload_key (str): Names the content of the archive
+        target (str): How monkey-core stores the archive, blobs or persist
+        params (dict): Provider and job_uid the archive is stored for
+        streams (int, optional): Number of chunks uploaded concurrently
+    """
+    session_args = {
+        "upload_key": upload_key,
+        "chunk_size": UPLOAD_CHUNK_SIZE,
+        "target": target,
+        "params": params,
+    }
+    with get_upload_http_session(streams) as http:
+        for attempt in range(UPLOAD_RETRIES):
+            try:
+                r = http.post(build_url("upload/session/start"),
+                              json=session_args)
+                session = r.json()
+                if not session.get("success", False):
+                    # Rejected uploads are not retried
+                    raise MonkeyCLIUploadRejectedException(
+                        session.get("msg", "Failed to start upload session"))
+                if session["received"]:
+                    print(f"Resuming upload, {len(session['received'])} " +
+                          "chunks already uploaded")
+                size, checksum = upload_stream_chunks(http, session,
+                                                      write_archive, streams)
+                r = http.post(build_url("upload/session/finish"),
+                              params={
+                                  "session_id": session["session_id"],
+                                  "size": size,
+                                  "checksum": checksum
+                              })
+                res = r.json()
+                if not res.get("success", False):
+                    raise ValueError(res.get("msg", "Failed to finish upload"))
+                return
+            except (requests.exceptions.RequestException, ValueError,
+                    RuntimeError) as e:
+                if attempt == UPLOAD_RETRIES - 1:
+                    raise
+                print(f"Upload interrupted: {e}, retrying")
+                time.sleep(UPLOAD_RETRY_WAIT * (attempt + 1))
+
+
+def check_or_upload_codebase(code, job_uid, run_name, provider_name):
     print("Uploading Codebase...")
 
     cwd = os.getcwd()
@@ -142,16 +578,15 @@ def check_or_upload_codebase(code,
             "No files detected as staged.  Add your files to staged with git add . to make sure monkey can detect them"
         )
         exit(1)
-    compression_suffix = compression_map[compression_type]
-    files_checksum = calculate_file_list_checksum(all_files)
-    print(f"Codebase checksum: {files_checksum}")
+    manifest, manifest_checksum = get_codebase_manifest(all_files)
+    print(f"Codebase checksum: {manifest_checksum}")
 
     codebase_params = {
         "job_uid": job_uid,
         "run_name": run_name,
         "provider": provider_name,
-        "checksum": files_checksum,
-        "extension": compression_suffix,
+        "checksum": manifest_checksum,
+        "extension": MANIFEST_EXTENSION,
     }
 
     r = requests.get(build_url("check/codebase"), params=codebase_params)
@@ -160,35 +595,27 @@ def check_or_upload_codebase(code,
     codebase_params["already_uploaded"] = codebase_found
     print(msg, "codebase_found: ", codebase_found)
     if not codebase_found:
-        print("Creating codebase tar...")
-        with tempfile.NamedTemporaryFile(delete=False,
-                                         suffix=".tar") as dir_tmp:
-            code_tar = tarfile.open(dir_tmp.name, "w")
-            for f in all_files:
-                try:
-                    code_tar.add(f)
-                except Exception as e:
-                    print(f"Skipping adding: {f}\nError: {e}")
-
-            code_tar.close()
-            success = False
-            try:
-                with open(dir_tmp.name, "rb") as codebase_tar:
-                    print(codebase_params)
-
-                    r = requests.post(build_url("upload/codebase"),
-                                      data=codebase_tar,
-                                      params=codebase_params,
-                                      allow_redirects=True)
-                    success = r.json()["success"]
-                    print(
-                        "Upload Codebase:",
-                        colored("Successful", "green") if success else colored(
-                            "FAILED", "red"))
-            except:
-                print("Upload failure")
-            if success == False:
-                raise ValueError("Failed to upload codebase")
+        success = False
+        try:
+            blob_sources = {
+                x["hash"]: (x["path"], 0, os.path.getsize(x["path"]))
+                for x in manifest["files"]
+            }
+            upload_blobs(blob_sources=blob_sources,
+                         provider_name=provider_name)
+            r = requests.post(build_url("upload/codebase"),
+                              data=json.dumps(manifest),
+                              params=codebase_params,
+                              allow_redirects=True)
+            success = r.json()["success"]
+            print(
+                "Upload Codebase:",
+                colored("Successful", "green") if success else colored(
+                    "FAILED", "red"))
+        except Exception as e:
+            print(f"Upload failure: {e}")
+        if success == False:
+            raise ValueError("Failed to upload codebase")
     else:
         print("Uploading codebase yaml")
         r = requests.post(build_url("upload/codebase"),
@@ -210,3 +637,31 @@ def submit_job(job):
     if success == False:
         print(msg)
         raise RuntimeError(msg)
+
+
+def submit_jobs(job, job_uids, overrides):
+    print("Submitting {} jobs".format(colored(len(job_uids), "green")))
+    r = requests.post(build_url("submit/jobs"),
+                      json={
+                          "job": job,
+                          "job_uids": job_uids,
+                          "overrides": overrides
+                      })
+    success, msg = r.json()["success"], r.json()["msg"]
+    if success == False:
+        print(msg)
+        raise RuntimeError(msg)
+    return r.json()["job_uids"]
+
+
+def submit_sweep(job):
+    print("Submitting sweep for job: {}".format(
+        colored(job["job_uid"], "green")))
+    r = requests.post(build_url("submit/sweep"), json=job)
+    success, msg = r.json()["success"], r.json()["msg"]
+    if success == False:
+        print(msg)
+        raise RuntimeError(msg)
+    print("Created sweep {} with {} jobs".format(
+        colored(r.json()["sweep_id"], "green"), len(r.json()["job_uids"])))
+    return r.json()["sweep_id"]
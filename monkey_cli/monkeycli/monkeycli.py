@@ -1,5 +1,6 @@
 #!/usr/bin/env python
 import argparse
+import os
 import sys
 from cmd import Cmd
 
@@ -60,6 +61,9 @@ class MonkeyCLI(Cmd):
         if args.info_option == "jobs" or args.info_option == "job":
             return monkeycli.core_info.info_jobs(job_uids=args.job_uids,
                                                  printout=printout)
+        if args.info_option == "sweep":
+            return monkeycli.core_info.info_sweep(sweep_id=args.sweep_id,
+                                                  printout=printout)
         if args.info_option == "providers":
             return monkeycli.core_info.info_provider(provider=args.provider,
                                                      printout=printout)
@@ -69,14 +73,41 @@ class MonkeyCLI(Cmd):
     def output_command(self, output_parser, args, printout=False):
         print(args)
         return monkeycli.core_info.job_output(job_uid=args.job_uid,
+                                              paths=args.paths,
+                                              compression=args.compression,
+                                              full=args.full,
+                                              delete=args.delete,
                                               printout=printout)
 
-    def check_or_upload_dataset(self,
-                                dataset,
-                                provider_name,
-                                compression_type="tar"):
+    def watch_command(self, watch_parser, args, printout=False):
+        return monkeycli.core_info.watch_events(job_uid=args.job_uid,
+                                                project=args.project,
+                                                printout=printout)
+
+    def logs_command(self, logs_parser, args, printout=False):
+        return monkeycli.core_info.job_logs(job_uid=args.job_uid,
+                                            follow=args.follow,
+                                            tail_lines=args.tail_lines,
+                                            printout=printout)
+
+    def artifacts_command(self, artifacts_parser, args, printout=False):
+        if args.download is not None:
+            return monkeycli.core_info.download_artifact(
+                job_uid=args.job_uid,
+                path=args.download,
+                destination=args.destination,
+                printout=printout)
+        return monkeycli.core_info.list_artifacts(job_uid=args.job_uid,
+                                                  paths=args.paths,
+                                                  printout=printout)
+
+    def attach_command(self, attach_parser, args, printout=False):
+        return monkeycli.core_info.attach_job(job_uid=args.job_uid,
+                                              printout=printout)
+
+    def check_or_upload_dataset(self, dataset, provider_name):
         return monkeycli.core_job.check_or_upload_dataset(
-            dataset, provider_name, compression_type)
+            dataset, provider_name)
 
     def upload_persisted_folder(self, persist, job_uid, provider_name):
         return monkeycli.core_job.upload_persisted_folder(
@@ -95,13 +126,7 @@ class MonkeyCLI(Cmd):
     def get_new_job_uid(self):
         return monkeycli.core_info.get_new_job_uid()
 
-    def run_job(self, cmd, args, printout=False):
-        job_yaml_file = args.job_yaml_file
-        foreground = args.foreground
-        provider = args.provider
-        if printout:
-            print("\nMonkey running:\n{}".format(colored(cmd, "green")))
-
+    def load_job_yaml(self, job_yaml_file, provider=None, instance=None):
         # Parse job.yml
         try:
             with open(job_yaml_file, 'r') as job_file:
@@ -134,7 +159,6 @@ class MonkeyCLI(Cmd):
                 "Unable to find the specified provider on Monkey Core")
         if found_remote_provider.get("type", "") == "local":
             # Check for defined instance
-            instance = args.instance
             print(f"Running on instance: {instance}")
             available_instances = ", ".join(
                 monkeycli.core_info.list_local_instances())
@@ -146,13 +170,20 @@ class MonkeyCLI(Cmd):
                     f"\nAvailable instance include: \n{available_instances}" +
                     "\nTo run with instance set use monkey run -i <instance_name>"
                 )
-            job_yaml["instance"] = args.instance
+            job_yaml["instance"] = instance
+        return job_yaml
 
-        job_uid = self.get_new_job_uid()
-        job_yaml["job_uid"] = job_uid
-        job_yaml["cmd"] = cmd
-        print("Creating job with id: ", colored(job_uid, "green"), "\n")
+    def upload_job_files(self, job_yaml, job_uid):
+        """ Uploads the datasets, persisted folders and codebase of a job
+
+        Args:
+            job_yaml (dict): Parsed job.yml with the provider set
+            job_uid (str): The job that the persisted folders and code belong to
 
+        Returns:
+            dict: job_yaml updated with the uploaded checksums
+        """
+        provider = job_yaml["provider"]
         run_name = job_yaml["project_name"] + "-" + job_yaml["name"]
 
         # Check Data
@@ -194,12 +225,95 @@ class MonkeyCLI(Cmd):
             codebase["run_name"] = codebase_params["run_name"]
         job_yaml["code"] = code_yaml
 
+        # Environment file hash, lets core reuse results of identical jobs
+        run_yaml = job_yaml.get("run", None) or dict()
+        if run_yaml.get("env_file", None) is not None:
+            env_file_path = os.path.join(code_yaml[0].get("path", "."),
+                                         run_yaml["env_file"])
+            if os.path.isfile(env_file_path):
+                run_yaml["env_file_checksum"] = \
+                    monkeycli.core_job.calculate_file_list_checksum(
+                        [env_file_path])
+        return job_yaml
+
+    def run_job(self, cmd, args, printout=False):
+        if printout:
+            print("\nMonkey running:\n{}".format(colored(cmd, "green")))
+
+        job_yaml = self.load_job_yaml(job_yaml_file=args.job_yaml_file,
+                                      provider=args.provider,
+                                      instance=args.instance)
+
+        job_uid = self.get_new_job_uid()
+        job_yaml["job_uid"] = job_uid
+        job_yaml["cmd"] = cmd
+        print("Creating job with id: ", colored(job_uid, "green"), "\n")
+
+        job_yaml = self.upload_job_files(job_yaml=job_yaml, job_uid=job_uid)
+
         # Setup extra job args
-        job_yaml["foreground"] = foreground
+        job_yaml["foreground"] = args.foreground
+        if args.cache_results:
+            job_yaml["cache_results"] = True
 
         print(job_yaml)
         # Submit job
+        if job_yaml.get("sweep", None) is not None:
+            # Core expands the sweep, the upload above is shared by every child
+            return monkeycli.core_job.submit_sweep(job=job_yaml)
         self.submit_job(job=job_yaml)
+        if args.foreground:
+            # Submission returns right away, follow the job from here
+            monkeycli.core_info.attach_job(job_uid=job_uid, printout=True)
+
+    def run_jobs(self,
+                 cmds=None,
+                 overrides=None,
+                 job_yaml_file="job.yml",
+                 provider=None,
+                 instance=None):
+        """ Submits a batch of jobs that share one job.yml
+
+        The datasets, persisted folders and codebase are checked and uploaded
+        once, then every job is created in a single /submit/jobs request.
+
+        Args:
+            cmds (list, optional): One command per job
+            overrides (list, optional): One dict per job that may set cmd,
+                run or hyperparameters, merged after the matching command
+            job_yaml_file (str, optional): Defaults to "job.yml".
+            provider (str, optional): Defaults to the first listed provider.
+            instance (str, optional): Instance for local providers
+
+        Returns:
+            list: The created job uids
+        """
+        cmds = list(cmds or [])
+        overrides = list(overrides or [])
+        num_jobs = max(len(cmds), len(overrides))
+        if num_jobs == 0:
+            raise ValueError("No commands or overrides to submit")
+        job_overrides = []
+        for i in range(num_jobs):
+            job_override = dict()
+            if i < len(cmds):
+                job_override["cmd"] = cmds[i]
+            if i < len(overrides):
+                job_override.update(overrides[i])
+            job_overrides.append(job_override)
+
+        job_yaml = self.load_job_yaml(job_yaml_file=job_yaml_file,
+                                      provider=provider,
+                                      instance=instance)
+        job_uids = monkeycli.core_info.get_new_job_uids(num_jobs)
+        print(f"Creating {num_jobs} jobs:",
+              colored(f"{job_uids[0]} to {job_uids[-1]}", "green"), "\n")
+
+        job_yaml = self.upload_job_files(job_yaml=job_yaml,
+                                         job_uid=job_uids[0])
+        return monkeycli.core_job.submit_jobs(job=job_yaml,
+                                              job_uids=job_uids,
+                                              overrides=job_overrides)
 
     def run(self, cmd):
         print(["run"] + cmd.split(" "))
@@ -225,6 +339,16 @@ class MonkeyCLI(Cmd):
         output_parser = monkeycli.parsers.get_output_parser(
             subparser=subparser)
 
+        watch_parser = monkeycli.parsers.get_watch_parser(subparser=subparser)
+
+        attach_parser = monkeycli.parsers.get_attach_parser(
+            subparser=subparser)
+
+        logs_parser = monkeycli.parsers.get_logs_parser(subparser=subparser)
+
+        artifacts_parser = monkeycli.parsers.get_artifacts_parser(
+            subparser=subparser)
+
         init_parser = monkeycli.parsers.get_empty_parser(
             subparser=subparser,
             name="init",
@@ -275,6 +399,22 @@ class MonkeyCLI(Cmd):
             return self.output_command(output_parser=output_parser,
                                        args=(args),
                                        printout=printout)
+        elif args.command == "watch":
+            return self.watch_command(watch_parser=watch_parser,
+                                      args=(args),
+                                      printout=printout)
+        elif args.command == "logs":
+            return self.logs_command(logs_parser=logs_parser,
+                                     args=(args),
+                                     printout=printout)
+        elif args.command == "artifacts":
+            return self.artifacts_command(artifacts_parser=artifacts_parser,
+                                          args=(args),
+                                          printout=printout)
+        elif args.command == "attach":
+            return self.attach_command(attach_parser=attach_parser,
+                                       args=(args),
+                                       printout=printout)
         elif args.command == "init":
             return init_runfile()
         elif args.command == "help":
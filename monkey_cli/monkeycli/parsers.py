@@ -83,6 +83,13 @@ def get_run_parser(subparser):
         required=False,
         action='store_true',
         help="Run in foreground or detach when successfully sent")
+    run_parser.add_argument(
+        "--cache-results",
+        required=False,
+        action='store_true',
+        dest="cache_results",
+        help="Reuse the results of a finished job with identical code, " +
+        "data, environment and command instead of running it again")
     return run_parser
 
 
@@ -101,6 +108,11 @@ def get_info_parser(subparser):
         help=
         "Get information about a job(s) (full specifier or three letter terminator)"
     )
+    info_sweep_parser = info_subparser.add_parser(
+        "sweep", help="List the state of every job in a sweep")
+    info_sweep_parser.add_argument("sweep_id",
+                                   help="The sweep id printed on submission")
+
     info_provider_parser = info_subparser.add_parser(
         "provider", help="List the info of a given provider")
 
@@ -120,10 +132,117 @@ def get_output_parser(subparser):
         "job_uid",
         help=
         "Get the output of a job (full specifier or three letter terminator)")
+    output_parser.add_argument(
+        "--path",
+        required=False,
+        default=None,
+        action="append",
+        dest="paths",
+        help="Only download this path inside a persisted folder " +
+        "(can be repeated)")
+    output_parser.add_argument("--compression",
+                               required=False,
+                               default=None,
+                               choices=["gz", "bz2", "xz"],
+                               dest="compression",
+                               help="Compress the output while it downloads")
+    output_parser.add_argument("--full",
+                               required=False,
+                               default=False,
+                               action="store_true",
+                               dest="full",
+                               help="Download every file instead of only " +
+                               "the files that changed")
+    output_parser.add_argument("--delete",
+                               required=False,
+                               default=False,
+                               action="store_true",
+                               dest="delete",
+                               help="Delete local files that were removed " +
+                               "from the job's output")
 
     return output_parser
 
 
+def get_watch_parser(subparser):
+    watch_parser = subparser.add_parser(
+        "watch", help="Stream job state changes as they happen")
+    watch_parser.add_argument(
+        "job_uid",
+        nargs="?",
+        default=None,
+        help=
+        "Only watch a single job (full specifier or three letter terminator)")
+    watch_parser.add_argument("--project",
+                              "-p",
+                              required=False,
+                              default=None,
+                              dest="project",
+                              help="Only watch jobs in the given project")
+    return watch_parser
+
+
+def get_logs_parser(subparser):
+    logs_parser = subparser.add_parser("logs", help="Print a job's run log")
+    logs_parser.add_argument(
+        "job_uid",
+        help="Job to print logs for (full specifier or three letter terminator)"
+    )
+    logs_parser.add_argument("--follow",
+                             "-f",
+                             required=False,
+                             action="store_true",
+                             dest="follow",
+                             help="Keep printing new output until the job " +
+                             "finishes")
+    logs_parser.add_argument("--lines",
+                             "-n",
+                             required=False,
+                             default=None,
+                             type=int,
+                             dest="tail_lines",
+                             help="Start with the last n lines")
+    return logs_parser
+
+
+def get_artifacts_parser(subparser):
+    artifacts_parser = subparser.add_parser(
+        "artifacts", help="List or download single files of a job's output")
+    artifacts_parser.add_argument(
+        "job_uid",
+        help="Job to list artifacts of (full specifier or three letter " +
+        "terminator)")
+    artifacts_parser.add_argument("--path",
+                                  required=False,
+                                  default=None,
+                                  action="append",
+                                  dest="paths",
+                                  help="Only list this path inside a " +
+                                  "persisted folder (can be repeated)")
+    artifacts_parser.add_argument("--download",
+                                  "-d",
+                                  required=False,
+                                  default=None,
+                                  dest="download",
+                                  help="Download this file, resuming a " +
+                                  "previous partial download")
+    artifacts_parser.add_argument("--dest",
+                                  required=False,
+                                  default=None,
+                                  dest="destination",
+                                  help="File or folder to download to")
+    return artifacts_parser
+
+
+def get_attach_parser(subparser):
+    attach_parser = subparser.add_parser(
+        "attach", help="Follow a job's progress and logs until it finishes")
+    attach_parser.add_argument(
+        "job_uid",
+        help="Job to attach to (full specifier or three letter terminator)")
+    return attach_parser
+
+
 def get_empty_parser(subparser, name, helptext):
     parser = subparser.add_parser(name, help=helptext)
 
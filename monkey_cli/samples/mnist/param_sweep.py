@@ -2,13 +2,15 @@
 from monkeycli import MonkeyCLI
 
 learning_rates = ["0.01", "0.02", "0.03", "0.05", "0.1", "0.12"]
-epochs = [ "15"]
+epochs = ["15"]
 
-for rate in learning_rates:
-    for epoch in epochs:
-        print("\n\n----------------------------------------------\n")
-        monkey = MonkeyCLI()
-        monkey.run(
-            "python -u mnist.py --learning-rate {} --n-epochs {}".format(
-                rate, epoch))
-        exit(0)
+cmds = [
+    "python -u mnist.py --learning-rate {} --n-epochs {}".format(rate, epoch)
+    for rate in learning_rates
+    for epoch in epochs
+]
+
+print("\n\n----------------------------------------------\n")
+monkey = MonkeyCLI()
+# Uploads the codebase and dataset once and submits every job in one request
+monkey.run_jobs(cmds=cmds)
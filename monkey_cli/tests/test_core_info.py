@@ -0,0 +1,33 @@
+import tarfile
+
+from monkeycli import core_info
+
+
+def tar_member(name, link_type=None, linkname=""):
+    member = tarfile.TarInfo(name)
+    if link_type is not None:
+        member.type = link_type
+        member.linkname = linkname
+    return member
+
+
+def test_output_members_stay_in_output_dir(tmp_path):
+    output_dir = str(tmp_path / "monkey-output" / "job-1")
+    for name in ["output/model.pt", "logs/run.log", "output/../a.txt"]:
+        assert core_info.is_output_member_safe(output_dir, tar_member(name))
+    for name in ["/etc/passwd", "../job-2/a.txt", "output/../../a.txt"]:
+        assert not core_info.is_output_member_safe(output_dir,
+                                                   tar_member(name))
+
+
+def test_output_links_stay_in_output_dir(tmp_path):
+    output_dir = str(tmp_path / "job-1")
+    assert core_info.is_output_member_safe(
+        output_dir, tar_member("output/latest", tarfile.SYMTYPE, "model.pt"))
+    assert not core_info.is_output_member_safe(
+        output_dir, tar_member("output/etc", tarfile.SYMTYPE, "/etc"))
+    assert not core_info.is_output_member_safe(
+        output_dir, tar_member("output/up", tarfile.SYMTYPE, "../../.."))
+    assert not core_info.is_output_member_safe(
+        output_dir, tar_member("output/passwd", tarfile.LNKTYPE,
+                               "/etc/passwd"))
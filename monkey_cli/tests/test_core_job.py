@@ -0,0 +1,169 @@
+import hashlib
+import os
+import random
+
+import pytest
+
+from monkeycli import core_job
+
+
+def random_bytes(size, seed):
+    return random.Random(seed).getrandbits(8 * size).to_bytes(size, "little")
+
+
+def chunk_data(data):
+    """ Chunk hashes of data, split the way calculate_file_chunks does """
+    hashes = []
+    offset = 0
+    while offset < len(data):
+        boundary = core_job.find_chunk_boundary(memoryview(data)[offset:])
+        hashes.append(hashlib.sha256(data[offset:offset + boundary]).digest())
+        offset += boundary
+    return hashes
+
+
+def reference_boundary(data):
+    """ The boundary rule tested one byte at a time """
+    table = core_job.CDC_BYTE_TABLE
+    end = min(len(data), core_job.CDC_MAX_CHUNK_SIZE)
+    for i in range(core_job.CDC_MIN_CHUNK_SIZE, end):
+        if all(table[data[i - t]] >> (t % 8) & 1
+               for t in range(core_job.CDC_BOUNDARY_BITS)):
+            return i + 1
+    return end
+
+
+def test_find_chunk_boundary_limits():
+    assert core_job.find_chunk_boundary(b"") == 0
+    assert core_job.find_chunk_boundary(bytes(1000)) == 1000
+    data = random_bytes(8 * 1024 * 1024, seed=1)
+    boundary = core_job.find_chunk_boundary(data)
+    assert core_job.CDC_MIN_CHUNK_SIZE < boundary <= \
+        core_job.CDC_MAX_CHUNK_SIZE
+    # Constant data never matches, chunks are as large as allowed
+    assert core_job.find_chunk_boundary(bytes(8 * 1024 * 1024)) == \
+        core_job.CDC_MAX_CHUNK_SIZE
+
+
+def test_find_chunk_boundary_matches_reference():
+    for seed in range(3):
+        data = random_bytes(3 * 1024 * 1024, seed=seed)
+        assert core_job.find_chunk_boundary(data) == reference_boundary(data)
+
+
+def test_chunks_are_stable_when_data_shifts():
+    data = random_bytes(16 * 1024 * 1024, seed=2)
+    chunks = chunk_data(data)
+    assert len(chunks) > 4
+    for prefix_size in [1, 1000, 300 * 1024]:
+        prefix = random_bytes(prefix_size, seed=prefix_size)
+        shifted = chunk_data(prefix + data)
+        # Only the chunks around the insertion change
+        assert len(set(chunks) - set(shifted)) <= 2
+        assert shifted[-3:] == chunks[-3:]
+
+
+def test_calculate_file_chunks(tmp_path):
+    data = random_bytes(10 * 1024 * 1024, seed=3)
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    chunks = core_job.calculate_file_chunks(str(path))
+    assert sum(x["size"] for x in chunks) == len(data)
+    offset = 0
+    for chunk in chunks:
+        assert chunk["hash"] == hashlib.sha256(
+            data[offset:offset + chunk["size"]]).hexdigest()
+        offset += chunk["size"]
+    assert [x["hash"] for x in chunks] == [x.hex() for x in chunk_data(data)]
+
+
+def test_dataset_manifest_reuses_cached_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(core_job, "CDC_CACHE_PATH",
+                        str(tmp_path / "cache" / "chunks.json"))
+    dataset_path = tmp_path / "dataset"
+    os.makedirs(dataset_path / "train")
+    (dataset_path / "train" / "a.bin").write_bytes(random_bytes(1000, seed=4))
+    (dataset_path / "b.bin").write_bytes(b"")
+    manifest, checksum = core_job.get_dataset_manifest(str(dataset_path))
+    assert [x["path"] for x in manifest["files"]] == ["b.bin", "train/a.bin"]
+    assert manifest["files"][0]["chunks"] == []
+
+    def fail(filename):
+        raise AssertionError(f"Chunked {filename} again")
+
+    monkeypatch.setattr(core_job, "calculate_file_chunks", fail)
+    assert core_job.get_dataset_manifest(str(dataset_path)) == (manifest,
+                                                                checksum)
+
+
+class FakeResponse():
+
+    def __init__(self, res):
+        super().__init__()
+        self.res = res
+
+    def json(self):
+        return self.res
+
+
+class FakeUploadHttp():
+    """ Upload session endpoints answered in memory """
+
+    def __init__(self, start_success=True):
+        super().__init__()
+        self.start_success = start_success
+        self.starts = 0
+        self.chunks = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def post(self, url, json=None, params=None):
+        if url.endswith("upload/session/start"):
+            self.starts += 1
+            if not self.start_success:
+                return FakeResponse({"success": False, "msg": "Rejected"})
+            return FakeResponse({
+                "success": True,
+                "session_id": "session",
+                "chunk_size": 4,
+                "received": sorted(self.chunks),
+            })
+        return FakeResponse({"success": True})
+
+    def put(self, url, data=None, headers=None, params=None):
+        self.chunks[params["index"]] = data
+        return FakeResponse({"success": True})
+
+
+def test_upload_stream_resumable_retries_archive_errors(monkeypatch):
+    http = FakeUploadHttp()
+    monkeypatch.setattr(core_job, "get_upload_http_session", lambda _: http)
+    monkeypatch.setattr(core_job, "UPLOAD_RETRY_WAIT", 0)
+    monkeypatch.setattr(core_job, "UPLOAD_COMPRESSION_LEVEL", 0)
+    attempts = []
+
+    def write_archive(fileobj):
+        attempts.append(len(attempts))
+        fileobj.write(b"abcdefgh")
+        if len(attempts) == 1:
+            raise OSError("File changed while archiving")
+        fileobj.write(b"ij")
+
+    core_job.upload_stream_resumable(write_archive, "key", "blobs", dict())
+    assert len(attempts) == 2
+    assert b"".join(http.chunks[i] for i in sorted(http.chunks)) == \
+        b"abcdefghij"
+
+
+def test_upload_stream_resumable_does_not_retry_rejected(monkeypatch):
+    http = FakeUploadHttp(start_success=False)
+    monkeypatch.setattr(core_job, "get_upload_http_session", lambda _: http)
+    monkeypatch.setattr(core_job, "UPLOAD_RETRY_WAIT", 0)
+    with pytest.raises(core_job.MonkeyCLIUploadRejectedException):
+        core_job.upload_stream_resumable(lambda fileobj: None, "key", "blobs",
+                                         dict())
+    assert http.starts == 1
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+""" Builds the files of a codebase or dataset manifest from the monkeyfs blob
+store
+
+Codebase files are a single blob, dataset files are the concatenation of
+their chunks.
+
+Usage: unpack_manifest.py <manifest_path> <blobs_path> <destination_path>
+"""
+import json
+import os
+import shutil
+import sys
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+def get_blob_path(blobs_path, blob_hash):
+    return os.path.join(blobs_path, blob_hash[:2], blob_hash)
+
+
+def main(manifest_path, blobs_path, destination_path):
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+    destination_path = os.path.abspath(destination_path)
+    for item in manifest["files"]:
+        destination = os.path.abspath(
+            os.path.join(destination_path, item["path"]))
+        if not destination.startswith(os.path.join(destination_path, "")):
+            raise ValueError(
+                f"Path outside of the destination: {item['path']}")
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if "chunks" in item:
+            with open(destination, "wb") as f:
+                for chunk in item["chunks"]:
+                    with open(get_blob_path(blobs_path, chunk["hash"]),
+                              "rb") as chunk_file:
+                        shutil.copyfileobj(chunk_file, f, COPY_BLOCK_SIZE)
+        else:
+            shutil.copyfile(get_blob_path(blobs_path, item["hash"]),
+                            destination)
+        os.chmod(destination, item.get("mode", 0o644))
+    print(f"Unpacked {len(manifest['files'])} files")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3.8
+""" Compares the old and new /list/jobs serialization paths
+
+Old: MonkeyJob.to_json -> json.loads -> jsonify
+New: raw pymongo document -> mongo_to_dict -> streamed ujson array
+
+Runs without a database by generating raw job documents in memory.
+
+Usage (from monkey_core/):
+    python -m benchmarks.bench_job_serialization --num-jobs 10000
+"""
+import argparse
+import json
+import random
+import string
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bson import ObjectId, json_util
+from core.mongo.mongo_utils import mongo_to_dict
+from core.routes.utils import stream_json_list
+
+
+def make_raw_job(i):
+    now = datetime.now() - timedelta(minutes=i)
+    suffix = ''.join(random.choice(string.ascii_lowercase) for _ in range(3))
+    job_uid = f"monkey-20-01-01-{i}-{suffix}"
+    return {
+        "_id": ObjectId(),
+        "job_uid": job_uid,
+        "job_random_suffix": suffix,
+        "job_yml": {
+            "job_uid":
+                job_uid,
+            "name":
+                "mnist",
+            "project_name":
+                "benchmark",
+            "cmd":
+                f"python mnist.py --learning-rate {random.random()}",
+            "provider":
+                "aws",
+            "persist": ["output", "logs"],
+            "data": [{
+                "name": "mnist",
+                "path": "data/",
+                "checksum": "d41d8cd98f00b204e9800998ecf8427e",
+            }],
+        },
+        "state": "FINISHED",
+        "provider_type": "aws",
+        "provider_name": "aws",
+        "provider_vars": {
+            "region": "us-east-1",
+            "zone": "us-east-1a",
+        },
+        "creation_date": now,
+        "last_state_change": now,
+        "run_running_start_date": now,
+        "completion_date": now,
+        "run_timeout_time": -1,
+        "run_elapsed_time": 120,
+        "total_wall_time": 300,
+        "experiment_hyperparameters": {
+            "learning_rate": random.random(),
+            "epochs": 10,
+        },
+    }
+
+
+def old_path(raw_jobs):
+    jobs = [
+        json.loads(
+            json_util.dumps(x, json_options=json_util.LEGACY_JSON_OPTIONS))
+        for x in raw_jobs
+    ]
+    return len(json.dumps(jobs))
+
+
+def new_path(raw_jobs):
+    response = stream_json_list(mongo_to_dict(x) for x in raw_jobs)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    return size
+
+
+def measure(name, fn, raw_jobs, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        size = fn(raw_jobs)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn(raw_jobs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print("{:<8} best: {:8.1f}ms  mean: {:8.1f}ms  peak: {:8.2f}MB  "
+          "size: {:8.2f}MB".format(name,
+                                   min(times) * 1000,
+                                   sum(times) / len(times) * 1000,
+                                   peak / 1024 / 1024, size / 1024 / 1024))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job serialization bench")
+    parser.add_argument("--num-jobs", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    raw_jobs = [make_raw_job(i) for i in range(args.num_jobs)]
+    print(f"Serializing {args.num_jobs} jobs, {args.repeats} repeats")
+    measure("old", old_path, raw_jobs, args.repeats)
+    measure("new", new_path, raw_jobs, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
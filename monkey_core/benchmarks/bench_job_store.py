@@ -0,0 +1,108 @@
+#!/usr/bin/env python3.8
+""" Times submit, list and reconcile on the sqlite job store
+
+submit:    create and save N jobs one at a time, as /submit/job does
+list:      read every job as a json ready dict, as /list/jobs does
+reconcile: scan the 10 day window and move queued jobs to dispatching, as
+           the daemon loop does
+
+The same steps run on the mongo store when a server is reachable.  No mongo
+numbers were recorded with this benchmark, compare the stores by running it
+next to a MongoDB server.
+
+Usage (from monkey_core/):
+    python -m benchmarks.bench_job_store --num-jobs 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from core.mongo import mongo_global as monkey_state
+from core.mongo.mongo_utils import get_monkey_db, mongo_to_dict
+from core.mongo.monkey_job_mongo import MongoMonkeyJob
+from core.mongo.monkey_job_sqlite import SQLiteMonkeyJob, get_sqlite_db
+
+BENCH_PROVIDER = "monkey-benchmark"
+
+
+def submit(job_class, num_jobs):
+    for i in range(num_jobs):
+        job_uid = f"monkey-bench-{i}-{job_class.__name__.lower()}"
+        job = job_class(job_uid=job_uid,
+                        job_random_suffix=job_uid.split("-")[-1],
+                        job_yml={
+                            "job_uid": job_uid,
+                            "name": "bench",
+                            "project_name": "benchmark",
+                            "cmd": "python mnist.py"
+                        },
+                        state=monkey_state.MONKEY_STATE_QUEUED,
+                        provider_name=BENCH_PROVIDER,
+                        provider_type="local")
+        job.save()
+
+
+def list_jobs(job_class, num_jobs):
+    jobs = [
+        mongo_to_dict(x)
+        for x in job_class.objects(provider_name=BENCH_PROVIDER).as_pymongo()
+    ]
+    assert len(jobs) == num_jobs
+
+
+def reconcile(job_class, num_jobs):
+    window = job_class.objects(provider_name=BENCH_PROVIDER,
+                               creation_date__gte=(datetime.now() -
+                                                   timedelta(days=10)))
+    for job in window:
+        if job.state == monkey_state.MONKEY_STATE_QUEUED:
+            job.set_state(monkey_state.MONKEY_STATE_DISPATCHING)
+        else:
+            job.save()
+
+
+def cleanup(job_class):
+    job_class.objects(provider_name=BENCH_PROVIDER).delete()
+
+
+def run_backend(name, job_class, num_jobs):
+    cleanup(job_class)
+    results = []
+    for step in (submit, list_jobs, reconcile):
+        start = time.perf_counter()
+        step(job_class, num_jobs)
+        results.append(time.perf_counter() - start)
+    cleanup(job_class)
+    print("{:<8} submit: {:8.1f}ms  list: {:8.1f}ms  reconcile: {:8.1f}ms"
+          .format(name, *[x * 1000 for x in results]))
+
+
+def mongo_available():
+    if not get_monkey_db():
+        return False
+    try:
+        MongoMonkeyJob._get_db().command("ping")
+    except Exception as e:
+        print(f"Skipping mongo, server not reachable: {e}")
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Job store bench")
+    parser.add_argument("--num-jobs", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"Benchmarking job stores with {args.num_jobs} jobs")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monkey_state.MONKEY_SQLITE_PATH = os.path.join(tmp_dir, "bench.sqlite")
+        get_sqlite_db()
+        run_backend("sqlite", SQLiteMonkeyJob, args.num_jobs)
+    if mongo_available():
+        run_backend("mongo", MongoMonkeyJob, args.num_jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3.8
+""" Measures CLI upload throughput of blob files to a local monkey-core
+
+temp file:   archive the blobs into a temporary tar, then POST it to
+             /upload/blobs in one stream
+pipeline N:  archive, compress and upload at once through an upload
+             session with N chunks in flight, as the CLI uploads blobs and
+             persisted folders
+
+Times include archiving.  Blobs are half random and half zeros, so they
+compress about 2x.  Chunks are compressed by the upload threads, so with
+several cores more streams also compress faster.
+
+The dispatch routes are served by a threaded werkzeug server on localhost
+with a temporary monkeyfs, so providers, ansible and mongo are not needed.
+Localhost has no per connection limit, --stream-limit-mb caps the rate each
+request body is read at to model a link where a single TCP stream cannot
+fill the pipe.
+
+Usage (from monkey_core/):
+    python -m benchmarks.bench_upload --size-mb 256 --streams 1 2 4 8
+    python -m benchmarks.bench_upload --size-mb 64 --stream-limit-mb 20
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+from flask import Flask
+from werkzeug.serving import make_server
+
+from core import monkey_global
+
+BENCH_PROVIDER = "monkey-benchmark"
+BENCH_BLOB_SIZE = 4 * 1024 * 1024
+
+# The CLI is not installed alongside monkey-core
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..",
+                 "monkey_cli"))
+
+
+def write_blob_files(blobs_path, size):
+    """ Writes blob files named by their sha256
+
+    Returns:
+        dict: sha256 -> (file path, offset, size) of every blob
+    """
+    os.makedirs(blobs_path, exist_ok=True)
+    blob_sources = dict()
+    for _ in range(max(1, size // BENCH_BLOB_SIZE)):
+        blob = b"".join(
+            os.urandom(8192) + bytes(8192)
+            for _ in range(BENCH_BLOB_SIZE // 16384))
+        blob_hash = hashlib.sha256(blob).hexdigest()
+        blob_path = os.path.join(blobs_path, blob_hash)
+        with open(blob_path, "wb") as f:
+            f.write(blob)
+        blob_sources[blob_hash] = (blob_path, 0, len(blob))
+    return blob_sources
+
+
+class ThrottledInput():
+    """ Request body that is read at no more than rate bytes per second """
+
+    def __init__(self, stream, rate):
+        super().__init__()
+        self.stream = stream
+        self.rate = rate
+        self.start_time = time.perf_counter()
+        self.read_size = 0
+
+    def read(self, *args):
+        data = self.stream.read(*args)
+        self.read_size += len(data)
+        delay = self.read_size / self.rate - (time.perf_counter() -
+                                              self.start_time)
+        if delay > 0:
+            time.sleep(delay)
+        return data
+
+
+def throttle_requests(wsgi_app, rate):
+
+    def throttled_app(environ, start_response):
+        environ["wsgi.input"] = ThrottledInput(environ["wsgi.input"], rate)
+        return wsgi_app(environ, start_response)
+
+    return throttled_app
+
+
+def start_core(monkeyfs_path, stream_limit=None):
+    monkey_global.MONKEYFS_LOCAL_PATH = os.path.join(monkeyfs_path, "local")
+    from core.routes import dispatch_routes
+    provider_path = os.path.join(monkeyfs_path, BENCH_PROVIDER)
+    os.makedirs(provider_path, exist_ok=True)
+    dispatch_routes.get_local_filesystem_for_provider = \
+        lambda provider_name: provider_path
+    application = Flask(__name__)
+    application.register_blueprint(dispatch_routes.dispatch_routes)
+    if stream_limit:
+        application.wsgi_app = throttle_requests(application.wsgi_app,
+                                                 stream_limit)
+    server = make_server("127.0.0.1", 0, application, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def upload_temp_file(blob_sources):
+    from monkeycli.core_job import write_blobs_tar
+    from monkeycli.utils import build_url
+    with tempfile.NamedTemporaryFile(suffix=".tar") as dir_tmp:
+        with open(dir_tmp.name, "wb") as f:
+            write_blobs_tar(f, sorted(blob_sources), blob_sources)
+        with open(dir_tmp.name, "rb") as f:
+            r = requests.post(build_url("upload/blobs"),
+                              data=f,
+                              params={"provider": BENCH_PROVIDER})
+    assert r.json()["success"], r.json()
+
+
+def upload_pipeline(blob_sources, streams):
+    from monkeycli.core_job import upload_stream_resumable, write_blobs_tar
+    blob_hashes = sorted(blob_sources)
+    # A new key every run, nothing is resumed
+    upload_stream_resumable(
+        lambda fileobj: write_blobs_tar(fileobj, blob_hashes, blob_sources),
+        upload_key=f"bench-{time.time()}",
+        target="blobs",
+        params={"provider": BENCH_PROVIDER},
+        streams=streams)
+
+
+def report(name, size, duration):
+    print("{:<12} {:8.2f}s  {:8.1f}MB/s".format(name, duration,
+                                                size / duration / 1024**2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload throughput bench")
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--streams", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--stream-limit-mb",
+                        type=float,
+                        default=0,
+                        help="Per connection upload limit in MB/s, 0 is none")
+    parser.add_argument("--compression-level",
+                        type=int,
+                        default=None,
+                        help="Gzip level of upload chunks, 0 is none")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server = start_core(os.path.join(tmp_dir, "monkeyfs"),
+                            args.stream_limit_mb * 1024**2)
+        from monkeycli import core_job, utils
+        if args.compression_level is not None:
+            core_job.UPLOAD_COMPRESSION_LEVEL = args.compression_level
+        utils.MONKEY_CORE_URL = f"http://127.0.0.1:{server.server_port}/"
+
+        blob_sources = write_blob_files(os.path.join(tmp_dir, "blobs"),
+                                        args.size_mb * 1024 * 1024)
+        size = sum(x[2] for x in blob_sources.values())
+        print(f"Uploading {size / 1024**2:.0f}MB to {utils.MONKEY_CORE_URL}")
+
+        start = time.perf_counter()
+        upload_temp_file(blob_sources)
+        report("temp file", size, time.perf_counter() - start)
+        for streams in args.streams:
+            start = time.perf_counter()
+            upload_pipeline(blob_sources, streams)
+            report(f"pipeline {streams}", size, time.perf_counter() - start)
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
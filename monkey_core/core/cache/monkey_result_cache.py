@@ -0,0 +1,132 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+
+from core import monkey_global
+from core.events.monkey_events import get_event_bus
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+from core.routes.utils import sync_directories
+
+logger = logging.getLogger(__name__)
+
+
+def get_job_result_key(job_yml):
+    """ Hashes everything that determines the results of a job
+
+    The key covers the codebase checksums, dataset checksums, environment
+    file and variables and the command.
+
+    Returns:
+        str: The result key, None if the code or data were not checksummed
+    """
+    code = job_yml.get("code", None) or []
+    if type(code) is not list:
+        code = [code]
+    data = job_yml.get("data", None) or []
+    if type(data) is not list:
+        data = [data]
+    if len(code) == 0 or any("checksum" not in x for x in code + data):
+        return None
+
+    run_yml = job_yml.get("run", None) or dict()
+    data_checksums = sorted(
+        (x.get("name", ""), x.get("path", ""), x["checksum"]) for x in data)
+    key_items = {
+        "code": [x["checksum"] for x in code],
+        "data": data_checksums,
+        "env_type": run_yml.get("env_type", None),
+        "env_file": run_yml.get("env_file", None),
+        "env_file_checksum": run_yml.get("env_file_checksum", None),
+        "env": run_yml.get("env", dict()),
+        "cmd": job_yml.get("cmd", None),
+    }
+    key_string = json.dumps(key_items, sort_keys=True, default=str)
+    return hashlib.sha256(key_string.encode("utf-8")).hexdigest()
+
+
+def find_cached_job(result_key):
+    """ Finds the most recent successful job with a matching result key
+
+    Jobs killed on timeout or early stopped also finish, but only have
+    partial results and are never reused.
+    """
+    if result_key is None:
+        return None
+    finished_jobs = MonkeyJob.objects(
+        result_key=result_key,
+        state=monkey_state.MONKEY_STATE_FINISHED,
+        run_succeeded=True).order_by("-completion_date")
+    for job in finished_jobs:
+        if not job.early_stopped:
+            return job
+    return None
+
+
+def copy_job_results(cached_job, job_uid, provider):
+    """ Copies the persisted folders and logs of a finished job to job_uid
+
+    Both the local monkeyfs and the provider's monkeyfs are copied so the
+    new job's output can be retrieved like any other job.
+
+    Returns:
+        (bool, str): (Success, Message)
+    """
+    result_items = cached_job.job_yml.get("persist", None) or []
+    result_items = list(result_items) + ["logs"]
+    for monkeyfs_path in [
+            monkey_global.MONKEYFS_LOCAL_PATH,
+            provider.get_local_filesystem_path()
+    ]:
+        cached_folder_path = os.path.join(monkeyfs_path, "jobs",
+                                          cached_job.job_uid)
+        job_folder_path = os.path.join(monkeyfs_path, "jobs", job_uid)
+        for item in result_items:
+            source = os.path.join(cached_folder_path, item)
+            destination = os.path.join(job_folder_path, item)
+            try:
+                if os.path.isdir(source):
+                    sync_directories(source, destination)
+                elif os.path.isfile(source):
+                    os.makedirs(os.path.dirname(destination), exist_ok=True)
+                    shutil.copy2(source, destination)
+            except Exception as e:
+                logger.error(f"Failed to copy {source}: {e}")
+                return False, f"Failed to copy cached result: {item}"
+    return True, f"Copied results of {cached_job.job_uid}"
+
+
+def submit_cached_job(self, job_yml, provider, cached_job):
+    """ Materializes a job from the results of an identical finished job
+
+    The job is created FINISHED without provisioning anything.
+
+    Returns:
+        (bool, str): (Success, Message)
+    """
+    job_uid = job_yml["job_uid"]
+    success, msg = copy_job_results(cached_job=cached_job,
+                                    job_uid=job_uid,
+                                    provider=provider)
+    if not success:
+        return success, msg
+
+    job = MonkeyJob(job_uid=job_uid,
+                    job_random_suffix=job_uid.split("-")[-1],
+                    job_yml=job_yml,
+                    state=monkey_state.MONKEY_STATE_QUEUED,
+                    provider_name=provider.name,
+                    provider_type=provider.provider_type,
+                    provider_vars=provider.get_dict(),
+                    sweep_id=job_yml.get("sweep_id", None),
+                    sweep_parameters=job_yml.get("sweep_parameters", dict()),
+                    result_key=get_job_result_key(job_yml),
+                    cached_from=cached_job.job_uid,
+                    run_succeeded=True)
+    job.save()
+    get_event_bus().publish_state_change(job=job, previous_state=None)
+    job.set_state(state=monkey_state.MONKEY_STATE_FINISHED)
+    logger.info(f"{job_uid}: Reused results of {cached_job.job_uid}")
+    return True, f"Reused results of {cached_job.job_uid}"
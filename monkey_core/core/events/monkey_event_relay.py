@@ -0,0 +1,97 @@
+import logging
+import threading
+import time
+
+from core.events.monkey_events import get_event_bus
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_counter import get_counter
+from core.mongo.monkey_job import MonkeyJob
+
+logger = logging.getLogger(__name__)
+
+EVENT_RELAY_POLL_TIME = 1
+# Versions are taken before a job is written, so recent versions are read
+# again in case a slower write landed behind a newer one
+EVENT_RELAY_VERSION_OVERLAP = 100
+
+
+class MonkeyEventRelay():
+    """ Republishes job state changes made by the scheduler process
+
+    API processes do not run jobs, so their event bus only learns about
+    state changes by polling the job store for jobs written since the last
+    seen job version.
+    """
+
+    def __init__(self, poll_time=EVENT_RELAY_POLL_TIME):
+        super().__init__()
+        self.poll_time = poll_time
+        self.version = get_counter(monkey_state.MONKEY_JOB_VERSION_COUNTER)
+        # job_uid -> (last relayed state, version)
+        self.states = dict()
+        self.lock = threading.Lock()
+        # Changes made before the relay started are not republished
+        self.poll(publish=False)
+        # Changes made by this process were already published locally
+        get_event_bus().add_listener(self.handle_event)
+
+    def handle_event(self, event):
+        if event.get("type", None) == "state":
+            with self.lock:
+                self.states[event["job_uid"]] = (event["state"], self.version)
+
+    def poll(self, publish=True):
+        """ Publishes the state of every job that changed since the last poll
+
+        Returns:
+            int: Number of published state changes
+        """
+        counter_version = get_counter(monkey_state.MONKEY_JOB_VERSION_COUNTER)
+        if publish and counter_version <= self.version:
+            return 0
+        last_version = self.version
+        since_version = self.version - EVENT_RELAY_VERSION_OVERLAP
+        raw_jobs = MonkeyJob.objects(
+            version__gt=since_version).order_by("version").as_pymongo()
+        relayed_num = 0
+        for raw_job in raw_jobs:
+            job_uid = raw_job["job_uid"]
+            state = raw_job["state"]
+            version = raw_job.get("version", 0)
+            self.version = max(self.version, version)
+            with self.lock:
+                previous_state = self.states.get(job_uid, (None, 0))[0]
+                self.states[job_uid] = (state, version)
+            if not publish or state == previous_state:
+                continue
+            project = raw_job.get("job_yml", dict()).get("project_name", None)
+            get_event_bus().publish_job_state(job_uid=job_uid,
+                                              project=project,
+                                              state=state,
+                                              previous_state=previous_state)
+            relayed_num += 1
+        if self.version == last_version:
+            # Versions taken by deleted jobs, e.g. archived ones, are never
+            # read back, without moving on they would be polled forever
+            self.version = max(self.version, counter_version)
+
+        # Finished jobs outside the overlap will not be read again
+        cutoff = self.version - EVENT_RELAY_VERSION_OVERLAP
+        with self.lock:
+            for job_uid, (state, version) in list(self.states.items()):
+                if state == monkey_state.MONKEY_STATE_FINISHED and \
+                        version <= cutoff:
+                    del self.states[job_uid]
+        return relayed_num
+
+    def run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Failed to relay job events: {e}")
+            time.sleep(self.poll_time)
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
@@ -0,0 +1,115 @@
+import logging
+import queue
+import threading
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class MonkeyEventSubscriber():
+    """ A single listener on the event bus with optional filters """
+
+    def __init__(self, job_uid=None, project=None):
+        super().__init__()
+        self.job_uid = job_uid
+        self.project = project
+        self.events = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def matches(self, event):
+        if self.job_uid is not None and event.get("job_uid") != self.job_uid:
+            return False
+        if self.project is not None and event.get("project") != self.project:
+            return False
+        return True
+
+    def put(self, event):
+        # Slow consumers lose their oldest events rather than blocking jobs
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=None):
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class MonkeyEventBus():
+    """ In process publish/subscribe bus for job state transitions """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.subscribers = []
+        self.listeners = []
+        self.event_id = 0
+
+    def subscribe(self, job_uid=None, project=None):
+        subscriber = MonkeyEventSubscriber(job_uid=job_uid, project=project)
+        with self.lock:
+            self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+
+    def add_listener(self, listener):
+        """ Registers a function called synchronously with every event """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def publish(self, event):
+        with self.lock:
+            self.event_id += 1
+            event = dict(event, id=self.event_id)
+            subscribers = list(self.subscribers)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.error(f"Event listener failed: {e}")
+        for subscriber in subscribers:
+            if subscriber.matches(event):
+                subscriber.put(event)
+        return event
+
+    def publish_state_change(self, job, previous_state):
+        project = job.job_yml.get("project_name", None)
+        return self.publish_job_state(job_uid=job.job_uid,
+                                      project=project,
+                                      state=job.state,
+                                      previous_state=previous_state)
+
+    def publish_job_state(self, job_uid, project, state, previous_state):
+        return self.publish({
+            "type": "state",
+            "job_uid": job_uid,
+            "project": project,
+            "state": state,
+            "previous_state": previous_state,
+            "timestamp": datetime.now().timestamp(),
+        })
+
+
+event_bus = None
+event_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    global event_bus
+    with event_bus_lock:
+        if event_bus is None:
+            event_bus = MonkeyEventBus()
+    return event_bus
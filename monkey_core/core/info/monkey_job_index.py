@@ -0,0 +1,119 @@
+import bisect
+import heapq
+import logging
+import threading
+
+from core.events.monkey_events import get_event_bus
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+from core.mongo.monkey_job_archive import MonkeyJobArchive
+
+logger = logging.getLogger(__name__)
+
+JOB_UID_SUGGESTION_LIMIT = 20
+
+
+def get_job_suffix(job_uid):
+    return job_uid.split("-")[-1]
+
+
+class MonkeyJobIndex():
+    """ Sorted in memory index of every job uid and random suffix
+
+    Exact, suffix and unique prefix lookups are binary searches instead of
+    queries.  Newer jobs win when several share a suffix, recency is the
+    order in which jobs were added, loaded oldest first.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.uids = []
+        self.suffixes = []
+        # suffix -> job uids with that suffix, oldest first
+        self.suffix_uids = dict()
+        # job uid -> insertion number, higher is newer
+        self.sequence = dict()
+
+    def load(self):
+        """ Adds every archived and live job, oldest first """
+        raw_jobs = []
+        if monkey_state.MONKEY_JOB_STORE == \
+                monkey_state.MONKEY_JOB_STORE_MONGO:
+            raw_jobs += list(MonkeyJobArchive.objects().order_by(
+                "creation_date").only("job_uid").as_pymongo())
+        raw_jobs += list(MonkeyJob.objects().order_by("creation_date").only(
+            "job_uid").as_pymongo())
+        for raw_job in raw_jobs:
+            self.add(raw_job["job_uid"])
+        logger.info(f"Indexed {len(self.sequence)} job uids")
+
+    def add(self, job_uid):
+        if not job_uid:
+            return
+        with self.lock:
+            if job_uid in self.sequence:
+                return
+            self.sequence[job_uid] = len(self.sequence)
+            bisect.insort(self.uids, job_uid)
+            suffix = get_job_suffix(job_uid)
+            if suffix not in self.suffix_uids:
+                bisect.insort(self.suffixes, suffix)
+                self.suffix_uids[suffix] = []
+            self.suffix_uids[suffix].append(job_uid)
+
+    def prefix_range(self, items, prefix):
+        start = bisect.bisect_left(items, prefix)
+        end = bisect.bisect_left(items, prefix + "\uffff", lo=start)
+        return items[start:end]
+
+    def find_matches(self, prefix):
+        """ Job uids whose uid or suffix starts with prefix """
+        matches = set(self.prefix_range(self.uids, prefix))
+        for suffix in self.prefix_range(self.suffixes, prefix):
+            matches.update(self.suffix_uids[suffix])
+        return matches
+
+    def resolve(self, uid):
+        """ Resolves a full uid, a suffix or a unique prefix of either
+
+        Returns:
+            str: The matching job uid, None if nothing or several jobs match
+        """
+        with self.lock:
+            if uid in self.sequence:
+                return uid
+            if uid in self.suffix_uids:
+                return self.suffix_uids[uid][-1]
+            matches = self.find_matches(uid)
+        if len(matches) == 1:
+            return matches.pop()
+        return None
+
+    def suggest(self, prefix, limit=JOB_UID_SUGGESTION_LIMIT):
+        """ Newest job uids whose uid or suffix starts with prefix """
+        with self.lock:
+            matches = self.find_matches(prefix)
+            return heapq.nlargest(limit,
+                                  matches,
+                                  key=lambda x: self.sequence[x])
+
+    def handle_event(self, event):
+        # A job's first state event is published when it is created
+        if event.get("type", None) == "state":
+            self.add(event.get("job_uid", None))
+
+
+job_index = None
+job_index_lock = threading.Lock()
+
+
+def get_job_index():
+    global job_index
+    with job_index_lock:
+        if job_index is None:
+            index = MonkeyJobIndex()
+            get_event_bus().add_listener(index.handle_event)
+            index.load()
+            job_index = index
+    return job_index
@@ -1,23 +1,62 @@
 import logging
 
 logger = logging.getLogger(__name__)
+from core.info.monkey_job_index import get_job_index
+from core.mongo import mongo_global as monkey_state
+from core.mongo.mongo_utils import mongo_to_dict
 from core.mongo.monkey_job import MonkeyJob
+from core.mongo.monkey_job_archive import MonkeyJobArchive
 
 
 def get_job_uid(self, uid):
+    """ Resolves a full uid, a random suffix or a unique prefix of either
+
+    The in memory index answers almost every lookup, the job store is only
+    queried for jobs the index has not seen.
+    """
+    job_index = get_job_index()
+    job_uid = job_index.resolve(uid)
+    if job_uid is not None:
+        return job_uid
+    job_uid = find_job_uid(uid)
+    if job_uid is not None:
+        job_index.add(job_uid)
+    return job_uid
+
+
+def find_job_uid(uid):
     jobs = MonkeyJob.objects(job_uid=uid).order_by("-creation_date")
     if len(jobs) > 0:
         return jobs[0].job_uid
     jobs = MonkeyJob.objects(job_random_suffix=uid).order_by("-creation_date")
     if len(jobs) > 0:
         return jobs[0].job_uid
+    archived_job = get_archived_job(uid, match_suffix=True)
+    if archived_job is not None:
+        return archived_job.job_uid
     return None
 
 
+def get_archived_job(uid, match_suffix=False):
+    if monkey_state.MONKEY_JOB_STORE != monkey_state.MONKEY_JOB_STORE_MONGO:
+        return None
+    jobs = MonkeyJobArchive.objects(job_uid=uid)
+    if len(jobs) == 0 and match_suffix:
+        jobs = MonkeyJobArchive.objects(
+            job_random_suffix=uid).order_by("-creation_date")
+    if len(jobs) == 0:
+        return None
+    return jobs[0]
+
+
 def get_job_config(self, uid):
     jobs = MonkeyJob.objects(job_uid=uid).order_by("-creation_date")
     if len(jobs) == 0:
-        return None
+        archived_job = get_archived_job(uid)
+        if archived_job is None:
+            return None
+        return archived_job.get_dict().get("experiment_hyperparameters",
+                                           dict())
     job = jobs[0]
     return job.experiment_hyperparameters
 
@@ -29,11 +68,52 @@ def get_job_info(self, uid):
 
     print(jobs)
     if len(jobs) == 0:
-        None
+        archived_job = get_archived_job(uid)
+        if archived_job is None:
+            return None
+        return archived_job.get_dict()
     job = jobs[0]
     return job.get_dict()
 
 
+def get_job_version(self, uid):
+    """ Version of a live job without loading it, None if it is not live """
+    job = MonkeyJob.objects(job_uid=uid).only("version").first()
+    if job is None:
+        return None
+    return job.version
+
+
+def get_sweep_info(self, sweep_id):
+    """ Aggregates the state of every child job of a sweep """
+    jobs = MonkeyJob.objects(sweep_id=sweep_id).order_by("creation_date")
+    if len(jobs) == 0:
+        return None
+    state_counts = dict()
+    children = []
+    for job in jobs:
+        state_counts[job.state] = state_counts.get(job.state, 0) + 1
+        children.append({
+            "job_uid": job.job_uid,
+            "state": job.state,
+            "cmd": job.job_yml.get("cmd", None),
+            "sweep_parameters": job.sweep_parameters,
+            "run_elapsed_time": job.run_elapsed_time,
+            "sweep_metrics": job.sweep_metrics,
+            "early_stopped": job.early_stopped,
+        })
+    finished = state_counts.get(monkey_state.MONKEY_STATE_FINISHED, 0)
+    return {
+        "sweep_id": sweep_id,
+        "sweep": jobs[0].job_yml.get("sweep", dict()),
+        "num_jobs": len(children),
+        "num_finished": finished,
+        "num_early_stopped": len([x for x in children if x["early_stopped"]]),
+        "state_counts": state_counts,
+        "jobs": children,
+    }
+
+
 def get_list_providers(self):
     return [x.get_dict() for x in self.providers]
 
@@ -46,21 +126,28 @@ def get_list_local_instances(self):
     return local_instances
 
 
-def get_list_jobs(self, options=dict()):
-    # logger.info("Getting full job list")
+def iter_list_jobs(self, options=dict()):
+    """ Yields json ready job dicts straight from the raw mongo documents
+
+    Skips building MonkeyJob objects so that large listings can be streamed
+    to the client one job at a time.
+    """
+    num_jobs = None
     try:
         num_jobs = int(options.get("num_jobs", -1))
     except:
         pass
 
+    jobs = MonkeyJob.objects()
     if num_jobs is not None and num_jobs != -1:
-        jobs = [
-            x.get_dict()
-            for x in MonkeyJob.objects().order_by("-creation_date").limit(num_jobs)
-        ]
-    else:
-        jobs = [x.get_dict() for x in MonkeyJob.objects()]
-    return jobs
+        jobs = jobs.order_by("-creation_date").limit(num_jobs)
+    for raw_job in jobs.as_pymongo():
+        yield mongo_to_dict(raw_job)
+
+
+def get_list_jobs(self, options=dict()):
+    # logger.info("Getting full job list")
+    return list(self.iter_list_jobs(options))
 
 
 # Fully implemented
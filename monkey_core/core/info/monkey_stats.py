@@ -0,0 +1,270 @@
+import logging
+from datetime import datetime, timedelta
+
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+
+logger = logging.getLogger(__name__)
+
+STATS_DEFAULT_HOURS = 24
+STATS_MAX_HOURS = 24 * 30
+STATS_PERCENTILES = [50, 90, 99]
+STATS_TIME_FIELDS = ["run_elapsed_time", "total_wall_time"]
+# Buckets are keyed by the hour of an iso date, e.g. 2021-06-01T13
+STATS_HOUR_FORMAT = "%Y-%m-%dT%H"
+
+
+def get_percentile_offsets(count):
+    """ Offset of each percentile in a list of count sorted values """
+    return {
+        p: min(count - 1, max(0,
+                              int(round(p / 100 * count)) - 1))
+        for p in STATS_PERCENTILES
+    }
+
+
+def get_hourly_buckets(since, hours, created, dequeued, finished, queue_depth):
+    """ Combines per hour counts into one entry per hour of the window
+
+    The queue depth at the end of each hour is the depth at the start of the
+    window plus the jobs created minus the jobs that left the queue.
+    """
+    buckets = []
+    for i in range(hours + 1):
+        hour = (since + timedelta(hours=i)).strftime(STATS_HOUR_FORMAT)
+        queue_depth += created.get(hour, 0) - dequeued.get(hour, 0)
+        buckets.append({
+            "hour": hour,
+            "created": created.get(hour, 0),
+            "dequeued": dequeued.get(hour, 0),
+            "finished": finished.get(hour, 0),
+            "queue_depth": queue_depth,
+        })
+    return buckets
+
+
+def get_mongo_job_stats(since, hours):
+    collection = MonkeyJob._get_collection()
+
+    def count_by(key):
+        return {
+            x["_id"]: x["count"]
+            for x in collection.aggregate([{
+                "$group": {
+                    "_id": key,
+                    "count": {
+                        "$sum": 1
+                    }
+                }
+            }])
+        }
+
+    def count_by_hour(date_key, match):
+        hour_key = {
+            "$dateToString": {
+                "format": STATS_HOUR_FORMAT,
+                "date": date_key
+            }
+        }
+        return {
+            x["_id"]: x["count"]
+            for x in collection.aggregate([{
+                "$match": match
+            }, {
+                "$group": {
+                    "_id": hour_key,
+                    "count": {
+                        "$sum": 1
+                    }
+                }
+            }])
+        }
+
+    # Jobs leave the queue when dispatched, or when they finish without
+    # ever being dispatched (reused results, killed while queued)
+    dequeue_date = {"$ifNull": ["$run_dispatch_date", "$completion_date"]}
+    created = count_by_hour("$creation_date",
+                            {"creation_date": {
+                                "$gte": since
+                            }})
+    dequeued = count_by_hour(dequeue_date,
+                             {"$expr": {
+                                 "$gte": [dequeue_date, since]
+                             }})
+    finished = count_by_hour(
+        "$completion_date", {
+            "state": monkey_state.MONKEY_STATE_FINISHED,
+            "completion_date": {
+                "$gte": since
+            }
+        })
+    queue_depth = collection.count_documents({
+        "creation_date": {
+            "$lt": since
+        },
+        "$or": [{
+            "run_dispatch_date": {
+                "$gte": since
+            }
+        }, {
+            "run_dispatch_date": None,
+            "completion_date": None
+        }, {
+            "run_dispatch_date": None,
+            "completion_date": {
+                "$gte": since
+            }
+        }]
+    })
+
+    finished_match = {"state": monkey_state.MONKEY_STATE_FINISHED}
+    time_stats = dict()
+    for field in STATS_TIME_FIELDS:
+        summary = list(
+            collection.aggregate([{
+                "$match": finished_match
+            }, {
+                "$group": {
+                    "_id": None,
+                    "count": {
+                        "$sum": 1
+                    },
+                    "average": {
+                        "$avg": f"${field}"
+                    },
+                    "max": {
+                        "$max": f"${field}"
+                    }
+                }
+            }]))
+        if len(summary) == 0:
+            time_stats[field] = {"count": 0}
+            continue
+        summary = summary[0]
+        stats = {
+            "count": summary["count"],
+            "average": summary["average"],
+            "max": summary["max"]
+        }
+        for p, offset in get_percentile_offsets(summary["count"]).items():
+            value = list(
+                collection.find(finished_match, {
+                    field: 1
+                }).sort(field, 1).skip(offset).limit(1))
+            stats[f"p{p}"] = value[0].get(field, None) if value else None
+        time_stats[field] = stats
+
+    return {
+        "total":
+            collection.count_documents({}),
+        "states":
+            count_by("$state"),
+        "providers":
+            count_by("$provider_name"),
+        "projects":
+            count_by("$job_yml.project_name"),
+        "hourly":
+            get_hourly_buckets(since, hours, created, dequeued, finished,
+                               queue_depth),
+        **time_stats
+    }
+
+
+def get_sqlite_job_stats(since, hours):
+    from core.mongo.monkey_job_sqlite import (SQLITE_TABLE,
+                                              get_sqlite_connection)
+    connection = get_sqlite_connection()
+
+    def json_date(field):
+        return f"json_extract(document, '$.{field}.\"$datetime\"')"
+
+    def count_by(key, where="1", args=()):
+        return {
+            x[0]: x[1]
+            for x in connection.execute(
+                f"SELECT {key}, COUNT(*) FROM {SQLITE_TABLE} " +
+                f"WHERE {where} GROUP BY 1", args)
+        }
+
+    since_date = since.isoformat()
+    dequeue_date = f"COALESCE({json_date('run_dispatch_date')}, " + \
+        "completion_date)"
+    created = count_by("substr(creation_date, 1, 13)", "creation_date >= ?",
+                       (since_date,))
+    dequeued = count_by(f"substr({dequeue_date}, 1, 13)",
+                        f"{dequeue_date} >= ?", (since_date,))
+    finished = count_by("substr(completion_date, 1, 13)",
+                        "state = ? AND completion_date >= ?",
+                        (monkey_state.MONKEY_STATE_FINISHED, since_date))
+    queue_depth = connection.execute(
+        f"SELECT COUNT(*) FROM {SQLITE_TABLE} WHERE creation_date < ? " +
+        f"AND ({dequeue_date} IS NULL OR {dequeue_date} >= ?)",
+        (since_date, since_date)).fetchone()[0]
+
+    time_stats = dict()
+    for field in STATS_TIME_FIELDS:
+        value = f"json_extract(document, '$.{field}')"
+        finished_where = f"state = ? AND {value} IS NOT NULL"
+        finished_args = (monkey_state.MONKEY_STATE_FINISHED,)
+        count, average, maximum = connection.execute(
+            f"SELECT COUNT(*), AVG({value}), MAX({value}) " +
+            f"FROM {SQLITE_TABLE} WHERE {finished_where}",
+            finished_args).fetchone()
+        if count == 0:
+            time_stats[field] = {"count": 0}
+            continue
+        stats = {"count": count, "average": average, "max": maximum}
+        for p, offset in get_percentile_offsets(count).items():
+            stats[f"p{p}"] = connection.execute(
+                f"SELECT {value} FROM {SQLITE_TABLE} " +
+                f"WHERE {finished_where} ORDER BY {value} LIMIT 1 OFFSET ?",
+                finished_args + (offset,)).fetchone()[0]
+        time_stats[field] = stats
+
+    return {
+        "total":
+            connection.execute(f"SELECT COUNT(*) FROM {SQLITE_TABLE}"
+                               ).fetchone()[0],
+        "states":
+            count_by("state"),
+        "providers":
+            count_by("provider_name"),
+        "projects":
+            count_by("json_extract(document, '$.job_yml.project_name')"),
+        "hourly":
+            get_hourly_buckets(since, hours, created, dequeued, finished,
+                               queue_depth),
+        **time_stats
+    }
+
+
+def get_job_stats(self, hours=STATS_DEFAULT_HOURS):
+    """ Aggregate job statistics computed by the job store
+
+    Args:
+        hours (int, optional): Length of the hourly queue depth and
+            throughput window, ending now
+
+    Returns:
+        dict: Job counts per state, provider and project, hourly created,
+            dequeued and finished counts with the queue depth at the end of
+            each hour, and the average, max and percentiles of the run and
+            wall times of finished jobs
+    """
+    hours = max(1, min(int(hours), STATS_MAX_HOURS))
+    since = (datetime.now() - timedelta(hours=hours)).replace(minute=0,
+                                                              second=0,
+                                                              microsecond=0)
+    if monkey_state.MONKEY_JOB_STORE == monkey_state.MONKEY_JOB_STORE_SQLITE:
+        stats = get_sqlite_job_stats(since, hours)
+    else:
+        stats = get_mongo_job_stats(since, hours)
+    # Jobs without a project are grouped under None, which is not a valid
+    # json key
+    for key in ["states", "providers", "projects"]:
+        stats[key] = [{
+            "name": name,
+            "count": count
+        } for name, count in sorted(stats[key].items(), key=lambda x: -x[1])]
+    stats["window_hours"] = hours
+    return stats
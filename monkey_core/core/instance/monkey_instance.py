@@ -277,7 +277,9 @@ class MonkeyInstance():
             if not success:
                 return success, msg
 
-        success, msg = self.unpack_job_dir(job_uid=job_uid)
+        batch_uid = job_yml.get("batch_uid", None)
+        success, msg = self.unpack_job_dir(job_uid=job_uid,
+                                           batch_uid=batch_uid)
         if not success:
             return success, msg
 
@@ -347,6 +349,9 @@ class MonkeyInstance():
     def get_monkeyfs_job_dir(self, job_uid):
         return os.path.join(self.get_monkeyfs_dir(), "jobs", job_uid, "")
 
+    def get_monkeyfs_batch_dir(self, batch_uid):
+        return os.path.join(self.get_monkeyfs_dir(), "batches", batch_uid, "")
+
     def get_dataset_path(self, data_name, checksum, extension):
         return os.path.join(
             self.get_monkeyfs_dir(),
@@ -372,6 +377,9 @@ class MonkeyInstance():
             "code" + extension,
         )
 
+    def get_blobs_dir(self):
+        return os.path.join(self.get_monkeyfs_dir(), "blobs")
+
     def get_persist_all_script(self, job_uid):
         return os.path.join(
             self.get_job_dir(job_uid=job_uid),
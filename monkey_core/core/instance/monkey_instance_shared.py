@@ -1,5 +1,6 @@
 import os
 
+from core import monkey_global
 from core.instance.monkey_instance import AnsibleRunException
 
 
@@ -18,6 +19,22 @@ def setup_data_item(self, job_uid, data_item):
     print("Copying dataset from", dataset_full_path, " to ",
           installation_location)
 
+    if data_item["extension"] == monkey_global.MANIFEST_EXTENSION:
+        # Chunked datasets are rebuilt from the content addressed blob store
+        try:
+            self.run_ansible_role(
+                rolename="setup/unpack_manifest",
+                extravars={
+                    "manifest_path": dataset_full_path,
+                    "blobs_path": self.get_blobs_dir(),
+                    "destination_path": installation_location,
+                })
+        except AnsibleRunException as e:
+            print(e)
+            return False, "Failed to build dataset from its manifest"
+        print("Successfully setup data item")
+        return True, "Successfully setup data item"
+
     try:
         self.run_ansible_module(modulename="file",
                                 args={
@@ -44,22 +61,31 @@ def setup_data_item(self, job_uid, data_item):
 #  2. Unpack Job Dir
 #
 #############################################
-def unpack_job_dir(self, job_uid):
+def unpack_job_dir(self, job_uid, batch_uid=None):
+    """
+    Jobs submitted in a batch first get the files uploaded once for the
+    whole batch, then their own job folder
+    """
     job_path = os.path.join(self.get_job_dir(job_uid=job_uid), "")
-    monkeyfs_job_path = os.path.join(
-        self.get_monkeyfs_job_dir(job_uid=job_uid), "")
-
-    try:
-        self.run_ansible_module(modulename="copy",
-                                args={
-                                    "src": monkeyfs_job_path,
-                                    "dest": job_path,
-                                    "remote_src": True
-                                })
-    except AnsibleRunException as e:
-        print(e)
-        print("Failed to copy directory")
-        return False, "Failed to copy directory"
+    monkeyfs_paths = [
+        os.path.join(self.get_monkeyfs_job_dir(job_uid=job_uid), "")
+    ]
+    if batch_uid is not None:
+        monkeyfs_paths.insert(0,
+                              self.get_monkeyfs_batch_dir(batch_uid=batch_uid))
+
+    for monkeyfs_path in monkeyfs_paths:
+        try:
+            self.run_ansible_module(modulename="copy",
+                                    args={
+                                        "src": monkeyfs_path,
+                                        "dest": job_path,
+                                        "remote_src": True
+                                    })
+        except AnsibleRunException as e:
+            print(e)
+            print("Failed to copy directory")
+            return False, "Failed to copy directory"
 
     print("Unpacked job dir successfully")
     return True, "Unpacked code and persisted directories successfully"
@@ -84,6 +110,23 @@ def unpack_code_and_persist(self, job_uid, code_item):
     print("Code tar path: ", code_tar_path)
     print("Run dir: ", job_dir_path)
 
+    if extension == monkey_global.MANIFEST_EXTENSION:
+        # Codebases uploaded as a manifest are copied file by file from the
+        # content addressed blob store
+        try:
+            self.run_ansible_role(rolename="setup/unpack_manifest",
+                                  extravars={
+                                      "manifest_path": code_tar_path,
+                                      "blobs_path": self.get_blobs_dir(),
+                                      "destination_path": job_dir_path,
+                                  })
+        except AnsibleRunException as e:
+            print(e)
+            print("Failed to unpack code")
+            return False, "Failed to build code from its manifest"
+        print("Unpacked code successfully")
+        return True, "Unpacked code and persisted directories successfully"
+
     try:
         self.run_ansible_module(modulename="unarchive",
                                 args={
@@ -0,0 +1,71 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from core import monkey_global
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+from core.mongo.monkey_counter import increment_counter
+from core.mongo.monkey_job_archive import MonkeyJobArchive
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_finished_jobs(self, older_than_days=None):
+    """Moves finished jobs older than the cutoff into the archive collection
+
+    Args:
+        older_than_days (int, optional): Age in days after completion.
+            Defaults to monkey_global.ARCHIVE_JOBS_AFTER_DAYS
+
+    Returns:
+        int: Number of archived jobs
+    """
+    if older_than_days is None:
+        older_than_days = monkey_global.ARCHIVE_JOBS_AFTER_DAYS
+    if older_than_days is None or older_than_days < 0:
+        return 0
+    # The embedded sqlite store only tracks a handful of local jobs
+    if monkey_state.MONKEY_JOB_STORE != monkey_state.MONKEY_JOB_STORE_MONGO:
+        return 0
+
+    cutoff = datetime.now() - timedelta(days=older_than_days)
+    archived_num = 0
+    while True:
+        raw_jobs = list(
+            MonkeyJob.objects(state=monkey_state.MONKEY_STATE_FINISHED,
+                              last_state_change__lt=cutoff).limit(
+                                  ARCHIVE_BATCH_SIZE).as_pymongo())
+        if len(raw_jobs) == 0:
+            break
+        job_uids = [x["job_uid"] for x in raw_jobs]
+
+        # A previous run may have stopped between insert and delete
+        already_archived = set(
+            MonkeyJobArchive.objects(job_uid__in=job_uids).distinct("job_uid"))
+        archive_jobs = [
+            MonkeyJobArchive.from_raw_job(x)
+            for x in raw_jobs
+            if x["job_uid"] not in already_archived
+        ]
+        if len(archive_jobs) > 0:
+            MonkeyJobArchive.objects.insert(archive_jobs, load_bulk=False)
+        MonkeyJob.objects(job_uid__in=job_uids).delete()
+        increment_counter(monkey_state.MONKEY_JOB_VERSION_COUNTER)
+        archived_num += len(job_uids)
+
+    if archived_num > 0:
+        logger.info(f"Archived {archived_num} finished jobs older than " +
+                    f"{older_than_days} days")
+    return archived_num
+
+
+def archive_loop(self):
+    threading.Timer(monkey_global.ARCHIVE_THREAD_TIME,
+                    self.archive_loop).start()
+    try:
+        self.archive_finished_jobs()
+    except Exception as e:
+        logger.error(f"Failed to archive finished jobs: {e}")
@@ -98,9 +98,6 @@ def check_for_dead_jobs(self, log_file=None):
                 .format(job))
             continue
 
-        job.total_wall_time = (datetime.now() -
-                               job.creation_date).total_seconds()
-
         timeout_for_state = monkey_state.state_to_timeout(job.state)
         time_elapsed = job.time_elapsed_in_state()
         if timeout_for_state is not None and time_elapsed > timeout_for_state and \
@@ -153,6 +150,7 @@ def check_for_dead_jobs(self, log_file=None):
                                  args=(job.job_yml,
                                        found_provider.get_dict())).start()
                 job.run_cleanup_start_date = datetime.now()
+                job.save()
             elif (instance is not None and instance.check_online() == False):
                 job.set_state(monkey_state.MONKEY_STATE_FINISHED)
         elif job.state == monkey_state.MONKEY_STATE_FINISHED:
@@ -161,7 +159,6 @@ def check_for_dead_jobs(self, log_file=None):
             if instance is not None and instance.check_online() == True:
                 print("Machine found existing in finished state, cleaning...")
                 job.set_state(monkey_state.MONKEY_STATE_CLEANUP)
-        job.save()
 
 
 def check_for_job_hyperparameters(self, log_file=None):
@@ -215,3 +212,4 @@ def daemon_loop(self):  #
             self.check_for_queued_jobs(f)
             self.check_for_dead_jobs(f)
             self.check_for_job_hyperparameters(f)
+            self.check_for_sweep_early_stopping(f)
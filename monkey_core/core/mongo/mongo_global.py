@@ -1,3 +1,5 @@
+import os
+
 MONKEY_STATE_QUEUED = "QUEUED"
 MONKEY_STATE_DISPATCHING = "DISPATCHING"
 MONKEY_STATE_DISPATCHING_MACHINE = "DISPATCHING_MACHINE"
@@ -7,6 +9,15 @@ MONKEY_STATE_RUNNING = "RUNNING"
 MONKEY_STATE_CLEANUP = "CLEANING_UP"
 MONKEY_STATE_FINISHED = "FINISHED"
 
+MONKEY_JOB_STORE_MONGO = "mongo"
+MONKEY_JOB_STORE_SQLITE = "sqlite"
+# Set MONKEY_JOB_STORE=sqlite to run without a MongoDB server
+MONKEY_JOB_STORE = os.environ.get("MONKEY_JOB_STORE", MONKEY_JOB_STORE_MONGO)
+MONKEY_SQLITE_PATH = os.environ.get("MONKEY_SQLITE_PATH", "monkey.sqlite")
+
+# Persistent counter bumped on every job write, used as the job version
+MONKEY_JOB_VERSION_COUNTER = "job_version"
+
 MONKEY_TIMEOUT_DISPATCHING_MACHINE = 60 * 5  # 5 min to dispatch machine max
 MONKEY_TIMEOUT_DISPATCHING_INSTALLS = 60 * 10  # 10 min to dispatch installs max
 MONKEY_TIMEOUT_DISPATCHING_SETUP = 60 * 5  # 3 min to dispatch setup max
@@ -1,3 +1,7 @@
+import calendar
+from datetime import datetime
+
+from bson import ObjectId
 from mongoengine import *
 
 
@@ -13,3 +17,31 @@ def get_monkey_db():
     except:
         print("Failure connecting to mongodb\nRun `docker-compose up`")
     return False
+
+
+def mongo_to_dict(value):
+    """ Converts a raw mongo document into a json ready dict
+
+    Produces the same extended json layout as `json_util.dumps` (dates as
+    {"$date": millis}, ids as {"$oid": hex}) without the serialize and parse
+    round trip.
+
+    Args:
+        value: A raw document, list or value as returned by pymongo
+
+    Returns:
+        The value with every nested date and id converted
+    """
+    if isinstance(value, dict):
+        return {key: mongo_to_dict(val) for key, val in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [mongo_to_dict(val) for val in value]
+    if isinstance(value, datetime):
+        if value.utcoffset() is not None:
+            value = value - value.utcoffset()
+        millis = calendar.timegm(
+            value.timetuple()) * 1000 + value.microsecond // 1000
+        return {"$date": millis}
+    if isinstance(value, ObjectId):
+        return {"$oid": str(value)}
+    return value
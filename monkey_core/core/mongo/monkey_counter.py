@@ -0,0 +1,50 @@
+import logging
+
+from mongoengine import *
+from pymongo.errors import DuplicateKeyError
+
+from . import mongo_global as monkey_state
+from .monkey_job_sqlite import get_sqlite_counter, increment_sqlite_counter
+
+logger = logging.getLogger(__name__)
+
+
+class MonkeyCounter(Document):
+    name = StringField(required=True, unique=True)
+    value = IntField(required=True, default=0)
+
+    meta = {'collection': 'monkey_counter'}
+
+
+def increment_counter(name, count=1):
+    """ Atomically adds count to a persistent named counter
+
+    Args:
+        name (str): Counter name, created at 0 if it does not exist
+        count (int, optional): Amount to add. Defaults to 1.
+
+    Returns:
+        int: The counter value after the increment
+    """
+    if monkey_state.MONKEY_JOB_STORE == monkey_state.MONKEY_JOB_STORE_SQLITE:
+        return increment_sqlite_counter(name, count)
+
+    try:
+        counter = MonkeyCounter.objects(name=name).modify(upsert=True,
+                                                          new=True,
+                                                          inc__value=count)
+    except (DuplicateKeyError, NotUniqueError):
+        # Two first increments raced on the upsert, the counter exists now
+        counter = MonkeyCounter.objects(name=name).modify(new=True,
+                                                          inc__value=count)
+    return counter.value
+
+
+def get_counter(name):
+    """ Returns the current value of a named counter, 0 if it does not exist
+    """
+    if monkey_state.MONKEY_JOB_STORE == monkey_state.MONKEY_JOB_STORE_SQLITE:
+        return get_sqlite_counter(name)
+
+    counter = MonkeyCounter.objects(name=name).first()
+    return 0 if counter is None else counter.value
@@ -0,0 +1,52 @@
+import logging
+import zlib
+from datetime import datetime
+
+import ujson
+from mongoengine import *
+
+from .mongo_utils import mongo_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class MonkeyJobArchive(Document):
+    """ Compact copy of a finished MonkeyJob moved out of the hot collection
+
+    Only the fields needed for lookups are stored as columns, the full job
+    document is kept as zlib compressed json.
+    """
+    job_uid = StringField(required=True, unique=True)
+    job_random_suffix = StringField(required=False, unique=False)
+    project_name = StringField(required=False)
+    state = StringField(required=True)
+    creation_date = DateTimeField(required=True)
+    completion_date = DateTimeField(required=False)
+    archive_date = DateTimeField(required=True, default=datetime.now)
+    compressed_job = BinaryField(required=True)
+
+    meta = {
+        'collection': 'monkey_job_archive',
+        'indexes': [
+            'job_uid',
+            'job_random_suffix',
+        ]
+    }
+
+    @staticmethod
+    def from_raw_job(raw_job):
+        """ Builds an archive entry from a raw pymongo MonkeyJob document """
+        job_dict = mongo_to_dict(raw_job)
+        job_dict.pop("_id", None)
+        return MonkeyJobArchive(
+            job_uid=raw_job["job_uid"],
+            job_random_suffix=raw_job.get("job_random_suffix", None),
+            project_name=raw_job.get("job_yml", dict()).get("project_name"),
+            state=raw_job["state"],
+            creation_date=raw_job["creation_date"],
+            completion_date=raw_job.get("completion_date", None),
+            compressed_job=zlib.compress(
+                ujson.dumps(job_dict).encode("utf-8")))
+
+    def get_dict(self):
+        return ujson.loads(zlib.decompress(self.compressed_job))
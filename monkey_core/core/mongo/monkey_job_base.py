@@ -0,0 +1,54 @@
+import logging
+from datetime import datetime
+
+from core.events.monkey_events import get_event_bus
+
+from . import mongo_global as monkey_state
+
+logger = logging.getLogger(__name__)
+
+
+class MonkeyJobBase():
+    """ State transition logic shared by every job store backend """
+
+    def set_state(self, state):
+        """ Sets the state and updates needed timestamps
+
+        Args:
+            state (MONKEY_STATE): The state to update to
+        """
+        logger.info("Setting job: {} state to: {}, from: {}".format(
+            self.job_uid, state, self.state))
+
+        if (self.state == monkey_state.MONKEY_STATE_RUNNING) and (
+                state != monkey_state.MONKEY_STATE_RUNNING):
+            self.run_elapsed_time += self.time_elapsed_in_state()
+
+        previous_state = self.state
+        self.state = state
+        if state == monkey_state.MONKEY_STATE_QUEUED:
+            # A requeued job waits in the queue again until redispatched
+            self.run_dispatch_date = None
+        elif state == monkey_state.MONKEY_STATE_DISPATCHING:
+            self.run_dispatch_date = datetime.now()
+        elif state == monkey_state.MONKEY_STATE_DISPATCHING_MACHINE:
+            self.run_dispatch_machine_start_date = datetime.now()
+        elif state == monkey_state.MONKEY_STATE_DISPATCHING_INSTALLS:
+            self.run_dispatch_installs_start_date = datetime.now()
+        elif state == monkey_state.MONKEY_STATE_DISPATCHING_SETUP:
+            self.run_dispatch_setup_start_date = datetime.now()
+        elif state == monkey_state.MONKEY_STATE_RUNNING:
+            self.run_running_start_date = datetime.now()
+        elif state == monkey_state.MONKEY_STATE_CLEANUP:
+            self.run_cleanup_start_date = datetime.now()
+        elif state == monkey_state.MONKEY_STATE_FINISHED:
+            self.completion_date = datetime.now()
+            self.total_wall_time = (datetime.now() -
+                                    self.creation_date).total_seconds()
+        self.last_state_change = datetime.now()
+        self.save()
+        get_event_bus().publish_state_change(job=self,
+                                             previous_state=previous_state)
+
+    def time_elapsed_in_state(self):
+        return (datetime.now() - self.last_state_change).total_seconds()
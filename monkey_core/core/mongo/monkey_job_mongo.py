@@ -0,0 +1,86 @@
+import logging
+from datetime import datetime
+
+from mongoengine import *
+
+from . import mongo_global as monkey_state
+from .mongo_utils import mongo_to_dict
+from .monkey_counter import increment_counter
+from .monkey_job_base import MonkeyJobBase
+
+logger = logging.getLogger(__name__)
+
+
+class MongoMonkeyJob(MonkeyJobBase, DynamicDocument):
+    job_uid = StringField(required=True, unique=True)
+    job_random_suffix = StringField(required=False, unique=False)
+    job_yml = DictField(required=True)
+    state = StringField(required=True)
+    provider_type = StringField(required=True)
+    provider_name = StringField(required=True)
+    provider_vars = DictField(required=True, default=dict)
+
+    # Job state
+    current_ip_address = StringField(required=False)
+
+    # Dates to store certain timing statistics
+    creation_date = DateTimeField(required=True, default=datetime.now)
+    last_state_change = DateTimeField(required=True, default=datetime.now)
+    run_dispatch_date = DateTimeField(required=False)
+    run_dispatch_machine_start_date = DateTimeField(required=False)
+    run_dispatch_installs_start_date = DateTimeField(required=False)
+    run_dispatch_setup_start_date = DateTimeField(required=False)
+    run_running_start_date = DateTimeField(required=False)
+    run_cleanup_start_date = DateTimeField(required=False)
+    completion_date = DateTimeField(required=False)
+
+    # Used to keep total run elapsed time
+    run_timeout_time = IntField(required=True, default=-1)
+    run_elapsed_time = IntField(required=True, default=0)
+    total_wall_time = IntField(required=True, default=0)
+
+    # Experiment config, hyperparameters
+    experiment_hyperparameters = DictField(required=False, default=dict)
+
+    # Parent sweep and the parameters this child was expanded with
+    sweep_id = StringField(required=False)
+    sweep_parameters = DictField(required=False, default=dict)
+    # Metric value at each early stopping rung reached, keyed by resource
+    sweep_metrics = DictField(required=False, default=dict)
+    early_stopped = BooleanField(required=False, default=False)
+    # Set when the job ran to completion, only those results are reused
+    run_succeeded = BooleanField(required=False, default=False)
+
+    # Hash of the code, data, environment and command that produced the job
+    result_key = StringField(required=False)
+    # Finished job whose results were reused instead of running this job
+    cached_from = StringField(required=False)
+
+    # Value of the job version counter at the last write of this job
+    version = IntField(required=True, default=0)
+    # In UTC, it is sent as the Last-Modified header
+    last_modified = DateTimeField(required=False)
+
+    meta = {
+        'collection':
+            'monkey_job',
+        'indexes': [
+            'job_uid',  # text index for uid
+            '$state',  # text index for state
+            'sweep_id',
+            'result_key',
+            'version',
+        ]
+    }
+
+    def save(self, *args, **kwargs):
+        # Saving a job that did not change keeps its version and etag
+        if not self._created and not self._get_changed_fields():
+            return self
+        self.version = increment_counter(
+            monkey_state.MONKEY_JOB_VERSION_COUNTER)
+        self.last_modified = datetime.utcnow()
+        return super().save(*args, **kwargs)
+
+    def get_dict(self):
+        return mongo_to_dict(self.to_mongo().to_dict())
@@ -0,0 +1,531 @@
+import copy
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime
+
+from . import mongo_global as monkey_state
+from .mongo_utils import mongo_to_dict
+from .monkey_job_base import MonkeyJobBase
+
+logger = logging.getLogger(__name__)
+
+SQLITE_TABLE = "monkey_job"
+SQLITE_COUNTER_TABLE = "monkey_counter"
+SQLITE_BUSY_TIMEOUT = 30
+
+# Fields mirrored into real columns so they can be filtered and sorted in sql.
+# Everything else is only stored in the json document.
+SQLITE_COLUMNS = [
+    "job_uid",
+    "job_random_suffix",
+    "state",
+    "provider_name",
+    "creation_date",
+    "last_state_change",
+    "completion_date",
+    "sweep_id",
+    "result_key",
+    "version",
+]
+# Columns compared numerically, every other column is stored as text
+SQLITE_INTEGER_COLUMNS = ["version"]
+SQLITE_DATETIME_COLUMNS = [
+    "creation_date", "last_state_change", "completion_date"
+]
+
+SQLITE_OPERATORS = {
+    "": "=",
+    "ne": "!=",
+    "lt": "<",
+    "lte": "<=",
+    "gt": ">",
+    "gte": ">=",
+    "in": "IN",
+}
+
+connections = threading.local()
+
+
+def encode_value(obj):
+    if isinstance(obj, datetime):
+        return {"$datetime": obj.isoformat()}
+    raise TypeError(f"Can not encode {type(obj)}")
+
+
+def decode_value(obj):
+    if len(obj) == 1 and "$datetime" in obj:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+def column_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def decode_column(column, value):
+    if column in SQLITE_DATETIME_COLUMNS and value is not None:
+        return datetime.fromisoformat(value)
+    return value
+
+
+def decode_row(columns, row):
+    return dict((x, decode_column(x, y)) for x, y in zip(columns, row))
+
+
+def project_document(document, fields):
+    return dict((x, document[x]) for x in fields if x in document)
+
+
+def column_type(column):
+    return "INTEGER" if column in SQLITE_INTEGER_COLUMNS else "TEXT"
+
+
+def get_sqlite_connection():
+    """ Returns this thread's connection to the job database
+
+    Connections are opened in WAL mode so the api threads can read while the
+    dispatch threads write.
+    """
+    connection = getattr(connections, "connection", None)
+    if connection is not None and \
+            connections.path == monkey_state.MONKEY_SQLITE_PATH:
+        return connection
+    connection = sqlite3.connect(monkey_state.MONKEY_SQLITE_PATH,
+                                 timeout=SQLITE_BUSY_TIMEOUT,
+                                 isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    columns = ", ".join(
+        f"{x} TEXT PRIMARY KEY" if x == "job_uid" else f"{x} {column_type(x)}"
+        for x in SQLITE_COLUMNS)
+    connection.execute(f"CREATE TABLE IF NOT EXISTS {SQLITE_TABLE} " +
+                       f"({columns}, document TEXT NOT NULL)")
+    # Columns added after the table was first created are backfilled from
+    # the json document
+    existing_columns = [
+        x[1] for x in connection.execute(f"PRAGMA table_info({SQLITE_TABLE})")
+    ]
+    for column in SQLITE_COLUMNS:
+        if column not in existing_columns:
+            connection.execute(
+                f"ALTER TABLE {SQLITE_TABLE} ADD COLUMN {column} " +
+                column_type(column))
+            connection.execute(
+                f"UPDATE {SQLITE_TABLE} SET {column} = COALESCE(" +
+                f"json_extract(document, '$.{column}.\"$datetime\"'), " +
+                f"json_extract(document, '$.{column}'))")
+    for column in SQLITE_COLUMNS[1:]:
+        connection.execute(
+            f"CREATE INDEX IF NOT EXISTS {SQLITE_TABLE}_{column} " +
+            f"ON {SQLITE_TABLE} ({column})")
+    connection.execute(f"CREATE TABLE IF NOT EXISTS {SQLITE_COUNTER_TABLE} " +
+                       "(name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+    connections.connection = connection
+    connections.path = monkey_state.MONKEY_SQLITE_PATH
+    return connection
+
+
+def get_sqlite_db():
+    try:
+        get_sqlite_connection()
+        return True
+    except sqlite3.Error as e:
+        print(f"Failure opening sqlite job store: {e}")
+    return False
+
+
+def increment_counter_in_transaction(connection, name, count=1):
+    connection.execute(
+        f"INSERT INTO {SQLITE_COUNTER_TABLE} (name, value) VALUES (?, ?) " +
+        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, count))
+    return connection.execute(
+        f"SELECT value FROM {SQLITE_COUNTER_TABLE} WHERE name = ?",
+        (name,)).fetchone()[0]
+
+
+def increment_sqlite_counter(name, count=1):
+    """ Atomically adds count to a named counter and returns the new value """
+    connection = get_sqlite_connection()
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        value = increment_counter_in_transaction(connection, name, count)
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+    return value
+
+
+def get_sqlite_counter(name):
+    row = get_sqlite_connection().execute(
+        f"SELECT value FROM {SQLITE_COUNTER_TABLE} WHERE name = ?",
+        (name,)).fetchone()
+    return 0 if row is None else row[0]
+
+
+def parse_filter(key):
+    field, _, operator = key.partition("__")
+    if operator not in SQLITE_OPERATORS:
+        raise ValueError(f"Unsupported filter operator: {key}")
+    return field, operator
+
+
+def matches_filter(document, field, operator, value):
+    current = document.get(field, None)
+    try:
+        if operator == "":
+            return current == value
+        if operator == "ne":
+            return current != value
+        if operator == "in":
+            return current in value
+        if current is None:
+            return False
+        if operator == "lt":
+            return current < value
+        if operator == "lte":
+            return current <= value
+        if operator == "gt":
+            return current > value
+        if operator == "gte":
+            return current >= value
+    except TypeError:
+        return False
+    return False
+
+
+class SQLiteQuerySet():
+    """ The subset of the mongoengine QuerySet api used by monkey_core """
+
+    def __init__(self, document_class):
+        super().__init__()
+        self.document_class = document_class
+        self.filters = []
+        self.ordering = []
+        self.limit_num = None
+        self.only_fields = None
+        self.raw = False
+        self.cache = None
+
+    def clone(self):
+        queryset = copy.copy(self)
+        queryset.filters = list(self.filters)
+        queryset.ordering = list(self.ordering)
+        queryset.cache = None
+        return queryset
+
+    def __call__(self, **filters):
+        return self.filter(**filters)
+
+    def filter(self, **filters):
+        queryset = self.clone()
+        for key, value in filters.items():
+            field, operator = parse_filter(key)
+            queryset.filters.append((field, operator, value))
+        return queryset
+
+    def order_by(self, *keys):
+        queryset = self.clone()
+        queryset.ordering = [(x.lstrip("-+"), x.startswith("-")) for x in keys]
+        return queryset
+
+    def limit(self, num):
+        queryset = self.clone()
+        queryset.limit_num = num
+        return queryset
+
+    def only(self, *fields):
+        queryset = self.clone()
+        queryset.only_fields = list(fields)
+        return queryset
+
+    def as_pymongo(self):
+        queryset = self.clone()
+        queryset.raw = True
+        return queryset
+
+    def build_where(self):
+        clauses, params, python_filters = [], [], []
+        for field, operator, value in self.filters:
+            if field not in SQLITE_COLUMNS:
+                python_filters.append((field, operator, value))
+            elif operator == "in":
+                value = list(value)
+                if len(value) == 0:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{field} IN ({', '.join('?' * len(value))})")
+                params += [column_value(x) for x in value]
+            elif value is None and operator in ("", "ne"):
+                clauses.append(
+                    f"{field} IS {'NOT ' if operator == 'ne' else ''}NULL")
+            else:
+                clauses.append(f"{field} {SQLITE_OPERATORS[operator]} ?")
+                params.append(column_value(value))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params, python_filters
+
+    def fetch_documents(self):
+        where, params, python_filters = self.build_where()
+        sql_ordering = all(x[0] in SQLITE_COLUMNS for x in self.ordering)
+        # Projections of columns are read without parsing any document
+        sql_projection = self.only_fields is not None and sql_ordering and \
+            not python_filters and \
+            all(x in SQLITE_COLUMNS for x in self.only_fields)
+        selected = ", ".join(self.only_fields) if sql_projection else \
+            "document"
+        query = f"SELECT {selected} FROM {SQLITE_TABLE}{where}"
+        if self.ordering and sql_ordering:
+            query += " ORDER BY " + ", ".join(
+                f"{field} {'DESC' if descending else 'ASC'}"
+                for field, descending in self.ordering)
+        if self.limit_num is not None and sql_ordering and not python_filters:
+            query += f" LIMIT {int(self.limit_num)}"
+
+        rows = get_sqlite_connection().execute(query, params).fetchall()
+        if sql_projection:
+            return [decode_row(self.only_fields, x) for x in rows]
+        documents = [json.loads(x[0], object_hook=decode_value) for x in rows]
+        documents = [
+            x for x in documents if all(
+                matches_filter(x, field, operator, value)
+                for field, operator, value in python_filters)
+        ]
+        if self.ordering and not sql_ordering:
+            for field, descending in reversed(self.ordering):
+                documents.sort(key=lambda x:
+                               (x.get(field) is not None, x.get(field)),
+                               reverse=descending)
+        if self.limit_num is not None:
+            documents = documents[:self.limit_num]
+        if self.only_fields is not None:
+            documents = [
+                project_document(x, self.only_fields) for x in documents
+            ]
+        return documents
+
+    def results(self):
+        if self.cache is None:
+            documents = self.fetch_documents()
+            if self.raw:
+                self.cache = documents
+            else:
+                self.cache = [
+                    self.document_class.from_document(x) for x in documents
+                ]
+        return self.cache
+
+    def __iter__(self):
+        return iter(self.results())
+
+    def __len__(self):
+        return len(self.results())
+
+    def __getitem__(self, index):
+        return self.results()[index]
+
+    def count(self):
+        return len(self)
+
+    def first(self):
+        results = self.limit(1).results()
+        return results[0] if len(results) > 0 else None
+
+    def get(self):
+        results = self.limit(2).results()
+        if len(results) == 0:
+            raise self.document_class.DoesNotExist("No matching job found")
+        if len(results) > 1:
+            raise self.document_class.MultipleObjectsReturned(
+                "Multiple matching jobs found")
+        return results[0]
+
+    def distinct(self, field):
+        values = []
+        for document in self.as_pymongo():
+            value = document.get(field, None)
+            if value not in values:
+                values.append(value)
+        return values
+
+    def delete(self):
+        job_uids = [x["job_uid"] for x in self.as_pymongo()]
+        if len(job_uids) == 0:
+            return 0
+        get_sqlite_connection().execute(
+            f"DELETE FROM {SQLITE_TABLE} WHERE job_uid IN " +
+            f"({', '.join('?' * len(job_uids))})", job_uids)
+        return len(job_uids)
+
+    def insert(self, documents, load_bulk=True):
+        connection = get_sqlite_connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for document in documents:
+                document.write(connection, insert=True)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        return documents
+
+
+class SQLiteQuerySetManager():
+
+    def __get__(self, instance, owner):
+        return SQLiteQuerySet(owner)
+
+
+class SQLiteMonkeyJob(MonkeyJobBase):
+    """ MonkeyJob stored in an embedded sqlite database
+
+    Mirrors the fields and defaults of MongoMonkeyJob.  Like a mongoengine
+    DynamicDocument any extra attribute set on a job is persisted.
+    """
+
+    class DoesNotExist(Exception):
+        pass
+
+    class MultipleObjectsReturned(Exception):
+        pass
+
+    defaults = {
+        "job_uid": None,
+        "job_random_suffix": None,
+        "job_yml": dict,
+        "state": None,
+        "provider_type": None,
+        "provider_name": None,
+        "provider_vars": dict,
+        "current_ip_address": None,
+        "creation_date": datetime.now,
+        "last_state_change": datetime.now,
+        "run_dispatch_date": None,
+        "run_dispatch_machine_start_date": None,
+        "run_dispatch_installs_start_date": None,
+        "run_dispatch_setup_start_date": None,
+        "run_running_start_date": None,
+        "run_cleanup_start_date": None,
+        "completion_date": None,
+        "run_timeout_time": -1,
+        "run_elapsed_time": 0,
+        "total_wall_time": 0,
+        "experiment_hyperparameters": dict,
+        "sweep_id": None,
+        "sweep_parameters": dict,
+        "sweep_metrics": dict,
+        "early_stopped": False,
+        "run_succeeded": False,
+        "result_key": None,
+        "cached_from": None,
+        "version": 0,
+        "last_modified": None,
+    }
+
+    objects = SQLiteQuerySetManager()
+
+    def __init__(self, **kwargs):
+        object.__setattr__(self, "_data", dict())
+        object.__setattr__(self, "_changed_fields", set())
+        object.__setattr__(self, "_created", True)
+        for key, default in self.defaults.items():
+            self._data[key] = default() if callable(default) else default
+        self._data.update(kwargs)
+
+    @classmethod
+    def from_document(cls, document):
+        job = cls(**document)
+        object.__setattr__(job, "_created", False)
+        return job
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__["_data"][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+            return
+        self._data[name] = value
+        self._changed_fields.add(name)
+
+    def to_raw(self):
+        return copy.deepcopy(self._data)
+
+    def get_dict(self):
+        return mongo_to_dict(self._data)
+
+    def write(self, connection, insert):
+        document = json.dumps(self._data, default=encode_value)
+        values = [column_value(self._data.get(x)) for x in SQLITE_COLUMNS]
+        if insert:
+            connection.execute(
+                f"INSERT INTO {SQLITE_TABLE} " +
+                f"({', '.join(SQLITE_COLUMNS)}, document) " +
+                f"VALUES ({', '.join('?' * (len(SQLITE_COLUMNS) + 1))})",
+                values + [document])
+        else:
+            assignments = ", ".join(f"{x} = ?" for x in SQLITE_COLUMNS)
+            connection.execute(
+                f"UPDATE {SQLITE_TABLE} SET {assignments}, document = ? " +
+                "WHERE job_uid = ?", values + [document, self.job_uid])
+
+    def save(self):
+        """ Inserts a new job, or writes back the changed fields
+
+        Only fields changed on this object are merged into the stored
+        document, matching mongoengine's partial updates so concurrent
+        threads touching different fields do not overwrite each other.  A
+        job whose changed fields match the stored ones keeps its version.
+        """
+        connection = get_sqlite_connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = None
+            if not self._created:
+                row = connection.execute(
+                    f"SELECT document FROM {SQLITE_TABLE} WHERE job_uid = ?",
+                    (self.job_uid,)).fetchone()
+            changed = True
+            if row is not None:
+                stored = json.loads(row[0], object_hook=decode_value)
+                changed = [
+                    x for x in self._changed_fields
+                    if stored.get(x, None) != self._data[x]
+                ]
+                for key in changed:
+                    stored[key] = self._data[key]
+                self._data.update(stored)
+            if changed:
+                self.version = increment_counter_in_transaction(
+                    connection, monkey_state.MONKEY_JOB_VERSION_COUNTER)
+                self.last_modified = datetime.utcnow()
+                self.write(connection, insert=row is None)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        object.__setattr__(self, "_created", False)
+        self._changed_fields.clear()
+        return self
+
+    def reload(self):
+        row = get_sqlite_connection().execute(
+            f"SELECT document FROM {SQLITE_TABLE} WHERE job_uid = ?",
+            (self.job_uid,)).fetchone()
+        if row is None:
+            raise self.DoesNotExist("Job no longer exists")
+        self._data.update(json.loads(row[0], object_hook=decode_value))
+        self._changed_fields.clear()
+        return self
+
+    def delete(self):
+        get_sqlite_connection().execute(
+            f"DELETE FROM {SQLITE_TABLE} WHERE job_uid = ?", (self.job_uid,))
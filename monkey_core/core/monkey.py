@@ -6,8 +6,12 @@ import yaml
 from termcolor import colored
 
 import core.mongo.mongo_global as mongo_state
+from core.cache.monkey_result_cache import find_cached_job, get_job_result_key
+from core.events.monkey_events import get_event_bus
 from core.mongo.mongo_utils import get_monkey_db
+from core.mongo.monkey_counter import increment_counter
 from core.mongo.monkey_job import MonkeyJob
+from core.mongo.monkey_job_sqlite import get_sqlite_db
 from core.provider.monkey_provider import MonkeyProvider
 
 logging.basicConfig()
@@ -16,7 +20,13 @@ logger = logging.getLogger(__name__)
 logging.getLogger("googleapiclient.discovery").setLevel(logging.WARNING)
 logging.getLogger("google_auth_httplib2").setLevel(logging.WARNING)
 
-if get_monkey_db():
+if mongo_state.MONKEY_JOB_STORE == mongo_state.MONKEY_JOB_STORE_SQLITE:
+    if get_sqlite_db():
+        logger.info(
+            f"Opened sqlite job store: {mongo_state.MONKEY_SQLITE_PATH}")
+    else:
+        logger.info("Failed to open sqlite job store")
+elif get_monkey_db():
     logger.info("Connected to monkeydb")
 else:
     logger.info("Failed to connect to monkeydb")
@@ -27,22 +37,32 @@ class Monkey():
     lock = threading.Lock()
     providers = []
 
+    from core.cache.monkey_result_cache import submit_cached_job
     from core.info.monkey_list import (get_job_config, get_job_info,
-                                       get_job_uid, get_list_instances,
-                                       get_list_jobs, get_list_local_instances,
-                                       get_list_providers)
+                                       get_job_uid, get_job_version,
+                                       get_list_instances, get_list_jobs,
+                                       get_list_local_instances,
+                                       get_list_providers, get_sweep_info,
+                                       iter_list_jobs)
+    from core.info.monkey_stats import get_job_stats
+    from core.loop.monkey_archive import archive_finished_jobs, archive_loop
     from core.loop.monkey_loop import (check_for_dead_jobs,
                                        check_for_job_hyperparameters,
                                        check_for_queued_jobs, daemon_loop,
                                        print_jobs_string)
+    from core.sweep.monkey_sweep_controller import \
+        check_for_sweep_early_stopping
 
     def __init__(self, providers_path="providers.yml", start_loop=True):
         super().__init__()
         logger.info("Monkey Initializing")
         self.providers = []
         self.instantiate_providers(providers_path=providers_path)
+        # Without the loops jobs are left queued for the scheduler process
+        self.dispatches_jobs = start_loop
         if start_loop:
             threading.Thread(target=self.daemon_loop, daemon=True).start()
+            threading.Thread(target=self.archive_loop, daemon=True).start()
 
     def instantiate_providers(self, providers_path: str = "providers.yml"):
         providers = dict()
@@ -84,7 +104,7 @@ class Monkey():
 
         Args:
             job_yml (dict): The yml that defines the job
-            foreground (bool, optional): Run in foreground or let the daemond dispatch. Defaults to True.
+            foreground (bool, optional): Dispatch right away instead of waiting for the daemon loop. Defaults to True.
 
         Returns:
             (bool, str): (Success, Message)
@@ -99,6 +119,17 @@ class Monkey():
         if found_provider is None:
             return False, "No matching provider found"
 
+        result_key = get_job_result_key(job_yml)
+        if job_yml.get("cache_results", False):
+            cached_job = find_cached_job(result_key)
+            if cached_job is not None:
+                success, msg = self.submit_cached_job(job_yml=job_yml,
+                                                      provider=found_provider,
+                                                      cached_job=cached_job)
+                if success:
+                    return success, msg
+                logger.info(f"{job_yml['job_uid']}: {msg}, dispatching")
+
         job_random_suffix = job_yml["job_uid"].split("-")[-1]
         # Add job to monkeydb
         job = MonkeyJob(job_uid=job_yml["job_uid"],
@@ -107,15 +138,87 @@ class Monkey():
                         state=mongo_state.MONKEY_STATE_QUEUED,
                         provider_name=provider_name,
                         provider_type=found_provider.provider_type,
-                        provider_vars=found_provider.get_dict())
+                        provider_vars=found_provider.get_dict(),
+                        result_key=result_key)
         job.save()
+        get_event_bus().publish_state_change(job=job, previous_state=None)
 
-        if foreground:
+        if foreground and self.dispatches_jobs:
+            # Never block the submitter, clients attach to follow progress
             job.set_state(state=mongo_state.MONKEY_STATE_DISPATCHING)
-            return self.run_job(provider=found_provider, job_yml=job_yml)
+            threading.Thread(target=self.run_job,
+                             args=(found_provider, job_yml),
+                             daemon=True).start()
+            return True, "Dispatching"
+        elif foreground:
+            return True, "Queued for the scheduler"
         else:
             return True, "Running in background"
 
+    def submit_jobs(self, job_ymls: list) -> (bool, str):
+        """ Persists a batch of jobs for the daemon to dispatch
+
+        Every job is created with a single bulk insert
+
+        Args:
+            job_ymls (list): The ymls that define each job
+
+        Returns:
+            (bool, str): (Success, Message)
+        """
+        jobs = []
+        num_cached = 0
+        for job_yml in job_ymls:
+            provider_name = job_yml["provider"]
+            found_provider = None
+            for p in self.providers:
+                if p.name == provider_name:
+                    found_provider = p
+            if found_provider is None:
+                return False, f"No matching provider found: {provider_name}"
+
+            result_key = get_job_result_key(job_yml)
+            if job_yml.get("cache_results", False):
+                cached_job = find_cached_job(result_key)
+                if cached_job is not None:
+                    success, msg = self.submit_cached_job(
+                        job_yml=job_yml,
+                        provider=found_provider,
+                        cached_job=cached_job)
+                    if success:
+                        num_cached += 1
+                        continue
+                    logger.info(f"{job_yml['job_uid']}: {msg}, dispatching")
+
+            jobs.append(
+                MonkeyJob(job_uid=job_yml["job_uid"],
+                          job_random_suffix=job_yml["job_uid"].split("-")[-1],
+                          job_yml=job_yml,
+                          state=mongo_state.MONKEY_STATE_QUEUED,
+                          provider_name=provider_name,
+                          provider_type=found_provider.provider_type,
+                          provider_vars=found_provider.get_dict(),
+                          sweep_id=job_yml.get("sweep_id", None),
+                          sweep_parameters=job_yml.get("sweep_parameters",
+                                                       dict()),
+                          result_key=result_key))
+
+        logger.info(f"Monkey batch of {len(jobs)} jobs submitted")
+        if len(jobs) > 0:
+            # Bulk inserts skip save(), reserve a version for every job
+            last_version = increment_counter(
+                mongo_state.MONKEY_JOB_VERSION_COUNTER, len(jobs))
+            for i, job in enumerate(jobs):
+                job.version = last_version - len(jobs) + i + 1
+                job.last_modified = datetime.utcnow()
+            MonkeyJob.objects.insert(jobs, load_bulk=False)
+        for job in jobs:
+            get_event_bus().publish_state_change(job=job, previous_state=None)
+        if num_cached > 0:
+            return True, f"Queued {len(jobs)} jobs, " + \
+                f"reused results for {num_cached} jobs"
+        return True, f"Queued {len(jobs)} jobs"
+
     def run_job(self, provider: MonkeyProvider, job_yml):
         """ Runs a job in the monkey core system
 
@@ -190,10 +293,18 @@ class Monkey():
             provider_info=provider.get_dict(),
         )
         print("Returning from run job")
+        # Early stopping and the run timeout move a running job to cleanup
+        # and kill it, the loop finishes those jobs instead of this thread
+        dbMonkeyJob.reload()
+        if dbMonkeyJob.state != mongo_state.MONKEY_STATE_RUNNING:
+            logger.info(f"{job_uid}: Left running while the job ran, " +
+                        f"now {dbMonkeyJob.state}")
+            return success, msg
         if success is False:
             print("Failed to run job:", msg)
             dbMonkeyJob.set_state(state=mongo_state.MONKEY_STATE_QUEUED)
             return success, msg
+        dbMonkeyJob.run_succeeded = True
         dbMonkeyJob.total_wall_time = (
             datetime.now() - dbMonkeyJob.creation_date).total_seconds()
         dbMonkeyJob.set_state(state=mongo_state.MONKEY_STATE_CLEANUP)
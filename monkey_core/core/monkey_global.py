@@ -1,5 +1,6 @@
 import os
 
+from core.events.monkey_event_relay import MonkeyEventRelay
 from core.monkey import Monkey
 
 QUIET = False
@@ -9,6 +10,19 @@ LOG_FILE = "monkey.log"
 STATUS_LOG_FILE = "monkey.status"
 ANSIBLE_LOG_FILE = "monkey_ansible.log"
 DAEMON_THREAD_TIME = 10
+ARCHIVE_THREAD_TIME = 60 * 60
+ARCHIVE_JOBS_AFTER_DAYS = 30
+# Codebase files and dataset chunks are stored once per content hash under
+# monkeyfs/blobs, codebases and datasets are manifests listing their blobs
+MANIFEST_EXTENSION = ".manifest.json"
+
+# all: api and scheduler in one process, for development and small setups
+# api: serves http only, jobs are dispatched by a separate scheduler process
+# scheduler: runs the daemon loops and dispatches jobs without serving http
+MONKEY_ROLE_ALL = "all"
+MONKEY_ROLE_API = "api"
+MONKEY_ROLE_SCHEDULER = "scheduler"
+MONKEY_ROLE = os.environ.get("MONKEY_ROLE", MONKEY_ROLE_ALL)
 
 file_path = os.path.dirname(os.path.abspath(__file__))
 relative_monkeyfs_path = os.path.join(file_path, "../", "ansible/monkeyfs")
@@ -21,5 +35,7 @@ monkey = None
 def get_monkey():
     global monkey
     if monkey is None:
-        monkey = Monkey()
+        monkey = Monkey(start_loop=MONKEY_ROLE != MONKEY_ROLE_API)
+        if MONKEY_ROLE == MONKEY_ROLE_API:
+            MonkeyEventRelay().start()
     return monkey
@@ -1,18 +1,27 @@
 import copy
+import hashlib
+import json
 import logging
 import os
 import random
+import shutil
 import string
 import tarfile
 import tempfile
-import threading
 from datetime import datetime
 
 import yaml
 from core import monkey_global
-from core.routes.utils import (existing_dir, get_dataset_file_path,
-                               get_dataset_path,
-                               get_local_filesystem_for_provider,
+from core.mongo.monkey_counter import increment_counter
+from core.sweep.monkey_sweep import MonkeySweepException, expand_sweep
+from core.routes.upload_sessions import (
+    UPLOAD_SESSION_TARGET_BLOBS, UPLOAD_SESSION_TARGET_PERSIST,
+    UploadSessionReader, assemble_upload_session, complete_upload_session,
+    get_received_chunks, get_upload_session_dir, load_upload_session,
+    remove_upload_session, start_upload_session, write_upload_chunk)
+from core.routes.utils import (existing_dir, get_blob_path,
+                               get_dataset_file_path, get_dataset_path,
+                               get_local_filesystem_for_provider, is_blob_hash,
                                sync_directories)
 from flask import Blueprint, jsonify, request
 from ruamel.yaml import YAML, round_trip_load
@@ -23,32 +32,57 @@ dispatch_routes = Blueprint("dispatch_routes", __name__)
 logger = logging.getLogger(__name__)
 
 date_format = "monkey-%y-%m-%d-"
-instance_number = 0
-last_date = datetime.now().strftime(date_format)
-
-lock = threading.Lock()
+sweep_date_format = "sweep-%y-%m-%d-"
 
 UNIQUE_UIDS = True
+MAX_RESERVED_UIDS = 10000
+BLOB_COPY_BLOCK_SIZE = 1024 * 1024
+# Job yml keys a batch submission may set per job
+BATCH_OVERRIDE_KEYS = ["cmd", "run", "hyperparameters"]
+
+
+def reserve_job_uids(num_uids):
+    """ Reserves num_uids job uids from the persistent per day counter
+
+    The counter lives in the job store, so uids stay unique across restarts
+    and concurrent callers without relying on the random suffix.
+    """
+    date_prefix = datetime.now().strftime(date_format)
+    last_number = increment_counter(name=date_prefix, count=num_uids)
+    job_uids = []
+    for instance_number in range(last_number - num_uids + 1, last_number + 1):
+        job_uid = date_prefix + str(instance_number)
+        if UNIQUE_UIDS == True:
+            job_uid += "-" + ''.join(
+                random.choice(string.ascii_lowercase) for _ in range(3))
+        job_uids.append(job_uid)
+    return job_uids
 
 
 @dispatch_routes.route('/get/new_job_uid')
 def get_new_job_uid():
-    with lock:
-        global date_format, instance_number, last_date
-        new_date = datetime.now().strftime(date_format)
-        if new_date != last_date:
-
-            last_date = new_date
-            instance_number = 1
-        else:
-            logger.info(
-                f"Would be instance {last_date + str(instance_number + 1)}")
-            pass
-            instance_number += 1
-        if UNIQUE_UIDS == True:
-            return last_date + str(instance_number) + "-" + ''.join(
-                random.choice(string.ascii_lowercase) for _ in range(3))
-    return last_date + str(instance_number)
+    return reserve_job_uids(1)[0]
+
+
+@dispatch_routes.route('/get/new_job_uids')
+def get_new_job_uids():
+    try:
+        num_uids = int(request.args.get("num", 1))
+    except ValueError:
+        num_uids = 0
+    if num_uids < 1 or num_uids > MAX_RESERVED_UIDS:
+        return jsonify({
+            "msg": f"num must be between 1 and {MAX_RESERVED_UIDS}",
+            "success": False
+        })
+    job_uids = reserve_job_uids(num_uids)
+    logger.info(f"Reserved {num_uids} job uids: {job_uids[0]} to " +
+                f"{job_uids[-1]}")
+    return jsonify({
+        "msg": f"Reserved {num_uids} job uids",
+        "success": True,
+        "job_uids": job_uids
+    })
 
 
 def check_checksum_path(local_path, provider_path, directory, name, checksum):
@@ -143,6 +177,11 @@ def upload_dataset():
     FileStorage(request.stream).save(local_dataset_file_path)
     logger.info("Saved file to: {}".format(
         os.path.join(local_path, "data" + dataset_extension)))
+    if dataset_extension == monkey_global.MANIFEST_EXTENSION:
+        success, msg = check_uploaded_manifest(local_dataset_file_path,
+                                               monkeyfs_path)
+        if not success:
+            return jsonify({"msg": msg, "success": False})
     with open(doc_yaml_path, "w") as doc_yaml_file:
         yaml.dump(dataset_yaml, doc_yaml_file)
     sync_directories(local_path, provider_path)
@@ -170,6 +209,251 @@ def check_codebase():
                                checksum=codebase_checksum)
 
 
+def copy_blob(source, destination):
+    """ Copies a blob, readers never see a partially written blob """
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    with open(source, "rb") as source_file, tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(destination), delete=False) as tmp:
+        shutil.copyfileobj(source_file, tmp, BLOB_COPY_BLOCK_SIZE)
+    os.replace(tmp.name, destination)
+
+
+def find_missing_blobs(blob_hashes, monkeyfs_path):
+    """ Blobs missing from the provider's monkeyfs
+
+    Blobs only found in the local monkeyfs are copied to the provider
+    instead of being uploaded again.
+    """
+    missing = []
+    for blob_hash in dict.fromkeys(blob_hashes):
+        provider_blob_path = get_blob_path(blob_hash, monkeyfs_path)
+        if os.path.isfile(provider_blob_path):
+            continue
+        local_blob_path = get_blob_path(blob_hash,
+                                        monkey_global.MONKEYFS_LOCAL_PATH)
+        if os.path.isfile(local_blob_path):
+            copy_blob(local_blob_path, provider_blob_path)
+            continue
+        missing.append(blob_hash)
+    return missing
+
+
+def check_uploaded_manifest(manifest_path, monkeyfs_path):
+    """ Checks every blob of an uploaded codebase or dataset manifest is
+    stored, instances can not build the tree otherwise
+
+    The uploaded manifest is removed when it is rejected.
+
+    Returns:
+        (bool, str): (Success, Message)
+    """
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        blob_hashes = []
+        for item in manifest["files"]:
+            if "hash" in item:
+                blob_hashes.append(item["hash"])
+            blob_hashes += [x["hash"] for x in item.get("chunks", [])]
+    except (ValueError, KeyError, TypeError):
+        os.remove(manifest_path)
+        return False, "Invalid manifest"
+    missing = find_missing_blobs(blob_hashes, monkeyfs_path)
+    if len(missing) > 0:
+        os.remove(manifest_path)
+        return False, f"Missing {len(missing)} blobs"
+    return True, "All blobs are stored"
+
+
+@dispatch_routes.route('/check/blobs', methods=["POST"])
+def check_blobs():
+    provider = request.args.get('provider', None)
+    blob_hashes = (request.get_json(silent=True) or dict()).get("hashes", [])
+    if provider is None:
+        return jsonify({"msg": "Did not provide provider", "success": False})
+    if not all(is_blob_hash(x) for x in blob_hashes):
+        return jsonify({"msg": "Invalid blob hash", "success": False})
+    monkeyfs_path = get_local_filesystem_for_provider(provider)
+    missing = find_missing_blobs(blob_hashes, monkeyfs_path)
+    logger.info(f"Missing {len(missing)} of {len(blob_hashes)} blobs")
+    return jsonify({
+        "msg": f"Missing {len(missing)} of {len(blob_hashes)} blobs",
+        "success": True,
+        "missing": missing
+    })
+
+
+@dispatch_routes.route('/upload/blobs', methods=["POST"])
+def upload_blobs():
+    provider = request.args.get('provider', None)
+    if provider is None:
+        return jsonify({"msg": "Did not provide provider", "success": False})
+    success, msg = store_blobs_tar(request.stream, provider)
+    return jsonify({"msg": msg, "success": success})
+
+
+def store_blobs_tar(blobs_fileobj, provider):
+    """ Stores the files of a tar whose members are named by their sha256
+
+    Every blob is verified against its name before it is stored.
+
+    Returns:
+        (bool, str): Success and message
+    """
+    monkeyfs_path = get_local_filesystem_for_provider(provider)
+    if monkeyfs_path is None:
+        return False, f"Unknown provider: {provider}"
+    stored_num = 0
+    try:
+        with tarfile.open(fileobj=blobs_fileobj, mode="r|*") as blobs_tar:
+            for member in blobs_tar:
+                if not member.isfile() or not is_blob_hash(member.name):
+                    return False, f"Invalid blob: {member.name}"
+                local_blob_path = get_blob_path(
+                    member.name, monkey_global.MONKEYFS_LOCAL_PATH)
+                os.makedirs(os.path.dirname(local_blob_path), exist_ok=True)
+                blob_file = blobs_tar.extractfile(member)
+                hash_blob = hashlib.sha256()
+                with tempfile.NamedTemporaryFile(
+                        dir=os.path.dirname(local_blob_path),
+                        delete=False) as tmp:
+                    for block in iter(
+                            lambda: blob_file.read(BLOB_COPY_BLOCK_SIZE), b""):
+                        hash_blob.update(block)
+                        tmp.write(block)
+                if hash_blob.hexdigest() != member.name:
+                    os.remove(tmp.name)
+                    return False, f"Blob content does not match: {member.name}"
+                os.replace(tmp.name, local_blob_path)
+                copy_blob(local_blob_path,
+                          get_blob_path(member.name, monkeyfs_path))
+                stored_num += 1
+    except tarfile.TarError as e:
+        return False, f"Invalid blob tar after {stored_num} blobs: {e}"
+    logger.info(f"Stored {stored_num} blobs")
+    return True, f"Stored {stored_num} blobs"
+
+
+@dispatch_routes.route('/upload/session/start', methods=["POST"])
+def upload_session_start():
+    """ Starts or resumes a chunked upload of a blobs or persist tar
+
+    Expects json with the target and its params, the size and sha256
+    checksum of the whole file or an upload_key for a streamed file, and
+    optionally a chunk_size.
+    """
+    upload_args = request.get_json(silent=True) or dict()
+    params = upload_args.get("params", dict())
+    target = upload_args.get("target", None)
+    if not isinstance(params, dict) or params.get("provider", None) is None:
+        return jsonify({"msg": "Did not provide provider", "success": False})
+    if target == UPLOAD_SESSION_TARGET_PERSIST and \
+            params.get("job_uid", None) is None:
+        return jsonify({"msg": "Did not provide job_uid", "success": False})
+    success, msg, session = start_upload_session(
+        target=target,
+        params=params,
+        size=upload_args.get("size", None),
+        checksum=upload_args.get("checksum", None),
+        upload_key=upload_args.get("upload_key", None),
+        chunk_size=upload_args.get("chunk_size", None))
+    if not success:
+        return jsonify({"msg": msg, "success": False})
+    return jsonify({
+        "msg": msg,
+        "success": True,
+        "session_id": session["session_id"],
+        "chunk_size": session["chunk_size"],
+        "num_chunks": session["num_chunks"],
+        "received": get_received_chunks(session),
+    })
+
+
+@dispatch_routes.route('/upload/session/chunk', methods=["PUT"])
+def upload_session_chunk():
+    session = load_upload_session(request.args.get('session_id', None))
+    if session is None:
+        return jsonify({"msg": "Unknown upload session", "success": False})
+    success, msg = write_upload_chunk(
+        session,
+        index=request.args.get('index', None),
+        checksum=request.args.get('checksum', None),
+        stream=request.stream,
+        encoding=request.headers.get('Content-Encoding', None))
+    return jsonify({"msg": msg, "success": success})
+
+
+@dispatch_routes.route('/upload/session/status')
+def upload_session_status():
+    session = load_upload_session(request.args.get('session_id', None))
+    if session is None:
+        return jsonify({"msg": "Unknown upload session", "success": False})
+    return jsonify({
+        "msg": "Found upload session",
+        "success": True,
+        "num_chunks": session["num_chunks"],
+        "received": get_received_chunks(session),
+    })
+
+
+@dispatch_routes.route('/upload/session/finish', methods=["POST"])
+def upload_session_finish():
+    """ Verifies a complete upload and stores it like a single POST would
+
+    Blob tars are read straight from the chunks since every blob is
+    verified against its name, other uploads are assembled and verified
+    before they are used.  A session whose chunks do not add up to its
+    checksum is removed, the client has to upload it again from the start.
+    Streamed sessions give their size and checksum here.
+    """
+    session_id = request.args.get('session_id', None)
+    session = load_upload_session(session_id)
+    if session is None:
+        return jsonify({"msg": "Unknown upload session", "success": False})
+    if request.args.get('checksum', None) is not None:
+        success, msg = complete_upload_session(
+            session,
+            size=request.args.get('size', None),
+            checksum=request.args.get('checksum', None))
+        if not success:
+            # The chunks came from a different stream than the one finishing
+            remove_upload_session(session_id)
+            return jsonify({"msg": msg, "success": False})
+    elif session["size"] is None:
+        return jsonify({
+            "msg": "Did not provide the size and checksum",
+            "success": False
+        })
+    received_num = len(get_received_chunks(session))
+    if received_num != session["num_chunks"]:
+        return jsonify({
+            "msg": f"Missing {session['num_chunks'] - received_num} chunks",
+            "success": False
+        })
+    params = session["params"]
+    if session["target"] == UPLOAD_SESSION_TARGET_BLOBS:
+        reader = UploadSessionReader(session)
+        try:
+            success, msg = store_blobs_tar(reader, params["provider"])
+            verified = reader.verify()
+        finally:
+            reader.close()
+        if not verified:
+            success, msg = False, "Uploaded file does not match its checksum"
+    else:
+        with tempfile.NamedTemporaryFile(
+                dir=get_upload_session_dir(session_id)) as assembled:
+            success, msg = assemble_upload_session(session, assembled.name)
+            verified = success
+            if success:
+                success, msg = extract_persist_tar(assembled.name,
+                                                   params["job_uid"],
+                                                   params["provider"])
+    if success or not verified:
+        remove_upload_session(session_id)
+    return jsonify({"msg": msg, "success": success})
+
+
 @dispatch_routes.route('/upload/codebase', methods=["POST"])
 def upload_codebase():
     job_uid = request.args.get('job_uid', None)
@@ -264,6 +548,11 @@ def upload_codebase():
         FileStorage(request.stream).save(destination_path)
 
         logger.info(f"Saved file to: {destination_path}")
+        if codebase_extension == monkey_global.MANIFEST_EXTENSION:
+            success, msg = check_uploaded_manifest(destination_path,
+                                                   monkeyfs_path)
+            if not success:
+                return jsonify({"msg": msg, "success": False})
         with open(os.path.join(local_codebase_folder_path, "code.yaml"),
                   "w") as f:
             y = YAML()
@@ -292,23 +581,39 @@ def upload_persist():
             "msg": "Did not provide job_uid or provider",
             "success": False
         })
+    with tempfile.NamedTemporaryFile(suffix=".tmp") as temp_file:
+        FileStorage(request.stream).save(temp_file.name)
+        success, msg = extract_persist_tar(temp_file.name, job_uid, provider)
+    return jsonify({"msg": msg, "success": success})
+
+
+def extract_persist_tar(persist_tar_path, job_uid, provider):
     monkeyfs_path = get_local_filesystem_for_provider(provider)
+    if monkeyfs_path is None:
+        return False, f"Unknown provider: {provider}"
     create_folder_path = os.path.join(monkeyfs_path, "jobs", job_uid)
     os.makedirs(create_folder_path, exist_ok=True)
-
-    with tempfile.NamedTemporaryFile(suffix=".tmp") as temp_file:
-        FileStorage(request.stream).save(temp_file.name)
-        persist_tar = tarfile.open(temp_file.name, "r")
+    with tarfile.open(persist_tar_path, "r") as persist_tar:
         persist_tar.extractall(path=create_folder_path)
+    return True, "Successfully uploaded persisted folder"
 
-    return jsonify({"msg": "Successfully uploaded codebase", "success": True})
+
+def write_job_yaml(job_folder_path, job_args):
+    os.makedirs(job_folder_path, exist_ok=True)
+    with open(os.path.join(job_folder_path, "job.yaml"), "w") as f:
+        y = YAML()
+        y.explicit_start = True
+        y.default_flow_style = False
+        y.dump(job_args, f)
 
 
 @dispatch_routes.route('/submit/job')
 def submit_job():
-    job_args = copy.deepcopy(request.get_json())
-    logger.info("Received job to submit: {}".format(job_args["job_uid"]))
-    job_uid = job_args["job_uid"]
+    job_args = copy.deepcopy(request.get_json(silent=True) or dict())
+    job_uid = job_args.get("job_uid", None)
+    if job_uid is None:
+        return jsonify({"msg": "Did not provide job_uid", "success": False})
+    logger.info("Received job to submit: {}".format(job_uid))
 
     foreground = job_args["foreground"]
     logger.info(f"Foreground: {foreground}")
@@ -319,20 +624,130 @@ def submit_job():
                                    job_uid)
     provider_job_folder_path = os.path.join(monkeyfs_path, "jobs", job_uid)
 
-    with open(os.path.join(job_folder_path, "job.yaml"), "w") as f:
-        y = YAML()
-        y.explicit_start = True
-        y.default_flow_style = False
-        y.dump(job_args, f)
-
-    with open(os.path.join(provider_job_folder_path, "job.yaml"), "w") as f:
-        y = YAML()
-        y.explicit_start = True
-        y.default_flow_style = False
-        y.dump(job_args, f)
+    write_job_yaml(job_folder_path, job_args)
+    write_job_yaml(provider_job_folder_path, job_args)
 
     success, msg = monkey.submit_job(job_args, foreground=foreground)
-    res = {"msg": msg, "success": success}
+    res = {"msg": msg, "success": success, "job_uid": job_uid}
 
     logger.info("Finished submitting job")
     return jsonify(res)
+
+
+def move_batch_folder(job_folder_path, batch_folder_path):
+    """ Moves the files uploaded for a batch to the folder its jobs share
+
+    The batch folder always exists afterwards, even if nothing was uploaded.
+    """
+    if os.path.isdir(job_folder_path) and \
+            not os.path.exists(batch_folder_path):
+        os.makedirs(os.path.dirname(batch_folder_path), exist_ok=True)
+        shutil.move(job_folder_path, batch_folder_path)
+    os.makedirs(batch_folder_path, exist_ok=True)
+
+
+def create_job_batch(base_job, job_uids, overrides):
+    """ Creates one job per uid from a shared job yml and per job overrides
+
+    The code.yaml and persisted folders were uploaded under the first job uid.
+    They are moved once to a batch folder that every job references with
+    batch_uid, instances copy it into the job dir before the job's own folder.
+
+    Returns:
+        (bool, str): (Success, Message)
+    """
+    provider = base_job["provider"]
+    monkey = monkey_global.get_monkey()
+    monkeyfs_path = get_local_filesystem_for_provider(provider)
+    if monkeyfs_path is None:
+        return False, "No matching provider found"
+
+    batch_uid = job_uids[0]
+    for path in [monkey_global.MONKEYFS_LOCAL_PATH, monkeyfs_path]:
+        move_batch_folder(os.path.join(path, "jobs", batch_uid),
+                          os.path.join(path, "batches", batch_uid))
+
+    job_ymls = []
+    for job_uid, job_override in zip(job_uids, overrides):
+        job_args = copy.deepcopy(base_job)
+        job_args.update(job_override)
+        job_args["job_uid"] = job_uid
+        job_args["batch_uid"] = batch_uid
+        job_args["foreground"] = False
+
+        job_folder_path = os.path.join(monkey_global.MONKEYFS_LOCAL_PATH,
+                                       "jobs", job_uid)
+        provider_job_folder_path = os.path.join(monkeyfs_path, "jobs", job_uid)
+        write_job_yaml(job_folder_path, job_args)
+        write_job_yaml(provider_job_folder_path, job_args)
+        job_ymls.append(job_args)
+
+    return monkey.submit_jobs(job_ymls)
+
+
+@dispatch_routes.route('/submit/jobs', methods=["POST"])
+def submit_jobs():
+    """ Submits a batch of jobs sharing one uploaded code/data/persist set
+
+    Expects json with the shared `job` yml, the reserved `job_uids` and one
+    dict of `overrides` per job, limited to BATCH_OVERRIDE_KEYS.
+    """
+    batch_args = request.get_json(silent=True) or dict()
+    base_job = batch_args.get("job", None)
+    job_uids = batch_args.get("job_uids", [])
+    overrides = batch_args.get("overrides", [])
+    valid_batch = len(job_uids) > 0 and len(job_uids) == len(overrides)
+    if base_job is None or not valid_batch:
+        return jsonify({
+            "msg": "Did not provide job, job_uids or one override per job_uid",
+            "success": False
+        })
+    invalid_keys = set(key for job_override in overrides
+                       for key in job_override) - set(BATCH_OVERRIDE_KEYS)
+    if len(invalid_keys) > 0:
+        msg = f"Overrides may only set {', '.join(BATCH_OVERRIDE_KEYS)}, " + \
+            f"got: {', '.join(sorted(invalid_keys))}"
+        return jsonify({"msg": msg, "success": False})
+    logger.info(f"Received batch of {len(job_uids)} jobs to submit")
+
+    success, msg = create_job_batch(base_job=base_job,
+                                    job_uids=job_uids,
+                                    overrides=overrides)
+    logger.info("Finished submitting job batch")
+    return jsonify({"msg": msg, "success": success, "job_uids": job_uids})
+
+
+@dispatch_routes.route('/submit/sweep', methods=["POST"])
+def submit_sweep():
+    """ Expands the sweep declared in a job yml into linked child jobs
+
+    Expects the job yml with its `sweep` section, uploaded under `job_uid`
+    which becomes the first child
+    """
+    job_args = request.get_json(silent=True) or dict()
+    job_uid = job_args.get("job_uid", None)
+    if job_uid is None:
+        return jsonify({"msg": "Did not provide job_uid", "success": False})
+    try:
+        overrides = expand_sweep(job_args)
+    except MonkeySweepException as e:
+        return jsonify({"msg": f"Invalid sweep: {e}", "success": False})
+
+    date_prefix = datetime.now().strftime(sweep_date_format)
+    sweep_id = date_prefix + str(increment_counter(name=date_prefix))
+    for job_override in overrides:
+        job_override["sweep_id"] = sweep_id
+    job_uids = [job_uid]
+    if len(overrides) > 1:
+        job_uids += reserve_job_uids(len(overrides) - 1)
+    logger.info(f"Expanding sweep {sweep_id} into {len(job_uids)} jobs")
+
+    success, msg = create_job_batch(base_job=job_args,
+                                    job_uids=job_uids,
+                                    overrides=overrides)
+    return jsonify({
+        "msg": msg,
+        "success": success,
+        "sweep_id": sweep_id,
+        "job_uids": job_uids
+    })
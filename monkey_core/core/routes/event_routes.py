@@ -0,0 +1,156 @@
+import logging
+import os
+import time
+
+import ujson
+from core import monkey_global
+from core.events.monkey_events import get_event_bus
+from core.mongo import mongo_global as monkey_state
+from core.routes.utils import get_job_log_path
+from flask import Blueprint, Response, jsonify, request
+
+event_routes = Blueprint("event_routes", __name__)
+
+logger = logging.getLogger(__name__)
+
+EVENT_KEEPALIVE_TIME = 15
+ATTACH_POLL_TIME = 1
+
+
+def format_server_sent_event(event):
+    if "id" not in event:
+        return "event: {}\ndata: {}\n\n".format(event["type"],
+                                                ujson.dumps(event))
+    return "id: {}\nevent: {}\ndata: {}\n\n".format(event["id"], event["type"],
+                                                    ujson.dumps(event))
+
+
+@event_routes.route('/events')
+def get_events():
+    """ Streams job state changes as server-sent events
+
+    Optional query args `job_uid` and `project` filter the stream
+    """
+    job_uid = request.args.get("job_uid", None)
+    project = request.args.get("project", None)
+    event_bus = get_event_bus()
+    subscriber = event_bus.subscribe(job_uid=job_uid, project=project)
+    logger.info(f"Event subscriber added, job_uid: {job_uid}, " +
+                f"project: {project}")
+
+    def events():
+        try:
+            yield ": connected\n\n"
+            while True:
+                event = subscriber.get(timeout=EVENT_KEEPALIVE_TIME)
+                if event is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield format_server_sent_event(event)
+        finally:
+            event_bus.unsubscribe(subscriber)
+            logger.info("Event subscriber removed")
+
+    return Response(events(),
+                    mimetype="text/event-stream",
+                    headers={
+                        "Cache-Control": "no-cache",
+                        "X-Accel-Buffering": "no"
+                    })
+
+
+def read_new_log_lines(log_path, offset, partial):
+    """ Reads complete lines appended to log_path since offset
+
+    Returns:
+        (list, int, str): (New lines, New offset, Trailing partial line)
+    """
+    try:
+        if os.path.getsize(log_path) < offset:
+            # The log was replaced, start over
+            offset = 0
+            partial = ""
+        with open(log_path, "r", errors="replace") as f:
+            f.seek(offset)
+            data = f.read()
+            offset = f.tell()
+    except OSError:
+        return [], offset, partial
+    lines = (partial + data).split("\n")
+    return lines[:-1], offset, lines[-1]
+
+
+@event_routes.route('/attach/job')
+def attach_job():
+    """ Streams a job's state changes and new log lines until it finishes
+
+    The stream starts with the current state and the log so far and ends
+    with an `end` event once the job is finished.
+    """
+    job_uid = request.args.get("job_uid", None)
+    if job_uid is None:
+        return jsonify({"success": False, "msg": "No job_uid provided"})
+    monkey = monkey_global.get_monkey()
+    event_bus = get_event_bus()
+    # Subscribe first so no transition is lost between the two reads
+    subscriber = event_bus.subscribe(job_uid=job_uid)
+    job_info = monkey.get_job_info(job_uid)
+    if job_info is None:
+        event_bus.unsubscribe(subscriber)
+        return jsonify({"success": False, "msg": "No matching job found"})
+    log_path = get_job_log_path(job_uid, job_info["provider_name"])
+
+    def events():
+        try:
+            yield format_server_sent_event({
+                "type": "state",
+                "job_uid": job_uid,
+                "state": job_info["state"],
+                "previous_state": None,
+                "timestamp": time.time(),
+            })
+            offset, partial = 0, ""
+            finished = job_info["state"] == monkey_state.MONKEY_STATE_FINISHED
+            last_sent = time.time()
+            while True:
+                event = None
+                if not finished:
+                    event = subscriber.get(timeout=ATTACH_POLL_TIME)
+                lines, offset, partial = read_new_log_lines(
+                    log_path, offset, partial)
+                if lines:
+                    last_sent = time.time()
+                    yield format_server_sent_event({
+                        "type": "log",
+                        "job_uid": job_uid,
+                        "lines": lines
+                    })
+                if event is not None:
+                    last_sent = time.time()
+                    yield format_server_sent_event(event)
+                    finished = event.get(
+                        "state", None) == monkey_state.MONKEY_STATE_FINISHED
+                if finished:
+                    if partial:
+                        yield format_server_sent_event({
+                            "type": "log",
+                            "job_uid": job_uid,
+                            "lines": [partial]
+                        })
+                    yield format_server_sent_event({
+                        "type": "end",
+                        "job_uid": job_uid
+                    })
+                    return
+                if time.time() - last_sent > EVENT_KEEPALIVE_TIME:
+                    last_sent = time.time()
+                    yield ": keepalive\n\n"
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return Response(events(),
+                    mimetype="text/event-stream",
+                    headers={
+                        "Cache-Control": "no-cache",
+                        "X-Accel-Buffering": "no"
+                    })
@@ -1,19 +1,42 @@
 import logging
 import os
-import tarfile
-import tempfile
+import time
+from datetime import datetime
 
 import yaml
 from core import monkey_global
-from core.routes.utils import (get_local_filesystem_for_provider,
-                               sync_directories)
-from flask import Blueprint, jsonify, request, send_file
+from core.info.monkey_job_index import (JOB_UID_SUGGESTION_LIMIT,
+                                        get_job_index)
+from core.info.monkey_stats import STATS_DEFAULT_HOURS
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_counter import get_counter
+from core.routes.response_cache import (CACHE_TAG_INSTANCES, CACHE_TAG_JOBS,
+                                        get_job_cache_tag, get_response_cache)
+from core.routes.sync_manager import get_sync_manager
+from core.routes.utils import (STREAM_TAR_MODES, get_file_md5,
+                               get_job_log_path,
+                               get_local_filesystem_for_provider,
+                               json_response, not_modified_response,
+                               stream_json_list, stream_tar)
+from flask import Blueprint, Response, jsonify, request, send_file
 from ruamel.yaml import YAML, round_trip_load
 
 info_routes = Blueprint("info_routes", __name__)
 
 logger = logging.getLogger(__name__)
 
+# Seconds each route's result is cached, state changes invalidate earlier
+PROVIDERS_CACHE_TTL = 300
+INSTANCES_CACHE_TTL = 30
+JOB_INFO_CACHE_TTL = 60
+SWEEP_INFO_CACHE_TTL = 10
+STATS_CACHE_TTL = 10
+
+LOG_READ_BLOCK_SIZE = 64 * 1024
+LOG_MAX_READ_SIZE = 4 * 1024 * 1024
+LOG_FOLLOW_MAX_TIMEOUT = 30
+LOG_FOLLOW_POLL_TIME = 0.5
+
 
 @info_routes.route('/ping')
 def ping():
@@ -23,14 +46,21 @@ def ping():
 @info_routes.route('/list/providers')
 def get_list_providers():
     monkey = monkey_global.get_monkey()
-    providers_list = monkey.get_list_providers()
+    providers_list = get_response_cache().get_or_compute(
+        key=("list_providers",),
+        compute=monkey.get_list_providers,
+        ttl=PROVIDERS_CACHE_TTL)
     return jsonify({"response": providers_list})
 
 
 @info_routes.route('/list/local/instances')
 def get_list_local_instances():
     monkey = monkey_global.get_monkey()
-    instances_list = monkey.get_list_local_instances()
+    instances_list = get_response_cache().get_or_compute(
+        key=("list_local_instances",),
+        compute=monkey.get_list_local_instances,
+        ttl=INSTANCES_CACHE_TTL,
+        tags=(CACHE_TAG_INSTANCES,))
     return jsonify({"response": instances_list})
 
 
@@ -43,18 +73,32 @@ def get_list_instances():
         providers = [x["name"] for x in monkey.get_list_providers()]
     args["providers"] = providers
 
-    res = dict()
-    for provider_name in providers:
-        instances = monkey.get_list_instances(provider_name=provider_name)
-        res[provider_name] = [x.get_json() for x in instances]
+    def list_instances():
+        res = dict()
+        for provider_name in providers:
+            instances = monkey.get_list_instances(provider_name=provider_name)
+            res[provider_name] = [x.get_json() for x in instances]
+        return res
+
+    cache_key = ("list_instances", tuple(providers))
+    res = get_response_cache().get_or_compute(key=cache_key,
+                                              compute=list_instances,
+                                              ttl=INSTANCES_CACHE_TTL,
+                                              tags=(CACHE_TAG_INSTANCES,))
     return jsonify(res)
 
 
 @info_routes.route('/list/jobs')
 def get_list_jobs():
     monkey = monkey_global.get_monkey()
-    jobs_list = monkey.get_list_jobs(request.args)
-    return jsonify(jobs_list)
+    # Read before listing, a concurrent write leaves the etag behind
+    etag = f"jobs-{get_counter(monkey_state.MONKEY_JOB_VERSION_COUNTER)}"
+    not_modified = not_modified_response(etag)
+    if not_modified is not None:
+        return not_modified
+    response = stream_json_list(monkey.iter_list_jobs(request.args))
+    response.set_etag(etag)
+    return response
 
 
 @info_routes.route('/get/job_uid')
@@ -63,9 +107,18 @@ def get_job_uid():
     job_uid = request.args.get("job_uid", None)
     if job_uid is None:
         return jsonify({"success": False, "msg": "No job_uid provided"})
-    job_uid = monkey.get_job_uid(job_uid)
+    uid = job_uid
+    job_uid = monkey.get_job_uid(uid)
     if job_uid is None:
-        return jsonify({"success": False, "msg": "No job_uid provided"})
+        suggestions = get_job_index().suggest(uid)
+        msg = "No matching job found"
+        if len(suggestions) > 1:
+            msg = f"Several jobs match {uid}"
+        return jsonify({
+            "success": False,
+            "msg": msg,
+            "suggestions": suggestions
+        })
     else:
         return jsonify({
             "success": True,
@@ -74,18 +127,83 @@ def get_job_uid():
         })
 
 
+@info_routes.route('/list/job_uids')
+def list_job_uids():
+    """ Suggests the newest job uids whose uid or suffix starts with prefix
+    """
+    prefix = request.args.get("prefix", "")
+    try:
+        limit = min(int(request.args.get("limit", JOB_UID_SUGGESTION_LIMIT)),
+                    JOB_UID_SUGGESTION_LIMIT)
+    except ValueError:
+        return jsonify({"success": False, "msg": "Invalid limit"})
+    return jsonify({
+        "success": True,
+        "msg": "Found matching jobs",
+        "job_uids": get_job_index().suggest(prefix, limit=limit)
+    })
+
+
+def get_cached_job_info(job_uid, version):
+    """ Returns the job's info, cached until the job is saved again
+
+    Saves that do not change the state publish no event, so the cached
+    version is compared to the stored one.
+
+    Args:
+        job_uid (str): The job's uid
+        version (int): The job's stored version, None if it is not live
+    """
+    monkey = monkey_global.get_monkey()
+    cache = get_response_cache()
+
+    def cached_job_info():
+        return cache.get_or_compute(
+            key=("job_info", job_uid),
+            compute=lambda: monkey.get_job_info(job_uid),
+            ttl=JOB_INFO_CACHE_TTL,
+            tags=(get_job_cache_tag(job_uid),))
+
+    job_info = cached_job_info()
+    if job_info is not None and version is not None and \
+            job_info.get("version", 0) < version:
+        cache.invalidate(get_job_cache_tag(job_uid))
+        job_info = cached_job_info()
+    return job_info
+
+
 @info_routes.route('/get/job_info')
 def get_job_info():
-    monkey = monkey_global.get_monkey()
     job_uid = request.args.get("job_uid", None)
     if job_uid is None:
         return jsonify({"success": False, "msg": "No job_uid provided"})
     else:
-        return jsonify({
+        # Live jobs are revalidated from their version alone
+        version = monkey_global.get_monkey().get_job_version(job_uid)
+        if version is not None:
+            not_modified = not_modified_response(f"{job_uid}-{version}")
+            if not_modified is not None:
+                return not_modified
+        job_info = get_cached_job_info(job_uid, version)
+        etag = None
+        if version is not None:
+            etag = f"{job_uid}-{version}"
+        elif job_info is not None:
+            etag = f"{job_info['job_uid']}-{job_info.get('version', 0)}"
+            not_modified = not_modified_response(etag)
+            if not_modified is not None:
+                return not_modified
+        response = json_response({
             "success": True,
             "msg": "Found matching job",
-            "job_info": monkey.get_job_info(job_uid)
+            "job_info": job_info
         })
+        if etag is not None:
+            response.set_etag(etag)
+        if job_info is not None and job_info.get("last_modified", None):
+            response.last_modified = datetime.utcfromtimestamp(
+                job_info["last_modified"]["$date"] / 1000)
+        return response
 
 
 @info_routes.route('/get/job_config')
@@ -104,42 +222,424 @@ def get_job_config():
         })
 
 
-@info_routes.route('/get/job/output')
-def get_job_output():
+@info_routes.route('/get/sweep_info')
+def get_sweep_info():
+    monkey = monkey_global.get_monkey()
+    sweep_id = request.args.get("sweep_id", None)
+    if sweep_id is None:
+        return jsonify({"success": False, "msg": "No sweep_id provided"})
+    sweep_info = get_response_cache().get_or_compute(
+        key=("sweep_info", sweep_id),
+        compute=lambda: monkey.get_sweep_info(sweep_id),
+        ttl=SWEEP_INFO_CACHE_TTL,
+        tags=(CACHE_TAG_JOBS,))
+    if sweep_info is None:
+        return jsonify({"success": False, "msg": "No matching sweep found"})
+    return json_response({
+        "success": True,
+        "msg": "Found matching sweep",
+        "sweep_info": sweep_info
+    })
+
+
+@info_routes.route('/stats')
+def get_stats():
+    """ Job counts, hourly queue depth and throughput and run time
+    percentiles, aggregated by the job store
+
+    Query args:
+        hours: Length of the hourly window, defaults to STATS_DEFAULT_HOURS
+    """
+    monkey = monkey_global.get_monkey()
+    try:
+        hours = int(request.args.get("hours", STATS_DEFAULT_HOURS))
+    except ValueError:
+        return jsonify({"success": False, "msg": "Invalid hours"})
+    stats = get_response_cache().get_or_compute(
+        key=("stats", hours),
+        compute=lambda: monkey.get_job_stats(hours=hours),
+        ttl=STATS_CACHE_TTL,
+        tags=(CACHE_TAG_JOBS,))
+    return json_response({
+        "success": True,
+        "msg": "Computed job stats",
+        "stats": stats
+    })
+
+
+def get_log_size(log_path):
+    try:
+        return os.path.getsize(log_path)
+    except OSError:
+        return 0
+
+
+def find_tail_offset(log_path, num_lines):
+    """ Offset of the start of the last num_lines lines of log_path """
+    size = get_log_size(log_path)
+    if num_lines <= 0:
+        return size
+    with open(log_path, "rb") as f:
+        position = size
+        newlines = 0
+        # A trailing newline ends the last line, it does not start one
+        f.seek(max(size - 1, 0))
+        if size > 0 and f.read(1) == b"\n":
+            newlines = -1
+        while position > 0:
+            block_start = max(position - LOG_READ_BLOCK_SIZE, 0)
+            f.seek(block_start)
+            block = f.read(position - block_start)
+            for i in range(len(block) - 1, -1, -1):
+                if block[i:i + 1] == b"\n":
+                    newlines += 1
+                    if newlines == num_lines:
+                        return block_start + i + 1
+            position = block_start
+    return 0
+
+
+def read_log_range(log_path, offset, length, max_lines=None):
+    """ Reads up to length bytes from offset, stopping after max_lines """
+    try:
+        with open(log_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+    except OSError:
+        return b""
+    if max_lines is not None:
+        end = -1
+        for _ in range(max_lines):
+            end = data.find(b"\n", end + 1)
+            if end == -1:
+                break
+        if end != -1:
+            data = data[:end + 1]
+    return data
+
+
+@info_routes.route('/get/job/logs')
+def get_job_logs():
+    """ Returns a byte range of a job's run.log
+
+    Query args:
+        offset: First byte to read, negative values count from the end
+        length: Most bytes to return
+        tail_lines: Start at the last tail_lines lines, overrides offset
+        max_lines: Most lines to return
+        follow: Wait up to timeout seconds for bytes past the offset
+        timeout: Follow wait in seconds, at most LOG_FOLLOW_MAX_TIMEOUT
+
+    A `Range: bytes=start-end` header is honored as offset and length, a
+    range past the end of the log is answered with 416.  The X-Log-Offset
+    header holds the offset to request next and X-Job-State the state of
+    the job, so followers know when to stop.
+    """
     monkey = monkey_global.get_monkey()
     job_uid = request.args.get("job_uid", None)
+    if job_uid is None:
+        return jsonify({"success": False, "msg": "No job_uid provided"})
+    try:
+        offset = int(request.args.get("offset", 0))
+        length = min(int(request.args.get("length", LOG_MAX_READ_SIZE)),
+                     LOG_MAX_READ_SIZE)
+        tail_lines = request.args.get("tail_lines", None)
+        tail_lines = int(tail_lines) if tail_lines is not None else None
+        max_lines = request.args.get("max_lines", None)
+        max_lines = int(max_lines) if max_lines is not None else None
+        timeout = min(float(request.args.get("timeout", 20)),
+                      LOG_FOLLOW_MAX_TIMEOUT)
+    except ValueError:
+        return jsonify({"success": False, "msg": "Invalid log range"})
+    follow = request.args.get("follow", "false").lower() in ("1", "true")
+
+    job_info = monkey.get_job_info(job_uid)
+    if job_info is None:
+        return jsonify({"success": False, "msg": "No matching job found"})
+    log_path = get_job_log_path(job_uid, job_info["provider_name"])
+
+    byte_range = request.range
+    if byte_range is not None and byte_range.units == "bytes" and \
+            len(byte_range.ranges) == 1:
+        start, stop = byte_range.ranges[0]
+        offset = start
+        if stop is not None:
+            length = min(stop - start, LOG_MAX_READ_SIZE)
+    elif tail_lines is not None:
+        offset = find_tail_offset(log_path, tail_lines)
+
+    size = get_log_size(log_path)
+    if offset < 0:
+        offset = max(size + offset, 0)
+    if offset > size and byte_range is not None:
+        # The log was truncated or replaced, the client restarts from the
+        # size in Content-Range
+        return Response(status=416,
+                        headers={
+                            "Content-Range": f"bytes */{size}",
+                            "X-Log-Size": str(size),
+                            "X-Job-State": job_info["state"],
+                        })
+    if offset > size:
+        # The log was replaced since the client last read it
+        offset = 0
+
+    deadline = time.time() + timeout
+    while follow and size <= offset and time.time() < deadline:
+        time.sleep(LOG_FOLLOW_POLL_TIME)
+        size = get_log_size(log_path)
+
+    data = read_log_range(log_path, offset, length, max_lines=max_lines)
+    status = 200
+    headers = {
+        "X-Log-Offset": str(offset + len(data)),
+        "X-Log-Size": str(size),
+        "X-Job-State": job_info["state"],
+    }
+    if byte_range is not None:
+        status = 206
+        if len(data) > 0:
+            headers["Content-Range"] = \
+                f"bytes {offset}-{offset + len(data) - 1}/{size}"
+    return Response(data,
+                    status=status,
+                    mimetype="text/plain",
+                    headers=headers)
+
+
+def sync_job_output_folder(job_uid):
+    """ Syncs a job's folder from its provider's monkeyfs to the local one
+
+    Returns:
+        (str, list): (Local job folder path, Persisted items)
+    """
+    job_folder_path = os.path.join(monkey_global.MONKEYFS_LOCAL_PATH, "jobs",
+                                   job_uid)
+    job_yaml_file = os.path.join(job_folder_path, "job.yaml")
+    logger.info(job_yaml_file)
+    try:
+        with open(job_yaml_file, 'r') as job_file:
+            job_yaml = yaml.load(job_file, Loader=yaml.FullLoader)
+            logger.info(job_yaml)
+    except:
+        logger.info(f"Unable to parse job.yml, path: {job_yaml_file}")
+        raise ValueError("Could not read job file")
+    provider = job_yaml["provider"]
+    monkeyfs_path = get_local_filesystem_for_provider(provider)
+    provider_job_folder_path = os.path.join(monkeyfs_path, "jobs", job_uid)
+    logger.info(f"Syncing: {provider_job_folder_path} {job_folder_path}")
+    # The CLI asks for the manifest and then the files, the dashboard polls,
+    # so most requests reuse a sync that just ran
+    get_sync_manager().sync(provider_job_folder_path, job_folder_path)
+    return job_folder_path, job_yaml.get("persist", None) or []
+
+
+def is_persisted_path(path, persisted_items):
+    path = os.path.normpath(path)
+    if os.path.isabs(path) or path.startswith(".."):
+        return False
+    return any(path == x or path.startswith(os.path.join(x, ""))
+               for x in map(os.path.normpath, persisted_items))
+
+
+def list_persisted_files(job_folder_path, paths, persisted_items):
+    """ Yields (relative path, stat) of every file under paths
+
+    Raises:
+        ValueError: When a path is outside of the persisted folders
+    """
+    for f in paths:
+        if not is_persisted_path(f, persisted_items):
+            raise ValueError(f"Path is not in a persisted folder: {f}")
+    real_folder_path = os.path.join(os.path.realpath(job_folder_path), "")
+    for f in paths:
+        full_path = os.path.join(job_folder_path, os.path.normpath(f))
+        if os.path.isfile(full_path):
+            file_paths = [full_path]
+        else:
+            file_paths = [
+                os.path.join(root, x)
+                for root, _, names in os.walk(full_path)
+                for x in names
+            ]
+        for file_path in sorted(file_paths):
+            # Symlinks written by the job must not point outside of its folder
+            if os.path.islink(file_path) and not os.path.realpath(
+                    file_path).startswith(real_folder_path):
+                continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            yield os.path.relpath(file_path, job_folder_path), stat
+
+
+@info_routes.route('/get/job/output', methods=["GET", "POST"])
+def get_job_output():
+    """ Streams a tar of a job's persisted folders
+
+    A subset of paths can be given as repeated `path` args, or for long
+    lists as a json body {"paths": [...]} in a POST.
+    """
+    job_uid = request.args.get("job_uid", None)
     if job_uid is None:
         return jsonify({"success": False, "msg": "No job_uid provided"})
     else:
         logger.info(f"Getting output for {job_uid}")
-        job_folder_path = os.path.join(monkey_global.MONKEYFS_LOCAL_PATH,
-                                       "jobs", job_uid)
-        job_yaml_file = os.path.join(job_folder_path, "job.yaml")
-        logger.info(job_yaml_file)
-        try:
-            with open(job_yaml_file, 'r') as job_file:
-                job_yaml = yaml.load(job_file, Loader=yaml.FullLoader)
-                logger.info(job_yaml)
-        except:
-            logger.info(f"Unable to parse job.yml, path: {job_yaml_file}")
-            raise ValueError("Could not read job file")
-        provider = job_yaml["provider"]
-        monkeyfs_path = get_local_filesystem_for_provider(provider)
-        provider_job_folder_path = os.path.join(monkeyfs_path, "jobs", job_uid)
-        logger.info(f"Syncing: {provider_job_folder_path} {job_folder_path}")
-        sync_directories(os.path.join(provider_job_folder_path, ""),
-                         os.path.join(job_folder_path, ""))
-
-        persisted_items = job_yaml.get("persist", [])
+        job_folder_path, persisted_items = sync_job_output_folder(job_uid)
         logger.info(f"Retrieving persisted items: {persisted_items}")
-        with tempfile.NamedTemporaryFile(delete=False,
-                                         suffix=".tar") as dir_tmp:
-            code_tar = tarfile.open(dir_tmp.name, "w")
-            logger.info(persisted_items)
-            for f in persisted_items:
-                if os.path.exists(os.path.join(job_folder_path, f)):
-                    code_tar.add(os.path.join(job_folder_path, f) + "/", f)
-            code_tar.close()
-            tar_name = dir_tmp.name
-            logger.info(tar_name)
-        return send_file(tar_name)
+        # Optional subset of paths inside the persisted folders
+        paths = request.args.getlist("path")
+        if request.method == "POST":
+            paths += (request.get_json(silent=True) or dict()).get("paths", [])
+        compression = request.args.get("compression", None)
+        if compression not in STREAM_TAR_MODES:
+            return jsonify({
+                "success": False,
+                "msg": f"Unsupported compression: {compression}"
+            })
+        if len(paths) == 0:
+            paths = persisted_items
+        tar_items = []
+        for f in paths:
+            if not is_persisted_path(f, persisted_items):
+                return jsonify({
+                    "success": False,
+                    "msg": f"Path is not in a persisted folder: {f}"
+                })
+            f = os.path.normpath(f)
+            if os.path.exists(os.path.join(job_folder_path, f)):
+                tar_items.append((os.path.join(job_folder_path, f), f))
+        return stream_tar(tar_items, compression=compression)
+
+
+@info_routes.route('/get/job/output/manifest')
+def get_job_output_manifest():
+    """ Lists every file in a job's persisted folders with its size, mtime
+    and md5, so clients only download files that changed
+
+    Optional repeated `path` args restrict the listing.
+    """
+    job_uid = request.args.get("job_uid", None)
+    if job_uid is None:
+        return jsonify({"success": False, "msg": "No job_uid provided"})
+    job_folder_path, persisted_items = sync_job_output_folder(job_uid)
+    paths = request.args.getlist("path") or persisted_items
+    files = []
+    try:
+        for path, stat in list_persisted_files(job_folder_path, paths,
+                                               persisted_items):
+            try:
+                md5 = get_file_md5(os.path.join(job_folder_path, path))
+            except OSError:
+                continue
+            files.append({
+                "path": path,
+                "size": stat.st_size,
+                "mtime": stat.st_mtime,
+                "md5": md5,
+            })
+    except ValueError as e:
+        return jsonify({"success": False, "msg": str(e)})
+    return json_response({
+        "success": True,
+        "msg": f"Found {len(files)} output files",
+        "files": files
+    })
+
+
+def get_job_artifact_folder(job_uid):
+    """ Job folder in the provider's monkeyfs, where the job writes output
+
+    Artifacts are read in place so fetching one file does not sync the rest
+    of the output.
+
+    Returns:
+        (str, list): (Job folder path, Persisted items), (None, None) if the
+            job does not exist
+    """
+    job_info = get_cached_job_info(
+        job_uid,
+        monkey_global.get_monkey().get_job_version(job_uid))
+    if job_info is None:
+        return None, None
+    monkeyfs_path = get_local_filesystem_for_provider(
+        job_info["provider_name"]) or monkey_global.MONKEYFS_LOCAL_PATH
+    job_folder_path = os.path.join(monkeyfs_path, "jobs", job_uid)
+    persisted_items = job_info.get("job_yml", dict()).get("persist",
+                                                          None) or []
+    return job_folder_path, persisted_items
+
+
+@info_routes.route('/list/job/artifacts')
+def list_job_artifacts():
+    """ Lists the files in a job's persisted folders with their sizes
+
+    Optional repeated `path` args restrict the listing.
+    """
+    job_uid = request.args.get("job_uid", None)
+    if job_uid is None:
+        return jsonify({"success": False, "msg": "No job_uid provided"})
+    job_folder_path, persisted_items = get_job_artifact_folder(job_uid)
+    if job_folder_path is None:
+        return jsonify({"success": False, "msg": "No matching job found"})
+    paths = request.args.getlist("path") or persisted_items
+    try:
+        files = [{
+            "path": path,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+                 for path, stat in list_persisted_files(
+                     job_folder_path, paths, persisted_items)]
+    except ValueError as e:
+        return jsonify({"success": False, "msg": str(e)})
+    return json_response({
+        "success": True,
+        "msg": f"Found {len(files)} artifacts",
+        "files": files
+    })
+
+
+@info_routes.route('/get/job/artifact')
+def get_job_artifact():
+    """ Downloads a single file from a job's persisted folders
+
+    Range requests are answered with 206 partial content, so large files
+    can be resumed.  The file is passed to the server's file wrapper, which
+    uses sendfile where available.
+    """
+    job_uid = request.args.get("job_uid", None)
+    path = request.args.get("path", None)
+    if job_uid is None or path is None:
+        return jsonify({
+            "success": False,
+            "msg": "No job_uid or path provided"
+        })
+    job_folder_path, persisted_items = get_job_artifact_folder(job_uid)
+    if job_folder_path is None:
+        return jsonify({"success": False, "msg": "No matching job found"})
+    if not is_persisted_path(path, persisted_items):
+        return jsonify({
+            "success": False,
+            "msg": f"Path is not in a persisted folder: {path}"
+        })
+    file_path = os.path.join(job_folder_path, os.path.normpath(path))
+    real_folder_path = os.path.join(os.path.realpath(job_folder_path), "")
+    if not os.path.realpath(file_path).startswith(real_folder_path) or \
+            not os.path.isfile(file_path):
+        return jsonify({"success": False, "msg": f"No artifact found: {path}"})
+    return send_file(file_path,
+                     as_attachment=True,
+                     download_name=os.path.basename(file_path),
+                     conditional=True,
+                     max_age=0)
+
+
+@info_routes.route('/get/sync/metrics')
+def get_sync_metrics():
+    return jsonify({
+        "success": True,
+        "msg": "Retrieved sync metrics",
+        "metrics": get_sync_manager().get_metrics()
+    })
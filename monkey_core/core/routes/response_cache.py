@@ -0,0 +1,106 @@
+import logging
+import threading
+import time
+
+from core.events.monkey_events import get_event_bus
+
+logger = logging.getLogger(__name__)
+
+CACHE_TAG_JOBS = "jobs"
+CACHE_TAG_INSTANCES = "instances"
+
+
+def get_job_cache_tag(job_uid):
+    return f"job:{job_uid}"
+
+
+class MonkeyResponseCache():
+    """ TTL cache for route results with tag invalidation
+
+    Concurrent misses on the same key are coalesced, only the first caller
+    computes the value while the others wait for it.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+        # key -> (expiry, tags, value)
+        self.entries = dict()
+        # key -> threading.Event set when the in flight computation finishes
+        self.pending = dict()
+        # tag -> invalidation count, values computed across a bump are dropped
+        self.tag_generations = dict()
+
+    def get_or_compute(self, key, compute, ttl, tags=()):
+        """ Returns the cached value for key, computing it on a miss
+
+        Args:
+            key (hashable): Identifies the request, route name and arguments
+            compute (function): Produces the value, called without the lock
+            ttl (float): Seconds the value stays valid
+            tags (tuple, optional): Tags that invalidate the value
+
+        Returns:
+            The cached or freshly computed value
+        """
+        while True:
+            with self.lock:
+                entry = self.entries.get(key, None)
+                if entry is not None and entry[0] > time.monotonic():
+                    return entry[2]
+                pending = self.pending.get(key, None)
+                if pending is None:
+                    pending = threading.Event()
+                    self.pending[key] = pending
+                    generations = [
+                        self.tag_generations.get(x, 0) for x in tags
+                    ]
+                    break
+            # Another request is computing the same key, reuse its result
+            pending.wait()
+
+        try:
+            value = compute()
+            with self.lock:
+                current_generations = [
+                    self.tag_generations.get(x, 0) for x in tags
+                ]
+                if current_generations == generations:
+                    self.entries[key] = (time.monotonic() + ttl, tuple(tags),
+                                         value)
+            return value
+        finally:
+            with self.lock:
+                del self.pending[key]
+            pending.set()
+
+    def invalidate(self, *tags):
+        with self.lock:
+            for tag in tags:
+                self.tag_generations[tag] = \
+                    self.tag_generations.get(tag, 0) + 1
+            invalidated = [
+                key for key, entry in self.entries.items()
+                if any(x in entry[1] for x in tags)
+            ]
+            for key in invalidated:
+                del self.entries[key]
+
+    def handle_event(self, event):
+        # Instances are created and torn down by job state transitions
+        if event.get("type", None) == "state":
+            self.invalidate(CACHE_TAG_JOBS, CACHE_TAG_INSTANCES,
+                            get_job_cache_tag(event.get("job_uid", None)))
+
+
+response_cache = None
+response_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global response_cache
+    with response_cache_lock:
+        if response_cache is None:
+            response_cache = MonkeyResponseCache()
+            get_event_bus().add_listener(response_cache.handle_event)
+    return response_cache
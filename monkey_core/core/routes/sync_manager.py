@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from core.routes.utils import sync_directories
+
+logger = logging.getLogger(__name__)
+
+# Seconds a finished sync is reused without looking at the source again
+SYNC_MIN_INTERVAL = 5
+
+
+def get_folder_fingerprint(path):
+    """ Hashes the relative path, size and mtime of every file under path
+
+    Stating the source is much cheaper than an rsync against s3fs, which
+    also stats the destination and spawns a process.
+    """
+    hash_entries = hashlib.md5()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            file_path = os.path.join(root, name)
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            hash_entries.update(
+                f"{os.path.relpath(file_path, path)}:{stat.st_size}:"
+                f"{stat.st_mtime_ns}\n".encode("utf-8"))
+    return hash_entries.hexdigest()
+
+
+class MonkeySyncManager():
+    """ Coalesces and skips rsyncs between the same two folders
+
+    Concurrent requests for the same source and destination wait for the
+    sync in flight instead of starting their own.  A sync that finished
+    less than min_interval seconds ago, or whose source fingerprint has not
+    changed since, is not run again.
+    """
+
+    def __init__(self, min_interval=SYNC_MIN_INTERVAL):
+        super().__init__()
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        # (source, destination) -> (finish time, source fingerprint)
+        self.synced = dict()
+        # (source, destination) -> threading.Event set when the sync finishes
+        self.pending = dict()
+        self.metrics = {
+            "syncs": 0,
+            "failures": 0,
+            "coalesced": 0,
+            "skipped_recent": 0,
+            "skipped_unchanged": 0,
+            "total_duration": 0.0,
+            "max_duration": 0.0,
+            "last_duration": None,
+        }
+
+    def sync(self, source, destination, force=False):
+        """ Syncs source into destination unless a recent sync is reusable
+
+        Args:
+            source (str): Folder to copy from
+            destination (str): Folder to copy to
+            force (bool, optional): Ignore min_interval, an unchanged
+                source is still skipped
+
+        Returns:
+            bool: True if rsync ran, False if an earlier sync was reused
+        """
+        key = (os.path.normpath(source), os.path.normpath(destination))
+        waited = False
+        while True:
+            with self.lock:
+                synced = self.synced.get(key, None)
+                if waited:
+                    # Reuse the result of the sync this request waited on
+                    if synced is not None:
+                        self.metrics["coalesced"] += 1
+                        return False
+                elif not force and synced is not None and \
+                        time.monotonic() - synced[0] < self.min_interval:
+                    self.metrics["skipped_recent"] += 1
+                    return False
+                pending = self.pending.get(key, None)
+                if pending is None:
+                    pending = threading.Event()
+                    self.pending[key] = pending
+                    break
+            pending.wait()
+            waited = True
+
+        try:
+            fingerprint = get_folder_fingerprint(source)
+            if synced is not None and synced[1] == fingerprint and \
+                    os.path.isdir(destination):
+                with self.lock:
+                    self.synced[key] = (time.monotonic(), fingerprint)
+                    self.metrics["skipped_unchanged"] += 1
+                return False
+
+            start_time = time.monotonic()
+            try:
+                sync_directories(source, destination)
+            except Exception:
+                with self.lock:
+                    self.synced.pop(key, None)
+                    self.metrics["failures"] += 1
+                raise
+            duration = time.monotonic() - start_time
+            logger.info(f"Synced {source} in {duration:.2f}s")
+            with self.lock:
+                self.synced[key] = (time.monotonic(), fingerprint)
+                self.metrics["syncs"] += 1
+                self.metrics["total_duration"] += duration
+                self.metrics["max_duration"] = max(
+                    self.metrics["max_duration"], duration)
+                self.metrics["last_duration"] = duration
+            return True
+        finally:
+            with self.lock:
+                del self.pending[key]
+            pending.set()
+
+    def get_metrics(self):
+        with self.lock:
+            metrics = dict(self.metrics)
+            metrics["tracked_folders"] = len(self.synced)
+            metrics["in_flight"] = len(self.pending)
+        metrics["average_duration"] = metrics["total_duration"] / \
+            metrics["syncs"] if metrics["syncs"] else None
+        return metrics
+
+
+sync_manager = None
+sync_manager_lock = threading.Lock()
+
+
+def get_sync_manager():
+    global sync_manager
+    with sync_manager_lock:
+        if sync_manager is None:
+            sync_manager = MonkeySyncManager()
+    return sync_manager
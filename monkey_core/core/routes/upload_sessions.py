@@ -0,0 +1,342 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zlib
+
+from core import monkey_global
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_SESSION_CHUNK_SIZE = 8 * 1024 * 1024
+UPLOAD_SESSION_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+UPLOAD_SESSION_BLOCK_SIZE = 1024 * 1024
+# Sessions untouched for this long are removed when a new one starts
+UPLOAD_SESSION_EXPIRY = 7 * 24 * 60 * 60
+UPLOAD_SESSION_TARGET_BLOBS = "blobs"
+UPLOAD_SESSION_TARGET_PERSIST = "persist"
+UPLOAD_SESSION_TARGETS = [
+    UPLOAD_SESSION_TARGET_BLOBS, UPLOAD_SESSION_TARGET_PERSIST
+]
+UPLOAD_SESSION_FILE = "session.json"
+UPLOAD_SESSION_ENCODING_GZIP = "gzip"
+
+
+def get_upload_sessions_dir():
+    return os.path.join(monkey_global.MONKEYFS_LOCAL_PATH, "uploads")
+
+
+def get_upload_session_dir(session_id):
+    return os.path.join(get_upload_sessions_dir(), session_id)
+
+
+def get_upload_chunk_path(session_id, index):
+    return os.path.join(get_upload_session_dir(session_id), "chunks",
+                        str(index))
+
+
+def get_upload_session_id(upload_key, chunk_size, target, params):
+    """ Sessions are named by what they upload
+
+    Starting the same upload again, even from a new process, returns the
+    existing session and the chunks it already received.
+    """
+    session_key = json.dumps(
+        {
+            "upload_key": upload_key,
+            "chunk_size": chunk_size,
+            "target": target,
+            "params": params,
+        },
+        sort_keys=True)
+    return hashlib.sha256(session_key.encode("utf-8")).hexdigest()[:32]
+
+
+def get_chunk_length(session, index):
+    """ Expected length of a chunk, None while the total size is unknown """
+    if session["size"] is None:
+        return None
+    return min(session["chunk_size"],
+               session["size"] - index * session["chunk_size"])
+
+
+def remove_expired_upload_sessions():
+    sessions_dir = get_upload_sessions_dir()
+    if not os.path.isdir(sessions_dir):
+        return
+    now = time.time()
+    for session_id in os.listdir(sessions_dir):
+        session_dir = os.path.join(sessions_dir, session_id)
+        try:
+            if now - os.stat(session_dir).st_mtime > UPLOAD_SESSION_EXPIRY:
+                logger.info(f"Removing expired upload session {session_id}")
+                shutil.rmtree(session_dir, ignore_errors=True)
+        except OSError:
+            continue
+
+
+def check_size_and_checksum(size, checksum):
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        return False, "Size must be an integer", None
+    if size < 0:
+        return False, "Invalid size", None
+    if not isinstance(checksum, str) or len(checksum) != 64:
+        return False, "Invalid sha256 checksum", None
+    return True, "Valid size and checksum", size
+
+
+def save_upload_session(session):
+    session_dir = get_upload_session_dir(session["session_id"])
+    os.makedirs(os.path.join(session_dir, "chunks"), exist_ok=True)
+    with tempfile.NamedTemporaryFile("w", dir=session_dir,
+                                     delete=False) as tmp:
+        json.dump(session, tmp)
+    os.replace(tmp.name, os.path.join(session_dir, UPLOAD_SESSION_FILE))
+
+
+def start_upload_session(target,
+                         params,
+                         size=None,
+                         checksum=None,
+                         upload_key=None,
+                         chunk_size=None):
+    """ Creates an upload session or returns the matching unfinished one
+
+    Files are either announced with their size and checksum, or streamed
+    under an upload_key naming their content, in which case the size and
+    checksum are only given when the session is finished.
+
+    Args:
+        target (str): What the assembled file is, one of
+            UPLOAD_SESSION_TARGETS
+        params (dict): Arguments for storing the assembled file
+        size (int, optional): Size in bytes of the whole file
+        checksum (str, optional): sha256 of the whole file
+        upload_key (str, optional): Identifies a streamed file
+        chunk_size (int, optional): Size of every chunk but the last
+
+    Returns:
+        (bool, str, dict): Success, message and the session
+    """
+    if chunk_size is None:
+        chunk_size = UPLOAD_SESSION_CHUNK_SIZE
+    try:
+        chunk_size = int(chunk_size)
+    except (TypeError, ValueError):
+        return False, "Chunk size must be an integer", None
+    if chunk_size <= 0 or chunk_size > UPLOAD_SESSION_MAX_CHUNK_SIZE:
+        return False, "Invalid chunk size", None
+    if target not in UPLOAD_SESSION_TARGETS:
+        return False, f"Invalid upload target: {target}", None
+    if upload_key is None:
+        success, msg, size = check_size_and_checksum(size, checksum)
+        if not success:
+            return False, msg, None
+        upload_key = f"{size}:{checksum}"
+    elif not isinstance(upload_key, str):
+        return False, "Invalid upload key", None
+    else:
+        size, checksum = None, None
+
+    remove_expired_upload_sessions()
+    session_id = get_upload_session_id(upload_key, chunk_size, target, params)
+    session = load_upload_session(session_id)
+    if session is not None:
+        return True, "Resuming upload session", session
+
+    session = {
+        "session_id": session_id,
+        "size": size,
+        "checksum": checksum,
+        "chunk_size": chunk_size,
+        "num_chunks": None,
+        "target": target,
+        "params": params,
+    }
+    if size is not None:
+        session["num_chunks"] = max(1, -(-size // chunk_size))
+    save_upload_session(session)
+    return True, "Created upload session", session
+
+
+def complete_upload_session(session, size, checksum):
+    """ Sets the size and checksum of a streamed session
+
+    Returns:
+        (bool, str): Success and message
+    """
+    success, msg, size = check_size_and_checksum(size, checksum)
+    if not success:
+        return False, msg
+    if session["size"] is not None:
+        if session["size"] != size or session["checksum"] != checksum:
+            return False, "Size or checksum differ from the session"
+        return True, "Session is complete"
+    session["size"] = size
+    session["checksum"] = checksum
+    session["num_chunks"] = max(1, -(-size // session["chunk_size"]))
+    save_upload_session(session)
+    return True, "Session is complete"
+
+
+def load_upload_session(session_id):
+    if not session_id or not all(c in "0123456789abcdef" for c in session_id):
+        return None
+    try:
+        with open(
+                os.path.join(get_upload_session_dir(session_id),
+                             UPLOAD_SESSION_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def get_received_chunks(session):
+    """ Indices of the chunks that were stored with the right length
+
+    Every stored chunk counts while a streamed session has no size yet.
+    """
+    if session["size"] is None:
+        chunks_dir = os.path.join(
+            get_upload_session_dir(session["session_id"]), "chunks")
+        return sorted(
+            int(name) for name in os.listdir(chunks_dir) if name.isdigit())
+    received = []
+    for index in range(session["num_chunks"]):
+        try:
+            chunk_size = os.path.getsize(
+                get_upload_chunk_path(session["session_id"], index))
+        except OSError:
+            continue
+        if chunk_size == get_chunk_length(session, index):
+            received.append(index)
+    return received
+
+
+def write_upload_chunk(session, index, checksum, stream, encoding=None):
+    """ Stores one chunk if its length and sha256 match
+
+    Chunks are written to a temporary file first, an interrupted request
+    never leaves a partial chunk behind.  Gzip encoded chunks are stored
+    decompressed, the length and checksum are those of the raw chunk.
+    """
+    if encoding not in [None, UPLOAD_SESSION_ENCODING_GZIP]:
+        return False, f"Unsupported content encoding: {encoding}"
+    try:
+        index = int(index)
+    except (TypeError, ValueError):
+        return False, "Chunk index must be an integer"
+    if index < 0 or (session["num_chunks"] is not None
+                     and index >= session["num_chunks"]):
+        return False, f"Chunk index out of range: {index}"
+    expected_length = get_chunk_length(session, index)
+    max_length = session["chunk_size"] if expected_length is None else \
+        expected_length
+    chunk_path = get_upload_chunk_path(session["session_id"], index)
+    decompressor = None
+    if encoding == UPLOAD_SESSION_ENCODING_GZIP:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    hash_chunk = hashlib.sha256()
+    length = 0
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(chunk_path),
+                                     delete=False) as tmp:
+        while length <= max_length:
+            block = stream.read(UPLOAD_SESSION_BLOCK_SIZE)
+            if not block:
+                break
+            if decompressor is not None:
+                # Never expands past one byte more than the chunk can hold
+                block = decompressor.decompress(block, max_length + 1 - length)
+            hash_chunk.update(block)
+            tmp.write(block)
+            length += len(block)
+    if length > max_length or (expected_length is not None
+                               and length != expected_length):
+        os.remove(tmp.name)
+        return False, f"Chunk {index} has {length} bytes, " + \
+            f"expected {max_length}"
+    if hash_chunk.hexdigest() != checksum:
+        os.remove(tmp.name)
+        return False, f"Chunk {index} does not match its checksum"
+    os.replace(tmp.name, chunk_path)
+    # Keeps the session from expiring while it is in use
+    os.utime(get_upload_session_dir(session["session_id"]))
+    return True, f"Stored chunk {index}"
+
+
+def assemble_upload_session(session, destination):
+    """ Concatenates every chunk into destination and verifies the whole file
+
+    Returns:
+        (bool, str): Success and message
+    """
+    received = get_received_chunks(session)
+    if len(received) != session["num_chunks"]:
+        return False, f"Missing {session['num_chunks'] - len(received)} " + \
+            "chunks"
+    hash_file = hashlib.sha256()
+    with open(destination, "wb") as f:
+        for index in range(session["num_chunks"]):
+            with open(get_upload_chunk_path(session["session_id"], index),
+                      "rb") as chunk:
+                for block in iter(
+                        lambda: chunk.read(UPLOAD_SESSION_BLOCK_SIZE), b""):
+                    hash_file.update(block)
+                    f.write(block)
+    if hash_file.hexdigest() != session["checksum"]:
+        return False, "Assembled file does not match its checksum"
+    return True, "Assembled upload"
+
+
+class UploadSessionReader():
+    """ Reads the chunks of a complete upload session as one file
+
+    Hashes everything read so the whole file can be verified once it was
+    consumed, without assembling a copy first.
+    """
+
+    def __init__(self, session):
+        super().__init__()
+        self.session = session
+        self.index = 0
+        self.chunk = None
+        self.hash_file = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = b""
+        while size < 0 or len(data) < size:
+            if self.chunk is None:
+                if self.index >= self.session["num_chunks"]:
+                    break
+                self.chunk = open(
+                    get_upload_chunk_path(self.session["session_id"],
+                                          self.index), "rb")
+            block = self.chunk.read(-1 if size < 0 else size - len(data))
+            if not block:
+                self.chunk.close()
+                self.chunk = None
+                self.index += 1
+                continue
+            data += block
+        self.hash_file.update(data)
+        return data
+
+    def verify(self):
+        """ Reads what is left and checks the whole file checksum """
+        for _ in iter(lambda: self.read(UPLOAD_SESSION_BLOCK_SIZE), b""):
+            pass
+        return self.hash_file.hexdigest() == self.session["checksum"]
+
+    def close(self):
+        if self.chunk is not None:
+            self.chunk.close()
+            self.chunk = None
+
+
+def remove_upload_session(session_id):
+    shutil.rmtree(get_upload_session_dir(session_id), ignore_errors=True)
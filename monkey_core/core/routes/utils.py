@@ -1,10 +1,30 @@
+import functools
+import hashlib
 import logging
 import os
+import queue
 import subprocess
+import tarfile
+import threading
+
+import ujson
+from flask import Response, request
 
 logger = logging.getLogger(__name__)
 from core import monkey_global
 
+STREAM_CHUNK_SIZE = 64 * 1024
+# Files whose md5 is kept, each entry is a path and a digest
+FILE_MD5_CACHE_SIZE = 16384
+# Chunks buffered between the tar writer thread and the response
+STREAM_TAR_QUEUE_SIZE = 16
+STREAM_TAR_MODES = {
+    None: ("w|", "application/x-tar"),
+    "gz": ("w|gz", "application/gzip"),
+    "bz2": ("w|bz2", "application/x-bzip2"),
+    "xz": ("w|xz", "application/x-xz"),
+}
+
 
 def sync_directories(dir1, dir2):
     if not os.path.isdir(dir1):
@@ -39,6 +59,19 @@ def get_codebase_path(run_name, codebase_checksum, monkeyfs_path):
         os.path.join(monkeyfs_path, "code", run_name, codebase_checksum))
 
 
+BLOB_HASH_LENGTH = 64
+
+
+def is_blob_hash(blob_hash):
+    return type(blob_hash) is str and len(blob_hash) == BLOB_HASH_LENGTH and \
+        all(x in "0123456789abcdef" for x in blob_hash)
+
+
+def get_blob_path(blob_hash, monkeyfs_path):
+    return os.path.abspath(
+        os.path.join(monkeyfs_path, "blobs", blob_hash[:2], blob_hash))
+
+
 def get_dataset_path(dataset_name, dataset_checksum, monkeyfs_path):
     return os.path.abspath(
         os.path.join(monkeyfs_path, "data", dataset_name, dataset_checksum))
@@ -51,5 +84,159 @@ def get_dataset_file_path(dataset_name, dataset_checksum, dataset_extension,
                      "data" + dataset_extension))
 
 
+def get_job_log_path(job_uid, provider_name):
+    """ Path of a job's run.log in its provider's monkeyfs """
+    monkeyfs_path = get_local_filesystem_for_provider(provider_name)
+    if monkeyfs_path is None:
+        monkeyfs_path = monkey_global.MONKEYFS_LOCAL_PATH
+    return os.path.join(monkeyfs_path, "jobs", job_uid, "logs", "run.log")
+
+
+def get_file_md5(path):
+    """ md5 of a file, only rehashed after its size or mtime change """
+    stat = os.stat(path)
+    return calculate_file_md5(path, stat.st_size, stat.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=FILE_MD5_CACHE_SIZE)
+def calculate_file_md5(path, size, mtime_ns):
+    hash_md5 = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hash_md5.update(chunk)
+    return hash_md5.hexdigest()
+
+
 def existing_dir(path):
     return os.path.isdir(path)
+
+
+def json_response(obj, status=200):
+    """ Serializes obj once with ujson, skipping flask's json encoder """
+    return Response(ujson.dumps(obj),
+                    status=status,
+                    mimetype="application/json")
+
+
+def not_modified_response(etag):
+    """ Answers a conditional GET whose If-None-Match has the current etag
+
+    Returns:
+        Response: A 304 response, None when the full response is needed
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def stream_json_list(items):
+    """ Streams an iterable of json ready dicts as a single json array
+
+    Items are encoded as they are produced and flushed in chunks of roughly
+    STREAM_CHUNK_SIZE, so the full list is never held in memory.
+    """
+
+    def generate():
+        buffer = ["["]
+        buffer_size = 1
+        first = True
+        for item in items:
+            encoded = ujson.dumps(item)
+            if not first:
+                encoded = "," + encoded
+            first = False
+            buffer.append(encoded)
+            buffer_size += len(encoded)
+            if buffer_size >= STREAM_CHUNK_SIZE:
+                yield "".join(buffer)
+                buffer = []
+                buffer_size = 0
+        buffer.append("]")
+        yield "".join(buffer)
+
+    return Response(generate(), mimetype="application/json")
+
+
+class TarStreamClosed(Exception):
+    pass
+
+
+class TarStreamWriter():
+    """ File like object that hands written bytes to a bounded queue """
+
+    def __init__(self, chunks):
+        super().__init__()
+        self.chunks = chunks
+        self.buffer = bytearray()
+        self.closed = False
+
+    def put(self, item):
+        while not self.closed:
+            try:
+                self.chunks.put(item, timeout=1)
+                return
+            except queue.Full:
+                pass
+        raise TarStreamClosed("Client stopped reading the tar stream")
+
+    def write(self, data):
+        self.buffer += data
+        if len(self.buffer) >= STREAM_CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if len(self.buffer) > 0:
+            self.put(bytes(self.buffer))
+            self.buffer = bytearray()
+
+
+def stream_tar(items, compression=None):
+    """ Streams a tar of items while it is being written
+
+    The tar is written on a separate thread so large files never sit in
+    memory or in a temporary file, only STREAM_TAR_QUEUE_SIZE chunks are
+    buffered at a time.
+
+    Args:
+        items (list): (path, arcname) pairs to add, folders recursively
+        compression (str, optional): None, gz, bz2 or xz
+
+    Returns:
+        Response: The streamed tar
+    """
+    mode, mimetype = STREAM_TAR_MODES[compression]
+    chunks = queue.Queue(maxsize=STREAM_TAR_QUEUE_SIZE)
+    writer = TarStreamWriter(chunks)
+
+    def write_tar():
+        try:
+            with tarfile.open(fileobj=writer, mode=mode) as tar:
+                for path, arcname in items:
+                    tar.add(path, arcname)
+            writer.flush()
+            writer.put(None)
+        except TarStreamClosed:
+            pass
+        except Exception as e:
+            logger.error(f"Failed writing tar stream: {e}")
+            try:
+                # Truncated output makes the client's extraction fail
+                writer.put(e)
+            except TarStreamClosed:
+                pass
+
+    def generate():
+        threading.Thread(target=write_tar, daemon=True).start()
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is None or isinstance(chunk, Exception):
+                    return
+                yield chunk
+        finally:
+            writer.closed = True
+
+    return Response(generate(), mimetype=mimetype)
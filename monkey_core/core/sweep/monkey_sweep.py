@@ -0,0 +1,121 @@
+import itertools
+import logging
+import math
+import random
+
+logger = logging.getLogger(__name__)
+
+SWEEP_TYPE_GRID = "grid"
+SWEEP_TYPE_RANDOM = "random"
+MAX_SWEEP_JOBS = 10000
+
+
+class MonkeySweepException(Exception):
+    pass
+
+
+def sample_parameter(name, spec, rng):
+    """ Draws one value for a random sweep parameter
+
+    A list is sampled uniformly, a dict takes `min`, `max` and an optional
+    `distribution` of uniform (default), log_uniform or int.
+    """
+    if isinstance(spec, list):
+        if len(spec) == 0:
+            raise MonkeySweepException(f"No values for parameter: {name}")
+        return rng.choice(spec)
+    if isinstance(spec, dict):
+        try:
+            low, high = spec["min"], spec["max"]
+        except KeyError:
+            raise MonkeySweepException(
+                f"Parameter {name} needs both min and max")
+        distribution = spec.get("distribution", "uniform")
+        if distribution == "uniform":
+            return rng.uniform(low, high)
+        if distribution == "log_uniform":
+            if low <= 0 or high <= 0:
+                raise MonkeySweepException(
+                    f"Parameter {name} needs a positive log_uniform range")
+            return math.exp(rng.uniform(math.log(low), math.log(high)))
+        if distribution == "int":
+            return rng.randint(int(low), int(high))
+        raise MonkeySweepException(
+            f"Unknown distribution for parameter {name}: {distribution}")
+    return spec
+
+
+def expand_sweep_parameters(sweep_yml):
+    """ Expands the sweep section of a job.yml into one dict per child job
+
+    Args:
+        sweep_yml (dict): The `sweep` section of job.yml
+
+    Returns:
+        list: One {parameter name: value} dict per child job
+    """
+    sweep_type = sweep_yml.get("type", SWEEP_TYPE_GRID)
+    parameters = sweep_yml.get("parameters", dict())
+    if len(parameters) == 0:
+        raise MonkeySweepException("Sweep defines no parameters")
+    names = list(parameters.keys())
+
+    if sweep_type == SWEEP_TYPE_GRID:
+        values = []
+        for name in names:
+            spec = parameters[name]
+            if not isinstance(spec, list):
+                spec = [spec]
+            values.append(spec)
+        num_jobs = 1
+        for spec in values:
+            num_jobs *= len(spec)
+        if num_jobs > MAX_SWEEP_JOBS:
+            raise MonkeySweepException(
+                f"Grid sweep expands to {num_jobs} jobs, max {MAX_SWEEP_JOBS}")
+        return [dict(zip(names, x)) for x in itertools.product(*values)]
+
+    if sweep_type == SWEEP_TYPE_RANDOM:
+        num_samples = int(sweep_yml.get("num_samples", 0))
+        if num_samples < 1 or num_samples > MAX_SWEEP_JOBS:
+            raise MonkeySweepException(
+                f"Random sweep needs num_samples between 1 and {MAX_SWEEP_JOBS}"
+            )
+        rng = random.Random(sweep_yml.get("seed", None))
+        samples = []
+        for _ in range(num_samples):
+            samples.append({
+                name: sample_parameter(name, parameters[name], rng)
+                for name in names
+            })
+        return samples
+
+    raise MonkeySweepException(f"Unknown sweep type: {sweep_type}")
+
+
+def expand_sweep(job_yml):
+    """ Builds the per job overrides for a job.yml that declares a sweep
+
+    The sweep `command` (or the submitted cmd) is a template filled in with
+    python format fields named after the parameters, e.g.
+    `python train.py --lr {learning_rate}`
+
+    Returns:
+        list: One override dict per child job with cmd and sweep_parameters
+    """
+    sweep_yml = job_yml.get("sweep", None)
+    if not isinstance(sweep_yml, dict):
+        raise MonkeySweepException("job.yml does not define a sweep")
+    command = sweep_yml.get("command", job_yml.get("cmd", None))
+    if not command:
+        raise MonkeySweepException("Sweep defines no command template")
+
+    overrides = []
+    for parameters in expand_sweep_parameters(sweep_yml):
+        try:
+            cmd = command.format(**parameters)
+        except (KeyError, IndexError, ValueError) as e:
+            raise MonkeySweepException(
+                f"Unable to fill command template {command}: {e}")
+        overrides.append({"cmd": cmd, "sweep_parameters": parameters})
+    return overrides
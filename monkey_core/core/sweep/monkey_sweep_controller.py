@@ -0,0 +1,150 @@
+import json
+import logging
+import os
+
+from core import monkey_global
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+
+logger = logging.getLogger(__name__)
+
+EARLY_STOPPING_ASHA = "asha"
+
+
+def get_metric_values(metrics, metric_path):
+    """ Follows a dotted path into the metrics json
+
+    Returns:
+        list: Every value reported so far, one per reported step
+    """
+    value = metrics
+    for key in metric_path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return []
+        value = value[key]
+    if isinstance(value, list):
+        return [x for x in value if isinstance(x, (int, float))]
+    return []
+
+
+def get_rung_resources(early_stopping):
+    """ Resource levels of each ASHA rung: min_resource * reduction_factor^k
+    """
+    min_resource = int(early_stopping.get("min_resource", 1))
+    reduction_factor = int(early_stopping.get("reduction_factor", 3))
+    max_resource = early_stopping.get("max_resource", None)
+    if min_resource < 1 or reduction_factor < 2:
+        raise ValueError("ASHA needs min_resource >= 1 and "
+                         "reduction_factor >= 2")
+    resources = []
+    resource = min_resource
+    while max_resource is None or resource < int(max_resource):
+        resources.append(resource)
+        resource *= reduction_factor
+        # Without a max_resource stop after a reasonable number of rungs
+        if max_resource is None and len(resources) >= 10:
+            break
+    return resources
+
+
+def asha_should_stop(value, rung_values, reduction_factor, mode="min"):
+    """ Asynchronous successive halving stopping rule
+
+    A job that reaches a rung keeps running only if its value is within the
+    top 1/reduction_factor of every value recorded at that rung so far.
+    Rungs with fewer than reduction_factor results never stop anything.
+    """
+    if len(rung_values) < reduction_factor:
+        return False
+    ranked = sorted(rung_values, reverse=(mode == "max"))
+    keep_num = max(1, len(ranked) // reduction_factor)
+    cutoff = ranked[keep_num - 1]
+    if mode == "max":
+        return value < cutoff
+    return value > cutoff
+
+
+def read_job_metrics(job, provider, metrics_file):
+    job_folder_path = os.path.join(provider.get_local_filesystem_path(),
+                                   "jobs", job.job_uid)
+    try:
+        with open(os.path.join(job_folder_path, metrics_file), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def check_for_sweep_early_stopping(self, log_file=None):
+    """Applies each sweep's early stopping rule to its running children
+
+    Newly reached rungs are recorded on the job in sweep_metrics, keyed by
+    the resource (number of reported metric values).  Stopped jobs go
+    through the normal cleanup path.
+    """
+    running_jobs = MonkeyJob.objects(state=monkey_state.MONKEY_STATE_RUNNING,
+                                     sweep_id__ne=None)
+    printout = ""
+    for job in running_jobs:
+        early_stopping = job.job_yml.get("sweep",
+                                         dict()).get("early_stopping", None)
+        if not early_stopping or early_stopping.get(
+                "type", EARLY_STOPPING_ASHA) != EARLY_STOPPING_ASHA:
+            continue
+        found_provider = None
+        for p in self.providers:
+            if p.name == job.provider_name:
+                found_provider = p
+        if found_provider is None:
+            continue
+
+        try:
+            resources = get_rung_resources(early_stopping)
+        except ValueError as e:
+            logger.error(f"Invalid early stopping for {job.sweep_id}: {e}")
+            continue
+        metrics = read_job_metrics(job=job,
+                                   provider=found_provider,
+                                   metrics_file=early_stopping.get(
+                                       "metrics_file", "output/losses.json"))
+        if metrics is None:
+            continue
+        values = get_metric_values(metrics,
+                                   early_stopping.get("metric", "test.losses"))
+
+        sweep_metrics = dict(job.sweep_metrics or dict())
+        new_rungs = [
+            x for x in resources
+            if x <= len(values) and str(x) not in sweep_metrics
+        ]
+        if len(new_rungs) == 0:
+            continue
+        for resource in new_rungs:
+            sweep_metrics[str(resource)] = values[resource - 1]
+        job.sweep_metrics = sweep_metrics
+        job.save()
+
+        reduction_factor = int(early_stopping.get("reduction_factor", 3))
+        mode = early_stopping.get("mode", "min")
+        siblings = list(MonkeyJob.objects(sweep_id=job.sweep_id))
+        for resource in new_rungs:
+            rung_values = [
+                x.sweep_metrics[str(resource)]
+                for x in siblings
+                if str(resource) in (x.sweep_metrics or dict())
+            ]
+            if asha_should_stop(value=sweep_metrics[str(resource)],
+                                rung_values=rung_values,
+                                reduction_factor=reduction_factor,
+                                mode=mode):
+                printout += f"Early stopping {job.job_uid} at rung " + \
+                    f"{resource}: {sweep_metrics[str(resource)]}\n"
+                logger.info(f"Early stopping {job.job_uid} in sweep " +
+                            f"{job.sweep_id} at resource {resource}")
+                job.early_stopped = True
+                job.set_state(state=monkey_state.MONKEY_STATE_CLEANUP)
+                break
+
+    if printout and not monkey_global.QUIET_PERIODIC_PRINTOUT:
+        print(printout)
+    if log_file and printout:
+        log_file.write(printout)
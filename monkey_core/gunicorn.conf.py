@@ -0,0 +1,18 @@
+"""gunicorn settings for the monkey core api, read when gunicorn starts in
+monkey_core/
+
+Every api process runs a MonkeyEventRelay polling the job store, and SSE
+watchers are only sent the state changes published in their own process.
+The api is served by a single worker with many threads, more workers would
+each poll the store.
+"""
+bind = "0.0.0.0:9990"
+workers = 1
+# Followers of job logs and events hold a thread while they are attached
+threads = 32
+
+
+def on_starting(server):
+    if server.cfg.workers != 1:
+        raise RuntimeError("The monkey core api runs a single worker, " +
+                           "raise --threads to serve more requests")
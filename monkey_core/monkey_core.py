@@ -9,11 +9,13 @@ from flask import Flask
 
 from core import monkey_global
 from core.routes.dispatch_routes import dispatch_routes
+from core.routes.event_routes import event_routes
 from core.routes.info_routes import info_routes
 
 application = Flask(__name__)
 application.register_blueprint(info_routes)
 application.register_blueprint(dispatch_routes)
+application.register_blueprint(event_routes)
 logging.getLogger("werkzeug").setLevel(logging.WARNING)
 
 log_format = '%(asctime)s[%(name)s]:[%(levelname)s]: %(message)s'
@@ -98,6 +100,23 @@ def parse_args(args):
                         default=None,
                         dest="log_file",
                         help="Run quietly for all printouts")
+    parser.add_argument(
+        "--archive-after-days",
+        required=False,
+        default=None,
+        type=int,
+        dest="archive_after_days",
+        help="Archive finished jobs after this many days (-1 to disable)")
+    parser.add_argument(
+        "--role",
+        required=False,
+        default=None,
+        choices=[
+            monkey_global.MONKEY_ROLE_ALL, monkey_global.MONKEY_ROLE_API,
+            monkey_global.MONKEY_ROLE_SCHEDULER
+        ],
+        dest="role",
+        help="Run the api, the scheduler or both (default) in this process")
     parsed_args, remainder = parser.parse_known_args(args)
     if parsed_args.quiet is not None:
         monkey_global.QUIET = parsed_args.quiet
@@ -115,6 +134,15 @@ def parse_args(args):
     if parsed_args.log_file is not None:
         monkey_global.LOG_FILE = parsed_args.log_file
 
+    if parsed_args.archive_after_days is not None:
+        monkey_global.ARCHIVE_JOBS_AFTER_DAYS = parsed_args.archive_after_days
+        logger.info("Archiving finished jobs after " +
+                    f"{parsed_args.archive_after_days} days")
+
+    if parsed_args.role is not None:
+        monkey_global.MONKEY_ROLE = parsed_args.role
+        logger.info(f"Running with role: {parsed_args.role}")
+
     logger.info(f"Logging to { monkey_global.LOG_FILE }")
     logging.info("Starting Monkey Core logs...")
     return parsed_args
@@ -122,6 +150,12 @@ def parse_args(args):
 
 def main():
     parsed_args = parse_args(sys.argv[1:])
+    monkey_global.get_monkey()
+    logger.info("Starting Monkey Core")
+    if monkey_global.MONKEY_ROLE == monkey_global.MONKEY_ROLE_SCHEDULER:
+        # The daemon threads do the work, the api runs in other processes
+        while True:
+            time.sleep(60)
     if parsed_args.dev:
         logger.info("\n\nStarting in debug mode...\n\n")
         application.run(host='0.0.0.0',
@@ -134,6 +168,4 @@ def main():
 
 
 if __name__ == '__main__':
-    m = monkey_global.get_monkey()
-    logger.info("Starting Monkey Core")
     exit(main())
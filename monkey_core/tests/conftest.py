@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# Tests run against the embedded job store, no MongoDB server is needed
+os.environ["MONKEY_JOB_STORE"] = "sqlite"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import monkey_global  # noqa: E402, F401
+from core.mongo import mongo_global  # noqa: E402
+
+
+@pytest.fixture
+def sqlite_store(tmp_path, monkeypatch):
+    """ A fresh sqlite job store for every test """
+    monkeypatch.setattr(mongo_global, "MONKEY_SQLITE_PATH",
+                        str(tmp_path / "monkey.sqlite"))
+    return mongo_global.MONKEY_SQLITE_PATH
@@ -0,0 +1,149 @@
+import os
+
+import pytest
+import yaml
+from flask import Flask
+
+from core import monkey_global
+from core.routes import dispatch_routes
+
+
+class FakeMonkey():
+
+    def __init__(self):
+        super().__init__()
+        self.submitted = []
+
+    def submit_jobs(self, job_ymls):
+        self.submitted += job_ymls
+        return True, f"Submitted {len(job_ymls)} jobs"
+
+
+@pytest.fixture
+def monkeyfs(tmp_path, monkeypatch):
+    local_path = tmp_path / "local"
+    provider_path = tmp_path / "provider"
+    monkeypatch.setattr(monkey_global, "MONKEYFS_LOCAL_PATH", str(local_path))
+    monkeypatch.setattr(monkey_global, "monkey", FakeMonkey())
+    monkeypatch.setattr(dispatch_routes, "get_local_filesystem_for_provider",
+                        lambda provider: str(provider_path))
+    return local_path, provider_path
+
+
+@pytest.fixture
+def client(monkeyfs):
+    application = Flask(__name__)
+    application.register_blueprint(dispatch_routes.dispatch_routes)
+    return application.test_client()
+
+
+def test_create_job_batch_shares_uploads(monkeyfs):
+    local_path, provider_path = monkeyfs
+    persisted_file = provider_path / "jobs" / "job-1" / "output" / "a.txt"
+    os.makedirs(persisted_file.parent)
+    persisted_file.write_text("input")
+    os.makedirs(local_path / "jobs" / "job-1")
+    (local_path / "jobs" / "job-1" / "code.yaml").write_text("codebases: []")
+
+    success, _ = dispatch_routes.create_job_batch(
+        base_job={
+            "provider": "local",
+            "cmd": "train"
+        },
+        job_uids=["job-1", "job-2", "job-3"],
+        overrides=[{}, {
+            "cmd": "train --lr 1"
+        }, {
+            "cmd": "train --lr 2"
+        }])
+    assert success
+
+    # The uploads are moved once instead of being copied to every job
+    assert (provider_path / "batches" / "job-1" / "output" /
+            "a.txt").read_text() == "input"
+    assert (local_path / "batches" / "job-1" / "code.yaml").exists()
+    assert not (provider_path / "jobs" / "job-2" / "output").exists()
+    assert not (provider_path / "jobs" / "job-1" / "output").exists()
+
+    submitted = monkey_global.monkey.submitted
+    assert [x["batch_uid"] for x in submitted] == ["job-1"] * 3
+    assert [x["cmd"] for x in submitted
+            ] == ["train", "train --lr 1", "train --lr 2"]
+    for path in [local_path, provider_path]:
+        with open(path / "jobs" / "job-3" / "job.yaml") as f:
+            job_yaml = yaml.safe_load(f)
+        assert job_yaml["job_uid"] == "job-3"
+        assert job_yaml["batch_uid"] == "job-1"
+
+
+def test_create_job_batch_without_uploads(monkeyfs):
+    local_path, provider_path = monkeyfs
+    success, _ = dispatch_routes.create_job_batch(
+        base_job={"provider": "local"},
+        job_uids=["job-1", "job-2"],
+        overrides=[{}, {}])
+    assert success
+    assert (provider_path / "batches" / "job-1").is_dir()
+    assert (local_path / "batches" / "job-1").is_dir()
+
+
+def test_submit_jobs_rejects_unknown_override_keys(client):
+    response = client.post("/submit/jobs",
+                           json={
+                               "job": {
+                                   "provider": "local"
+                               },
+                               "job_uids": ["job-1", "job-2"],
+                               "overrides": [{
+                                   "cmd": "train"
+                               }, {
+                                   "provider": "aws",
+                                   "hyperparameters": {}
+                               }]
+                           })
+    assert not response.get_json()["success"]
+    assert "provider" in response.get_json()["msg"]
+    assert monkey_global.monkey.submitted == []
+
+
+def test_submit_jobs_applies_overrides(client):
+    response = client.post("/submit/jobs",
+                           json={
+                               "job": {
+                                   "provider": "local",
+                                   "cmd": "train"
+                               },
+                               "job_uids": ["job-1", "job-2"],
+                               "overrides": [{
+                                   "cmd": "train --lr 1"
+                               }, {
+                                   "hyperparameters": {
+                                       "lr": 2
+                                   }
+                               }]
+                           })
+    assert response.get_json()["success"]
+    submitted = monkey_global.monkey.submitted
+    assert submitted[0]["cmd"] == "train --lr 1"
+    assert submitted[1]["cmd"] == "train"
+    assert submitted[1]["hyperparameters"] == {"lr": 2}
+
+
+def test_submit_without_json_body(client):
+    for response in [
+            client.post("/submit/jobs"),
+            client.post("/submit/jobs", data="not json"),
+            client.get("/submit/job")
+    ]:
+        assert response.status_code == 200
+        assert not response.get_json()["success"]
+    assert monkey_global.monkey.submitted == []
+
+
+def test_submit_sweep_without_json_body(client):
+    response = client.post("/submit/sweep")
+    assert response.status_code == 200
+    assert response.get_json() == {
+        "msg": "Did not provide job_uid",
+        "success": False
+    }
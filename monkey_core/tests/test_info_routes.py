@@ -0,0 +1,170 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask
+
+from core import monkey_global
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+from core.routes import info_routes, response_cache
+
+
+class FakeInstance():
+
+    def check_online(self):
+        return True
+
+
+class FakeProvider():
+
+    name = "local"
+
+    def get_instance(self, job_uid):
+        # Only the running job still has a machine
+        return FakeInstance() if job_uid == "job-1" else None
+
+
+class FakeMonkey():
+    from core.info.monkey_list import (get_job_info, get_job_version,
+                                       iter_list_jobs)
+    from core.loop.monkey_loop import check_for_dead_jobs, print_jobs_string
+
+    providers = [FakeProvider()]
+
+
+@pytest.fixture
+def client(sqlite_store, monkeypatch):
+    monkeypatch.setattr(monkey_global, "monkey", FakeMonkey())
+    monkeypatch.setattr(response_cache, "response_cache", None)
+    application = Flask(__name__)
+    application.register_blueprint(info_routes.info_routes)
+    return application.test_client()
+
+
+def get_job_info(client, job_uid, headers=None):
+    return client.get("/get/job_info",
+                      query_string={"job_uid": job_uid},
+                      headers=headers)
+
+
+def test_job_info_reflects_saves_without_state_change(client):
+    job = MonkeyJob(job_uid="job-1", state=monkey_state.MONKEY_STATE_RUNNING)
+    job.save()
+    job_info = get_job_info(client, "job-1").get_json()["job_info"]
+    assert job_info["total_wall_time"] == 0
+
+    job.total_wall_time = 42
+    job.sweep_metrics = {"1": 0.5}
+    job.save()
+    job_info = get_job_info(client, "job-1").get_json()["job_info"]
+    assert job_info["total_wall_time"] == 42
+    assert job_info["sweep_metrics"] == {"1": 0.5}
+    assert job_info["version"] == job.version
+
+
+def test_job_info_unknown_job(client):
+    response = get_job_info(client, "job-2").get_json()
+    assert response["success"]
+    assert response["job_info"] is None
+
+
+def test_job_info_etag_follows_version(client):
+    job = MonkeyJob(job_uid="job-1", state=monkey_state.MONKEY_STATE_RUNNING)
+    job.save()
+    response = get_job_info(client, "job-1")
+    etag = response.headers["ETag"]
+    assert etag == f'"job-1-{job.version}"'
+    response = get_job_info(client, "job-1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    job.total_wall_time = 42
+    job.save()
+    response = get_job_info(client, "job-1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"job-1-{job.version}"'
+    assert response.get_json()["job_info"]["total_wall_time"] == 42
+
+
+def test_loop_tick_keeps_etags(client):
+    MonkeyJob(job_uid="job-1",
+              state=monkey_state.MONKEY_STATE_RUNNING,
+              provider_name="local",
+              provider_type="aws").save()
+    MonkeyJob(job_uid="job-2",
+              state=monkey_state.MONKEY_STATE_FINISHED,
+              provider_name="local",
+              provider_type="aws").save()
+    jobs_etag = client.get("/list/jobs").headers["ETag"]
+    job_etag = get_job_info(client, "job-1").headers["ETag"]
+
+    monkey_global.get_monkey().check_for_dead_jobs()
+    response = client.get("/list/jobs", headers={"If-None-Match": jobs_etag})
+    assert response.status_code == 304
+    response = get_job_info(client,
+                            "job-1",
+                            headers={"If-None-Match": job_etag})
+    assert response.status_code == 304
+
+
+@pytest.fixture
+def local_timezone():
+    """ Runs the test in a timezone away from UTC """
+    tz = os.environ.get("TZ", None)
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    yield
+    if tz is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = tz
+    time.tzset()
+
+
+def test_job_info_last_modified_is_utc(client, local_timezone):
+    MonkeyJob(job_uid="job-1", state=monkey_state.MONKEY_STATE_RUNNING).save()
+    last_modified = get_job_info(client, "job-1").last_modified
+    delay = datetime.now(timezone.utc) - last_modified
+    assert abs(delay.total_seconds()) < 60
+
+
+@pytest.fixture
+def log_path(client, tmp_path, monkeypatch):
+    MonkeyJob(job_uid="job-1",
+              state=monkey_state.MONKEY_STATE_RUNNING,
+              provider_name="local").save()
+    log_path = tmp_path / "run.log"
+    log_path.write_bytes(b"line 1\nline 2\n")
+    monkeypatch.setattr(info_routes, "get_job_log_path",
+                        lambda job_uid, provider_name: str(log_path))
+    return log_path
+
+
+def get_job_logs(client, headers=None, **args):
+    return client.get("/get/job/logs",
+                      query_string=dict(job_uid="job-1", **args),
+                      headers=headers)
+
+
+def test_job_logs_range_past_end(client, log_path):
+    response = get_job_logs(client, headers={"Range": "bytes=7-"})
+    assert response.status_code == 206
+    assert response.data == b"line 2\n"
+    assert response.headers["Content-Range"] == "bytes 7-13/14"
+
+    # The log was truncated after the client read it
+    log_path.write_bytes(b"new\n")
+    response = get_job_logs(client, headers={"Range": "bytes=14-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */4"
+    response = get_job_logs(client, headers={"Range": "bytes=0-"})
+    assert response.status_code == 206
+    assert response.data == b"new\n"
+
+
+def test_job_logs_offset_past_end_restarts(client, log_path):
+    response = get_job_logs(client, offset=100)
+    assert response.status_code == 200
+    assert response.data == b"line 1\nline 2\n"
+    assert response.headers["X-Log-Offset"] == "14"
@@ -0,0 +1,88 @@
+import pytest
+
+from core.monkey import Monkey
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+
+
+class FakeHost():
+
+    def __init__(self, run_job):
+        super().__init__()
+        self.run_job = run_job
+        self.cleaned_up = False
+
+    def install_dependency(self, install_item):
+        return True
+
+    def mount_monkeyfs(self, job_yml, provider_info):
+        return True, "Mounted"
+
+    def setup_job(self, job_yml, provider_info):
+        return True, "Setup"
+
+    def cleanup_job(self, job_yml, provider_info):
+        self.cleaned_up = True
+        return True, "Cleaned up"
+
+
+class FakeProvider():
+
+    name = "local"
+
+    def __init__(self, host):
+        super().__init__()
+        self.host = host
+
+    def create_instance(self, machine_params, job_yml):
+        return self.host, True
+
+    def get_dict(self):
+        return {"name": self.name}
+
+
+@pytest.fixture
+def job_yml(sqlite_store):
+    MonkeyJob(job_uid="job-1",
+              state=monkey_state.MONKEY_STATE_DISPATCHING,
+              provider_name="local").save()
+    return {"job_uid": "job-1", "providers": [{"name": "local"}]}
+
+
+def early_stop(job_yml, provider_info):
+    # What the sweep controller does while the job runs
+    job = MonkeyJob.objects(job_uid=job_yml["job_uid"]).get()
+    job.early_stopped = True
+    job.set_state(state=monkey_state.MONKEY_STATE_CLEANUP)
+    return False, "Job was killed"
+
+
+def test_run_job_finishes(job_yml):
+    host = FakeHost(run_job=lambda job_yml, provider_info: (True, "Ran"))
+    success, _ = Monkey.run_job(Monkey.__new__(Monkey), FakeProvider(host),
+                                job_yml)
+    assert success
+    assert host.cleaned_up
+    job = MonkeyJob.objects(job_uid="job-1").get()
+    assert job.state == monkey_state.MONKEY_STATE_FINISHED
+    assert job.run_succeeded
+
+
+def test_run_job_failure_requeues(job_yml):
+    host = FakeHost(run_job=lambda job_yml, provider_info: (False, "Failed"))
+    success, _ = Monkey.run_job(Monkey.__new__(Monkey), FakeProvider(host),
+                                job_yml)
+    assert not success
+    job = MonkeyJob.objects(job_uid="job-1").get()
+    assert job.state == monkey_state.MONKEY_STATE_QUEUED
+
+
+def test_run_job_does_not_requeue_early_stopped(job_yml):
+    host = FakeHost(run_job=early_stop)
+    Monkey.run_job(Monkey.__new__(Monkey), FakeProvider(host), job_yml)
+    job = MonkeyJob.objects(job_uid="job-1").get()
+    assert job.state == monkey_state.MONKEY_STATE_CLEANUP
+    assert job.early_stopped
+    assert not job.run_succeeded
+    # The loop cleans up stopped jobs
+    assert not host.cleaned_up
@@ -0,0 +1,48 @@
+import pytest
+
+from core.events import monkey_events
+from core.events.monkey_event_relay import MonkeyEventRelay
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_counter import get_counter, increment_counter
+from core.mongo.monkey_job import MonkeyJob
+
+
+@pytest.fixture
+def relay(sqlite_store, monkeypatch):
+    monkeypatch.setattr(monkey_events, "event_bus", None)
+    return MonkeyEventRelay()
+
+
+def save_state(job_uid, state):
+    # Writes the job like the scheduler process does, without publishing
+    job = MonkeyJob.objects(job_uid=job_uid).first() or \
+        MonkeyJob(job_uid=job_uid)
+    job.state = state
+    job.save()
+
+
+def test_poll_relays_state_changes(relay):
+    subscriber = monkey_events.get_event_bus().subscribe(job_uid="job-1")
+    save_state("job-1", monkey_state.MONKEY_STATE_QUEUED)
+    assert relay.poll() == 1
+    save_state("job-1", monkey_state.MONKEY_STATE_RUNNING)
+    assert relay.poll() == 1
+    assert relay.poll() == 0
+    states = [subscriber.get(timeout=0)["state"] for _ in range(2)]
+    assert states == [
+        monkey_state.MONKEY_STATE_QUEUED, monkey_state.MONKEY_STATE_RUNNING
+    ]
+
+
+def test_poll_skips_versions_without_jobs(relay):
+    save_state("job-1", monkey_state.MONKEY_STATE_FINISHED)
+    relay.poll()
+    # Archiving bumps the version counter and deletes the job
+    MonkeyJob.objects(job_uid="job-1").delete()
+    increment_counter(monkey_state.MONKEY_JOB_VERSION_COUNTER)
+    assert relay.poll() == 0
+    assert relay.version == get_counter(
+        monkey_state.MONKEY_JOB_VERSION_COUNTER)
+
+    save_state("job-2", monkey_state.MONKEY_STATE_QUEUED)
+    assert relay.poll() == 1
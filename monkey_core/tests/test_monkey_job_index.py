@@ -0,0 +1,18 @@
+from datetime import datetime, timedelta
+
+from core.info.monkey_job_index import MonkeyJobIndex
+from core.mongo.monkey_job import MonkeyJob
+
+
+def test_load_indexes_jobs_oldest_first(sqlite_store):
+    start = datetime(2021, 1, 1)
+    for i, job_uid in enumerate(["job-1-abc", "job-2-abd", "job-3-abc"]):
+        MonkeyJob(job_uid=job_uid,
+                  creation_date=start + timedelta(hours=i)).save()
+    index = MonkeyJobIndex()
+    index.load()
+    assert index.resolve("job-2") == "job-2-abd"
+    # The newest job wins a shared suffix
+    assert index.resolve("abc") == "job-3-abc"
+    assert index.resolve("ab") is None
+    assert index.suggest("job") == ["job-3-abc", "job-2-abd", "job-1-abc"]
@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+
+
+def create_job(job_uid, **kwargs):
+    job = MonkeyJob(job_uid=job_uid, **kwargs)
+    job.save()
+    return job
+
+
+@pytest.fixture
+def jobs(sqlite_store):
+    start = datetime(2021, 1, 1)
+    return [
+        create_job("job-1",
+                   state=monkey_state.MONKEY_STATE_QUEUED,
+                   provider_name="aws",
+                   creation_date=start,
+                   sweep_id="sweep-a",
+                   experiment_hyperparameters={"lr": 0.1}),
+        create_job("job-2",
+                   state=monkey_state.MONKEY_STATE_RUNNING,
+                   provider_name="gcp",
+                   creation_date=start + timedelta(hours=1),
+                   sweep_id="sweep-a",
+                   total_wall_time=20),
+        create_job("job-3",
+                   state=monkey_state.MONKEY_STATE_FINISHED,
+                   provider_name="aws",
+                   creation_date=start + timedelta(hours=2),
+                   total_wall_time=10),
+    ]
+
+
+def job_uids(queryset):
+    return [x.job_uid for x in queryset]
+
+
+def test_filter_column_equality(jobs):
+    assert job_uids(
+        MonkeyJob.objects(provider_name="aws").order_by("job_uid")) == [
+            "job-1", "job-3"
+        ]
+    assert job_uids(MonkeyJob.objects(provider_name="aws",
+                                      state="running")) == []
+
+
+def test_filter_operators(jobs):
+    start = datetime(2021, 1, 1)
+    assert job_uids(
+        MonkeyJob.objects(creation_date__gt=start).order_by("job_uid")) == [
+            "job-2", "job-3"
+        ]
+    assert job_uids(MonkeyJob.objects(creation_date__lte=start)) == ["job-1"]
+    assert job_uids(
+        MonkeyJob.objects(state__in=[
+            monkey_state.MONKEY_STATE_QUEUED,
+            monkey_state.MONKEY_STATE_FINISHED
+        ]).order_by("job_uid")) == ["job-1", "job-3"]
+    assert job_uids(MonkeyJob.objects(state__in=[])) == []
+    assert job_uids(
+        MonkeyJob.objects(state__ne=monkey_state.MONKEY_STATE_QUEUED).order_by(
+            "job_uid")) == ["job-2", "job-3"]
+
+
+def test_filter_none_matches_missing_values(jobs):
+    # Like mongo, comparing to None matches unset fields
+    assert job_uids(MonkeyJob.objects(sweep_id=None)) == ["job-3"]
+    assert job_uids(MonkeyJob.objects(
+        sweep_id__ne=None).order_by("job_uid")) == ["job-1", "job-2"]
+    assert job_uids(MonkeyJob.objects(
+        cached_from=None).order_by("job_uid")) == ["job-1", "job-2", "job-3"]
+
+
+def test_filter_document_fields(jobs):
+    # Fields without a column are filtered in python
+    assert job_uids(
+        MonkeyJob.objects(total_wall_time__gte=10).order_by("job_uid")) == [
+            "job-2", "job-3"
+        ]
+    assert job_uids(MonkeyJob.objects(early_stopped=False,
+                                      provider_name="gcp")) == ["job-2"]
+    # Comparing values of different types never matches
+    assert job_uids(MonkeyJob.objects(total_wall_time__gt="a")) == []
+
+
+def test_filter_unsupported_operator(sqlite_store):
+    with pytest.raises(ValueError):
+        MonkeyJob.objects(state__regex="run")
+
+
+def test_order_by_and_limit(jobs):
+    assert job_uids(MonkeyJob.objects.order_by("-creation_date")) == [
+        "job-3", "job-2", "job-1"
+    ]
+    assert job_uids(MonkeyJob.objects.order_by("creation_date").limit(2)) == [
+        "job-1", "job-2"
+    ]
+    # Document fields sort with unset values first, the limit applies after
+    # filtering in python
+    assert job_uids(MonkeyJob.objects.order_by("total_wall_time")) == [
+        "job-1", "job-3", "job-2"
+    ]
+    assert job_uids(
+        MonkeyJob.objects(
+            total_wall_time__gt=0).order_by("-total_wall_time").limit(1)) == [
+                "job-2"
+            ]
+
+
+def test_count_first_get(jobs):
+    assert MonkeyJob.objects.count() == 3
+    assert MonkeyJob.objects(provider_name="aws").count() == 2
+    assert MonkeyJob.objects(provider_name="azure").first() is None
+    assert MonkeyJob.objects.order_by("-job_uid").first().job_uid == "job-3"
+    assert MonkeyJob.objects(job_uid="job-2").get().provider_name == "gcp"
+    with pytest.raises(MonkeyJob.DoesNotExist):
+        MonkeyJob.objects(job_uid="job-4").get()
+    with pytest.raises(MonkeyJob.MultipleObjectsReturned):
+        MonkeyJob.objects(provider_name="aws").get()
+
+
+def test_as_pymongo_and_distinct(jobs):
+    document = MonkeyJob.objects(job_uid="job-1").as_pymongo().first()
+    assert isinstance(document, dict)
+    assert document["experiment_hyperparameters"] == {"lr": 0.1}
+    assert document["creation_date"] == datetime(2021, 1, 1)
+    assert sorted(
+        MonkeyJob.objects.distinct("provider_name")) == ["aws", "gcp"]
+
+
+def test_queryset_delete(jobs):
+    assert MonkeyJob.objects(provider_name="aws").delete() == 2
+    assert job_uids(MonkeyJob.objects) == ["job-2"]
+    assert MonkeyJob.objects(provider_name="aws").delete() == 0
+
+
+def test_save_increments_version(jobs):
+    versions = [x.version for x in jobs]
+    assert versions == sorted(versions)
+    assert len(set(versions)) == 3
+    job = MonkeyJob.objects(job_uid="job-1").get()
+    job.provider_name = "azure"
+    job.save()
+    assert job.version > versions[-1]
+    stored = MonkeyJob.objects(job_uid="job-1").get()
+    assert stored.version == job.version
+    assert stored.provider_name == "azure"
+    assert MonkeyJob.objects(version__gt=versions[-1]).count() == 1
+
+
+def test_save_merges_changed_fields(jobs):
+    # Two copies changing different fields do not overwrite each other, as
+    # with mongoengine's partial updates
+    first = MonkeyJob.objects(job_uid="job-1").get()
+    second = MonkeyJob.objects(job_uid="job-1").get()
+    first.sweep_metrics = {"loss": 0.5}
+    second.total_wall_time = 30
+    first.save()
+    second.save()
+    stored = MonkeyJob.objects(job_uid="job-1").get()
+    assert stored.sweep_metrics == {"loss": 0.5}
+    assert stored.total_wall_time == 30
+    assert second.sweep_metrics == {"loss": 0.5}
+
+
+def test_reload_and_delete(jobs):
+    job = MonkeyJob.objects(job_uid="job-2").get()
+    other = MonkeyJob.objects(job_uid="job-2").get()
+    other.state = monkey_state.MONKEY_STATE_CLEANUP
+    other.save()
+    assert job.reload().state == monkey_state.MONKEY_STATE_CLEANUP
+    job.delete()
+    with pytest.raises(MonkeyJob.DoesNotExist):
+        job.reload()
+
+
+def test_set_state_updates_columns(jobs):
+    job = MonkeyJob.objects(job_uid="job-2").get()
+    job.set_state(monkey_state.MONKEY_STATE_FINISHED)
+    finished = MonkeyJob.objects(
+        state=monkey_state.MONKEY_STATE_FINISHED).order_by("job_uid")
+    assert job_uids(finished) == ["job-2", "job-3"]
+    assert finished[0].completion_date is not None
+    assert MonkeyJob.objects(completion_date__ne=None).count() == 1
+
+
+def test_only_projects_fields(jobs):
+    # Column projections are read without the json documents
+    documents = list(
+        MonkeyJob.objects(provider_name="aws").order_by("creation_date").only(
+            "job_uid", "creation_date").as_pymongo())
+    assert documents == [{
+        "job_uid": "job-1",
+        "creation_date": datetime(2021, 1, 1)
+    }, {
+        "job_uid": "job-3",
+        "creation_date": datetime(2021, 1, 1, 2)
+    }]
+    assert list(
+        MonkeyJob.objects(total_wall_time__gt=15).only(
+            "job_uid", "total_wall_time").as_pymongo()) == [{
+                "job_uid": "job-2",
+                "total_wall_time": 20
+            }]
+    job = MonkeyJob.objects(job_uid="job-2").only("version").first()
+    assert job.version == jobs[1].version
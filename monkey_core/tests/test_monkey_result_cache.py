@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta
+
+from core.cache.monkey_result_cache import find_cached_job
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+
+
+def finished_job(job_uid, run_succeeded, age):
+    MonkeyJob(job_uid=job_uid,
+              state=monkey_state.MONKEY_STATE_FINISHED,
+              result_key="key",
+              run_succeeded=run_succeeded,
+              completion_date=datetime.now() - timedelta(hours=age)).save()
+
+
+def test_find_cached_job_skips_timed_out_jobs(sqlite_store):
+    # Killed on timeout, it finished without running to completion
+    finished_job("job-timed-out", run_succeeded=False, age=1)
+    assert find_cached_job("key") is None
+
+    finished_job("job-succeeded", run_succeeded=True, age=2)
+    assert find_cached_job("key").job_uid == "job-succeeded"
+    assert find_cached_job("other-key") is None
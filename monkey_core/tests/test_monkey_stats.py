@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.info.monkey_stats import (get_hourly_buckets, get_job_stats,
+                                    get_sqlite_job_stats)
+from core.mongo import mongo_global as monkey_state
+from core.mongo.monkey_job import MonkeyJob
+
+SINCE = datetime(2021, 6, 1, 10)
+
+
+def at(hours):
+    return SINCE + timedelta(hours=hours)
+
+
+def create_job(job_uid, state, **kwargs):
+    MonkeyJob(job_uid=job_uid, state=state, **kwargs).save()
+
+
+def test_get_hourly_buckets():
+    buckets = get_hourly_buckets(since=SINCE,
+                                 hours=2,
+                                 created={
+                                     "2021-06-01T10": 3,
+                                     "2021-06-01T11": 1
+                                 },
+                                 dequeued={"2021-06-01T11": 2},
+                                 finished={"2021-06-01T12": 1},
+                                 queue_depth=1)
+    assert buckets == [{
+        "hour": "2021-06-01T10",
+        "created": 3,
+        "dequeued": 0,
+        "finished": 0,
+        "queue_depth": 4
+    }, {
+        "hour": "2021-06-01T11",
+        "created": 1,
+        "dequeued": 2,
+        "finished": 0,
+        "queue_depth": 3
+    }, {
+        "hour": "2021-06-01T12",
+        "created": 0,
+        "dequeued": 0,
+        "finished": 1,
+        "queue_depth": 3
+    }]
+
+
+@pytest.fixture
+def jobs(sqlite_store):
+    # Queued since before the window
+    create_job("queued",
+               monkey_state.MONKEY_STATE_QUEUED,
+               creation_date=at(-2))
+    # Dispatched in the window, still running
+    create_job("running",
+               monkey_state.MONKEY_STATE_RUNNING,
+               creation_date=at(-1),
+               run_dispatch_date=at(1.5))
+    # Dispatched before the window, never part of its queue
+    create_job("old",
+               monkey_state.MONKEY_STATE_RUNNING,
+               creation_date=at(-3),
+               run_dispatch_date=at(-2))
+    # Created, dispatched and finished in the window
+    create_job("finished",
+               monkey_state.MONKEY_STATE_FINISHED,
+               provider_name="aws",
+               creation_date=at(0.5),
+               run_dispatch_date=at(1.2),
+               completion_date=at(2.5),
+               run_elapsed_time=30,
+               total_wall_time=60)
+    # Reused results finish without being dispatched
+    create_job("cached",
+               monkey_state.MONKEY_STATE_FINISHED,
+               provider_name="aws",
+               creation_date=at(2.1),
+               completion_date=at(2.2),
+               total_wall_time=0)
+
+
+def test_sqlite_job_stats(jobs):
+    stats = get_sqlite_job_stats(SINCE, 2)
+    assert stats["total"] == 5
+    assert stats["states"] == {
+        monkey_state.MONKEY_STATE_QUEUED: 1,
+        monkey_state.MONKEY_STATE_RUNNING: 2,
+        monkey_state.MONKEY_STATE_FINISHED: 2
+    }
+    assert stats["providers"] == {None: 3, "aws": 2}
+    assert [(x["created"], x["dequeued"], x["finished"], x["queue_depth"])
+            for x in stats["hourly"]] == [(1, 0, 0, 3), (0, 2, 0, 1),
+                                          (1, 1, 2, 1)]
+    assert stats["total_wall_time"] == {
+        "count": 2,
+        "average": 30,
+        "max": 60,
+        "p50": 0,
+        "p90": 60,
+        "p99": 60
+    }
+
+
+def test_running_job_is_not_queued(sqlite_store):
+    create_job("queued", monkey_state.MONKEY_STATE_QUEUED)
+    create_job("running", monkey_state.MONKEY_STATE_QUEUED)
+    job = MonkeyJob.objects(job_uid="running").get()
+    job.set_state(monkey_state.MONKEY_STATE_DISPATCHING)
+    job.set_state(monkey_state.MONKEY_STATE_RUNNING)
+    assert job.run_dispatch_date is not None
+
+    stats = get_job_stats(None, hours=1)
+    assert stats["hourly"][-1]["created"] == 2
+    assert stats["hourly"][-1]["dequeued"] == 1
+    assert stats["hourly"][-1]["queue_depth"] == 1
+
+    # A requeued job waits again
+    job.set_state(monkey_state.MONKEY_STATE_QUEUED)
+    assert job.run_dispatch_date is None
+    stats = get_job_stats(None, hours=1)
+    assert stats["hourly"][-1]["queue_depth"] == 2
@@ -0,0 +1,24 @@
+import hashlib
+import os
+
+from core.routes import utils
+
+
+def test_get_file_md5_rehashes_changed_files(tmp_path):
+    path = str(tmp_path / "output.txt")
+    with open(path, "wb") as f:
+        f.write(b"first")
+    assert utils.get_file_md5(path) == hashlib.md5(b"first").hexdigest()
+    hits = utils.calculate_file_md5.cache_info().hits
+    assert utils.get_file_md5(path) == hashlib.md5(b"first").hexdigest()
+    assert utils.calculate_file_md5.cache_info().hits == hits + 1
+
+    with open(path, "wb") as f:
+        f.write(b"second")
+    os.utime(path, ns=(0, 1))
+    assert utils.get_file_md5(path) == hashlib.md5(b"second").hexdigest()
+
+
+def test_file_md5_cache_is_bounded():
+    assert utils.calculate_file_md5.cache_info().maxsize == \
+        utils.FILE_MD5_CACHE_SIZE
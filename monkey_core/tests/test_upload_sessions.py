@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import io
+import os
+
+import pytest
+
+from core import monkey_global
+from core.routes import upload_sessions
+from core.routes.upload_sessions import (
+    UploadSessionReader, assemble_upload_session, complete_upload_session,
+    get_received_chunks, get_upload_chunk_path, load_upload_session,
+    start_upload_session, write_upload_chunk)
+
+CHUNK_SIZE = 1024
+DATA = bytes(range(256)) * 10
+
+
+def sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.fixture
+def monkeyfs(tmp_path, monkeypatch):
+    monkeypatch.setattr(monkey_global, "MONKEYFS_LOCAL_PATH", str(tmp_path))
+    return tmp_path
+
+
+@pytest.fixture
+def session(monkeyfs):
+    success, _, session = start_upload_session(target="blobs",
+                                               params={"provider": "local"},
+                                               size=len(DATA),
+                                               checksum=sha256(DATA),
+                                               chunk_size=CHUNK_SIZE)
+    assert success
+    return session
+
+
+def get_chunk(index):
+    return DATA[index * CHUNK_SIZE:(index + 1) * CHUNK_SIZE]
+
+
+def write_chunk(session, index, data=None, checksum=None, encoding=None):
+    data = get_chunk(index) if data is None else data
+    checksum = checksum or sha256(get_chunk(index))
+    return write_upload_chunk(session, index, checksum, io.BytesIO(data),
+                              encoding)
+
+
+def write_all_chunks(session):
+    for index in range(session["num_chunks"]):
+        assert write_chunk(session, index)[0]
+
+
+def test_start_upload_session_validates(monkeyfs):
+    assert not start_upload_session("code", {}, size=1, checksum="a" * 64)[0]
+    assert not start_upload_session("blobs", {}, size=-1, checksum="a" * 64)[0]
+    assert not start_upload_session("blobs", {}, size=1, checksum="abc")[0]
+    assert not start_upload_session(
+        "blobs", {}, size=1, checksum="a" * 64, chunk_size=0)[0]
+    assert load_upload_session("../uploads") is None
+
+
+def test_write_chunks_and_assemble(session, monkeyfs):
+    assert session["num_chunks"] == 3
+    write_all_chunks(session)
+    assert get_received_chunks(session) == [0, 1, 2]
+    destination = str(monkeyfs / "assembled")
+    assert assemble_upload_session(session, destination)[0]
+    with open(destination, "rb") as f:
+        assert f.read() == DATA
+
+
+def test_write_chunk_rejects_bad_checksum(session):
+    success, msg = write_chunk(session, 0, checksum=sha256(b"other"))
+    assert not success
+    assert "checksum" in msg
+    assert get_received_chunks(session) == []
+    # Nothing partial is left behind
+    chunks_dir = os.path.dirname(
+        get_upload_chunk_path(session["session_id"], 0))
+    assert os.listdir(chunks_dir) == []
+
+
+def test_write_chunk_rejects_bad_length(session):
+    assert not write_chunk(session, 0, data=get_chunk(0)[:-1])[0]
+    assert not write_chunk(session, 0, data=get_chunk(0) + b"x")[0]
+    # The last chunk is shorter than the others
+    assert not write_chunk(session, 2, data=get_chunk(1))[0]
+    assert not write_chunk(session, 3, data=b"")[0]
+    assert get_received_chunks(session) == []
+
+
+def test_write_chunk_gzip(session):
+    success, _ = write_chunk(session,
+                             1,
+                             data=gzip.compress(get_chunk(1)),
+                             encoding="gzip")
+    assert success
+    assert get_received_chunks(session) == [1]
+    assert not write_chunk(session, 1, encoding="br")[0]
+
+
+def test_write_chunk_caps_gzip_bombs(session, monkeypatch):
+    written = []
+    original_write = upload_sessions.tempfile.NamedTemporaryFile
+
+    def tracking_tempfile(*args, **kwargs):
+        tmp = original_write(*args, **kwargs)
+        write = tmp.write
+        tmp.write = lambda block: written.append(len(block)) or write(block)
+        return tmp
+
+    monkeypatch.setattr(upload_sessions.tempfile, "NamedTemporaryFile",
+                        tracking_tempfile)
+    bomb = gzip.compress(bytes(64 * 1024 * 1024))
+    success, msg = write_chunk(session, 0, data=bomb, encoding="gzip")
+    assert not success
+    assert "bytes" in msg
+    # Decompression stops one byte past what the chunk can hold
+    assert sum(written) == CHUNK_SIZE + 1
+
+
+def test_resume_upload_session(session, monkeyfs):
+    assert write_chunk(session, 0)[0]
+    assert write_chunk(session, 2)[0]
+    # Starting the same upload again returns the session and its chunks
+    success, msg, resumed = start_upload_session(target="blobs",
+                                                 params={"provider": "local"},
+                                                 size=len(DATA),
+                                                 checksum=sha256(DATA),
+                                                 chunk_size=CHUNK_SIZE)
+    assert success
+    assert msg == "Resuming upload session"
+    assert resumed == session
+    assert get_received_chunks(resumed) == [0, 2]
+    assert not assemble_upload_session(resumed, str(monkeyfs / "assembled"))[0]
+    assert write_chunk(resumed, 1)[0]
+    assert assemble_upload_session(resumed, str(monkeyfs / "assembled"))[0]
+
+
+def test_streamed_session(monkeyfs):
+    success, _, session = start_upload_session(target="persist",
+                                               params={"job_uid": "job-1"},
+                                               upload_key="archive-1",
+                                               chunk_size=CHUNK_SIZE)
+    assert success
+    assert session["num_chunks"] is None
+    for index in range(3):
+        assert write_chunk(session, index)[0]
+    assert get_received_chunks(session) == [0, 1, 2]
+    assert not complete_upload_session(session, len(DATA), "abc")[0]
+    assert complete_upload_session(session, len(DATA), sha256(DATA))[0]
+    assert session["num_chunks"] == 3
+    assert load_upload_session(session["session_id"]) == session
+    assert not complete_upload_session(session, len(DATA) + 1, sha256(DATA))[0]
+
+
+def test_upload_session_reader(session):
+    write_all_chunks(session)
+    reader = UploadSessionReader(session)
+    assert reader.read(100) == DATA[:100]
+    assert reader.read(CHUNK_SIZE) == DATA[100:100 + CHUNK_SIZE]
+    assert reader.read() == DATA[100 + CHUNK_SIZE:]
+    assert reader.read() == b""
+    assert reader.verify()
+    reader.close()
+
+
+def test_upload_session_reader_detects_corruption(session):
+    write_all_chunks(session)
+    with open(get_upload_chunk_path(session["session_id"], 1), "r+b") as f:
+        f.write(b"x")
+    reader = UploadSessionReader(session)
+    assert reader.read(10) == DATA[:10]
+    assert not reader.verify()
+    reader.close()
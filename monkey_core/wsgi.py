@@ -0,0 +1,17 @@
+"""WSGI entry point that serves the monkey core api
+
+    gunicorn wsgi:application
+
+The api only serves http, jobs are dispatched by a separate scheduler
+process started with `python3 monkey_core.py --role scheduler`.  It runs a
+single threaded worker, configured in gunicorn.conf.py, so only one event
+relay polls the job store.
+"""
+import os
+
+os.environ.setdefault("MONKEY_ROLE", "api")
+
+from core import monkey_global
+from monkey_core import application
+
+monkey_global.get_monkey()
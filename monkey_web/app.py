@@ -24,11 +24,23 @@ app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
 server = app.server
 
 
+# Last /list/jobs response, refetched only when its ETag changes
+run_list_cache = {'etag': None, 'response': None}
+
+
 def get_run_list(project=None):
+    headers = dict()
+    if run_list_cache['etag'] is not None:
+        headers['If-None-Match'] = run_list_cache['etag']
     try:
-        r = requests.get(f'{MONKEY_CORE}/list/jobs')
+        r = requests.get(f'{MONKEY_CORE}/list/jobs', headers=headers)
         r.raise_for_status()
-        response = r.json()
+        if r.status_code == 304:
+            response = run_list_cache['response']
+        else:
+            response = r.json()
+            run_list_cache['etag'] = r.headers.get('ETag', None)
+            run_list_cache['response'] = response
     except:
         raise
     runs = [{
@@ -43,3 +55,9 @@ def get_run_list(project=None):
         } for run in response]
     return [run for run in runs
             if project is None or run['project'] == project]
+
+
+def get_stats():
+    r = requests.get(f'{MONKEY_CORE}/stats')
+    r.raise_for_status()
+    return r.json()['stats']
@@ -4,7 +4,7 @@ import dash_table
 from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
 
-from app import app, MONKEY_CORE, MONKEY_STATUS, get_run_list
+from app import app, MONKEY_CORE, MONKEY_STATUS, get_run_list, get_stats
 
 
 DASHBOARD_RUNS_COLUMNS = [
@@ -48,7 +48,7 @@ def get_layout():
                     dcc.Link(href=f'/project/{project["id"]}', children=project['id']),
                     html.Span(f' ({project["n_runs"]} runs)')
                     ])
-                for project in to_project_list(runs)
+                for project in to_project_list(get_stats())
                 ]),
             ]),
 
@@ -64,14 +64,13 @@ def get_layout():
         ])
 
 
-def to_project_list(runs):
-    projects = {}
-    for run in runs:
-        project = projects.setdefault(run['project'], {'n_runs': 0})
-        project['n_runs'] += 1
+def to_project_list(stats):
+    projects = [
+            (project['name'] or 'Unnamed project', project['count'])
+            for project in stats['projects']]
     return [
-            dict(id=project, project=project, **projects[project])
-            for project in projects]
+            dict(id=project, project=project, n_runs=n_runs)
+            for project, n_runs in projects]
 
 
 @app.callback(Output('dashboard-run-list', 'data'),